@@ -0,0 +1,613 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from logging import getLogger
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, Optional, Set
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import connections
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.request import Request
+
+from .coalesce import Flight, RemoteLock, SingleFlight
+from .freshness import get_freshness_registry, track_tables
+from .scope import get_data_scope
+
+logging = getLogger("analytics.cache")
+
+__all__ = [
+    "cache_response",
+    "response_cache",
+    "make_cache_key",
+    "cache_scope",
+    "cache_stats",
+    "cached_views",
+    "revalidating",
+    "REALTIME_TTL",
+    "MAX_STALE",
+]
+
+# seconds realtime (intraday) boards are cached for
+REALTIME_TTL = 30
+
+# seconds an expensive board is served stale while a background thread refreshes it
+MAX_STALE = 120
+
+# headers replayed on a cache hit, next to the rendered body
+STORED_HEADERS = ("Content-Type", "Content-Disposition")
+
+
+class CacheCounters:
+    """
+    Per process counters of the response cache, by endpoint: hits, misses (the view
+    ran), 304s, the requests coalesced into a concurrent identical one, in this
+    worker or in another (`remote_coalesced`), and the stale responses served while
+    refreshing them in the background.
+    """
+
+    COUNTERS = (
+        "hits",
+        "misses",
+        "not_modified",
+        "coalesced",
+        "remote_coalesced",
+        "coalesce_fallbacks",
+        "stale",
+        "refreshes",
+        "refresh_failures",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(self.COUNTERS, 0)
+        )
+
+    def incr(self, endpoint: str, counter: str) -> None:
+        with self._lock:
+            self.endpoints[endpoint][counter] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {name: dict(counts) for name, counts in self.endpoints.items()}
+        totals = {
+            counter: sum(counts[counter] for counts in endpoints.values())
+            for counter in self.COUNTERS
+        }
+        hits, misses = totals["hits"], totals["misses"]
+        coalesced = totals["coalesced"] + totals["remote_coalesced"]
+        return {
+            **totals,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            # share of the cache misses answered without running the view
+            "coalesce_ratio": (
+                round(coalesced / (coalesced + misses), 4)
+                if coalesced + misses
+                else 0.0
+            ),
+            "endpoints": endpoints,
+        }
+
+
+counters = CacheCounters()
+
+# in-flight computations of this process, by cache key
+_flights = SingleFlight()
+
+# set while a stale response is refreshed in the background: run the view, skip
+# the lookups
+_revalidating: ContextVar[bool] = ContextVar("dashboards_revalidating", default=False)
+_refreshing: Set[str] = set()
+_refreshing_lock = threading.Lock()
+_refresher: Optional[ThreadPoolExecutor] = None
+
+
+def response_cache() -> BaseCache:
+    return caches[settings.DASHBOARD_CACHE["ALIAS"]]
+
+
+def cache_scope(request: Request) -> str:
+    """Resolved data scope of the request, shared by every user with the same data."""
+    if not request.user.is_authenticated:
+        return "public"
+    return get_data_scope(request.user).cache_key
+
+
+def make_cache_key(request: Request, scope: str, version: str = "") -> str:
+    """
+    Key of a response: origin (the pagination links are absolute), endpoint,
+    normalized query parameters (sorted, blank values dropped), data scope and the
+    data version of the tables the endpoint reads. Hashed to stay within the key
+    limits of every backend.
+    """
+    params = sorted(
+        (name, value.strip())
+        for name, values in request.query_params.lists()
+        for value in values
+        if value.strip()
+    )
+    origin = f"{request.scheme}://{request.get_host()}"
+    raw = f"{origin}{request.path}?{urlencode(params)}|{scope}|{version}"
+    return f"dashboards:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def _cached_response(entry: Dict[str, Any], source: str = "HIT") -> HttpResponse:
+    response = HttpResponse(entry["content"], headers=entry["headers"])
+    response["X-Cache"] = source
+    response["Age"] = str(int(time.time() - entry["stored_at"]))
+    return response
+
+
+def _payload_etag(content: bytes) -> str:
+    return quote_etag(hashlib.sha256(content).hexdigest()[:32])
+
+
+def _validators(response: HttpResponse, etag: str, last_modified: Optional[datetime]):
+    """Set the conditional GET validators, clients must revalidate every time."""
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+def _replay(
+    request: Request,
+    endpoint: str,
+    entry: Dict[str, Any],
+    etag: Optional[str],
+    last_modified: Optional[datetime],
+    source: str,
+) -> HttpResponse:
+    """Answer with a stored (cached or coalesced) response, or a `304`."""
+    etag = etag or entry.get("etag") or _payload_etag(entry["content"])
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        counters.incr(endpoint, "not_modified")
+    else:
+        response = _cached_response(entry, source)
+    _validators(response, etag, last_modified)
+    return response
+
+
+# every view decorated with `cache_response`, by name
+cached_views: Dict[str, Callable] = {}
+
+
+@contextmanager
+def revalidating() -> Iterator[None]:
+    """Run the cached views of the block, storing their response whatever is cached."""
+    token = _revalidating.set(True)
+    try:
+        yield
+    finally:
+        _revalidating.reset(token)
+
+
+def _stale_since(
+    entry: Dict[str, Any], version: str, tables: Iterable[str]
+) -> Optional[float]:
+    """When the entry became stale (expired or outdated by a load), `None` if fresh."""
+    since = []
+    expires_at = entry.get("expires_at")
+    if expires_at is not None and expires_at <= time.time():
+        since.append(expires_at)
+    if entry.get("version", version) != version:
+        # not noticed by this process: at least as old as the entry
+        since.append(
+            max(entry["stored_at"], get_freshness_registry().last_change(tables) or 0)
+        )
+    return min(since, default=None)
+
+
+def _render(request: Request, response: HttpResponse) -> HttpResponse:
+    """Render a view response outside of the DRF handler, like `finalize_response`."""
+    if isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = {"request": request, "response": response}
+        response.render()
+    return response
+
+
+def _on_render_failure(response: SimpleTemplateResponse, callback: Callable) -> None:
+    """Call `callback` when rendering `response` raises, its callbacks never run."""
+    render = response.render
+
+    def render_or_fail():
+        try:
+            return render()
+        except BaseException:
+            callback()
+            raise
+
+    response.render = render_or_fail
+
+
+def _refresh_in_background(key: str, refresh: Callable[[], HttpResponse]) -> bool:
+    """Refresh `key` on a `DASHBOARD_CACHE["REFRESH_WORKERS"]` thread, once at a time."""
+    global _refresher
+    with _refreshing_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+        if _refresher is None:
+            _refresher = ThreadPoolExecutor(
+                settings.DASHBOARD_CACHE["REFRESH_WORKERS"],
+                thread_name_prefix="dashboard-refresh",
+            )
+
+    def run():
+        try:
+            with revalidating():
+                refresh()
+        except Exception as exc:  # the stale response is already served
+            logging.warning(f"could not refresh {key}: {exc}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+            # Django connections are per thread, the refresher has no request end
+            connections.close_all()
+
+    _refresher.submit(run)
+    return True
+
+
+def _endpoint_tables(cache: BaseCache, endpoint: str) -> Optional[FrozenSet[str]]:
+    """Tables read by the endpoint, learned by this process or by another worker."""
+    registry = get_freshness_registry()
+    tables = registry.tables_for(endpoint)
+    if tables is None:
+        tables = cache.get(f"dashboards:tables:{endpoint}")
+        if tables is not None:
+            registry.learn(endpoint, tables)
+    return tables
+
+
+class _CachedCall:
+    """
+    One GET of a `cache_response` view, answered by the cheapest step that can:
+    a `304`, the cache, a stale response, a concurrent identical request, or at
+    last the view itself, whose rendered response is stored.
+    """
+
+    def __init__(
+        self,
+        view: Callable,
+        func: Callable,
+        ttl: Optional[int],
+        max_stale: int,
+        request: Request,
+        args: tuple,
+        kwargs: dict,
+    ):
+        self.view = view
+        self.func = func
+        self.endpoint = func.__name__
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.request = request
+        self.args = args
+        self.kwargs = kwargs
+        self.config = settings.DASHBOARD_CACHE
+        self.cache = response_cache()
+        self.registry = get_freshness_registry()
+        self.scope = cache_scope(request)
+        self.is_revalidating = _revalidating.get()
+        self.flight: Optional[Flight] = None
+        self.lock: Optional[RemoteLock] = None
+        self.finished = False
+        self._resolve()
+
+    def _resolve(self) -> None:
+        """Key, data version and validators, from the tables the endpoint reads."""
+        try:
+            self.tables = _endpoint_tables(self.cache, self.endpoint)
+        except Exception as exc:  # a cache outage must not fail the request
+            logging.warning(f"could not read the tables of {self.endpoint}: {exc}")
+            self.tables = self.registry.tables_for(self.endpoint)
+
+        tables, request, scope = self.tables, self.request, self.scope
+        self.versioned = bool(tables) and self.registry.is_versioned(tables)
+        self.version = self.registry.version_of(tables) if tables is not None else ""
+        self.key = (
+            make_cache_key(request, scope, self.version) if tables is not None else None
+        )
+        # the last stored response whatever its version, kept `max_stale` longer
+        self.latest_key = (
+            make_cache_key(request, scope, "*") if self.max_stale else None
+        )
+        self.flight_key = self.key or make_cache_key(request, scope)
+        self.last_modified = None
+        self.etag = None
+        if self.versioned:
+            self.last_modified = self.registry.last_modified(tables)
+            self.etag = quote_etag(self.key.rsplit(":", 1)[1][:32])
+
+    def answer(self) -> HttpResponse:
+        for step in (self.not_modified, self.lookup, self.coalesce):
+            response = step()
+            if response is not None:
+                return response
+        return self.run()
+
+    def replay(self, entry: Dict[str, Any], source: str) -> HttpResponse:
+        return _replay(
+            self.request, self.endpoint, entry, self.etag, self.last_modified, source
+        )
+
+    def not_modified(self) -> Optional[HttpResponse]:
+        """`304` without running the view, when the ETag derives from the version."""
+        if not self.versioned or self.is_revalidating:
+            return None
+        last_modified = self.last_modified
+        response = get_conditional_response(
+            self.request,
+            etag=self.etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is not None:
+            counters.incr(self.endpoint, "not_modified")
+            _validators(response, self.etag, last_modified)
+        return response
+
+    def lookup(self) -> Optional[HttpResponse]:
+        """The cached response, or the latest one while it is fresh or stale enough."""
+        if not self.config["ENABLED"] or self.key is None or self.is_revalidating:
+            return None
+        entry = latest = None
+        try:
+            entry = self.cache.get(self.key)
+            if entry is None and self.latest_key is not None:
+                latest = self.cache.get(self.latest_key)
+        except Exception as exc:  # a cache outage must not fail the request
+            logging.warning(f"could not read the cache of {self.endpoint}: {exc}")
+        if entry is None and latest is not None:
+            stale_since = _stale_since(latest, self.version, self.tables)
+            if stale_since is not None:
+                return self.serve_stale(latest, stale_since)
+            entry = latest
+        if entry is None:
+            return None
+        counters.incr(self.endpoint, "hits")
+        return self.replay(entry, "HIT")
+
+    def serve_stale(
+        self, latest: Dict[str, Any], stale_since: float
+    ) -> Optional[HttpResponse]:
+        """Serve `latest` for at most `max_stale` seconds, refreshing it meanwhile."""
+        if time.time() - stale_since > self.max_stale:
+            return None
+        counters.incr(self.endpoint, "stale")
+        _refresh_in_background(self.latest_key, self.refresh)
+        response = _replay(self.request, self.endpoint, latest, None, None, "STALE")
+        response["Warning"] = '110 - "Response is Stale"'
+        return response
+
+    def refresh(self) -> None:
+        try:
+            refreshed = _render(
+                self.request, self.view(self.request, *self.args, **self.kwargs)
+            )
+        except Exception:
+            counters.incr(self.endpoint, "refresh_failures")
+            raise
+        if refreshed.status_code != status.HTTP_200_OK:
+            counters.incr(self.endpoint, "refresh_failures")
+
+    def coalesce(self) -> Optional[HttpResponse]:
+        """
+        The response of a concurrent identical request, in this worker or another
+        one; `None` when this request leads and runs the view.
+        """
+        coalesce = settings.DASHBOARD_COALESCE
+        if not coalesce["ENABLED"]:
+            return None
+        flight, leader = _flights.join(self.flight_key, coalesce["WAIT_TIMEOUT"])
+        if not leader:
+            shared = flight.wait(coalesce["WAIT_TIMEOUT"])
+            if shared is not None:
+                counters.incr(self.endpoint, "coalesced")
+                return self.replay(shared, "COALESCED")
+            # the leader failed or is too slow, run the view on our own
+            counters.incr(self.endpoint, "coalesce_fallbacks")
+            return None
+        self.flight = flight
+        if coalesce["CROSS_WORKER"] and self.key is not None:
+            return self.coalesce_remote(coalesce)
+        return None
+
+    def coalesce_remote(self, coalesce: Dict[str, Any]) -> Optional[HttpResponse]:
+        lock = RemoteLock(self.cache, self.key, coalesce["WAIT_TIMEOUT"])
+        try:
+            owner = lock.acquire()
+        except Exception as exc:  # a cache outage must not fail the request
+            logging.warning(f"could not lock {self.endpoint}: {exc}")
+            owner = True
+        if owner:
+            self.lock = lock
+            return None
+        # another worker runs the view, wait for it to store the result
+        try:
+            shared = lock.wait_for(
+                self.key, coalesce["WAIT_TIMEOUT"], coalesce["POLL_INTERVAL"]
+            )
+        except Exception as exc:
+            logging.warning(f"could not wait for {self.endpoint}: {exc}")
+            shared = None
+        if shared is None:
+            counters.incr(self.endpoint, "coalesce_fallbacks")
+            return None
+        counters.incr(self.endpoint, "remote_coalesced")
+        self.finish(shared)
+        return self.replay(shared, "COALESCED")
+
+    def finish(self, entry: Optional[Dict[str, Any]]) -> None:
+        """Hand the result to the waiting duplicates, `None` lets them retry."""
+        if self.finished:
+            return
+        self.finished = True
+        if self.lock is not None:
+            try:
+                self.lock.release()
+            except Exception as exc:
+                logging.warning(f"could not unlock {self.endpoint}: {exc}")
+        if self.flight is not None:
+            _flights.finish(self.flight_key, self.flight, entry)
+
+    def run(self) -> HttpResponse:
+        """Run the view and store its response once rendered."""
+        counters.incr(self.endpoint, "refreshes" if self.is_revalidating else "misses")
+        try:
+            with track_tables() as read_tables:
+                response = self.func(self.request, *self.args, **self.kwargs)
+        except BaseException:
+            self.finish(None)
+            raise
+        self.learn(read_tables)
+
+        if isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+            # DRF responses are rendered by the handler once the view returned
+            response.add_post_render_callback(self.store)
+            # a renderer that raises must not hold the duplicates until timeout
+            _on_render_failure(response, lambda: self.finish(None))
+        else:
+            self.store(response)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def learn(self, read_tables: Set[str]) -> None:
+        """Add the tables the run read, they may depend on the parameters."""
+        tables = self.tables
+        if tables is not None and tables.issuperset(read_tables):
+            return
+        tables = self.tables = (tables or frozenset()).union(read_tables)
+        self.registry.learn(self.endpoint, tables)
+        try:
+            self.cache.set(
+                f"dashboards:tables:{self.endpoint}", tables, self.config["TABLES_TTL"]
+            )
+        except Exception as exc:
+            logging.warning(f"could not cache the tables of {self.endpoint}: {exc}")
+        self.version = self.registry.version_of(tables)
+        self.key = make_cache_key(self.request, self.scope, self.version)
+
+    @property
+    def timeout(self) -> int:
+        config = self.config
+        if self.endpoint in config["TTLS"]:
+            return config["TTLS"][self.endpoint]
+        if self.ttl:
+            # tables versioned by trading date only change once a day
+            return self.ttl
+        if self.tables and self.registry.is_versioned(self.tables):
+            return config["VERSIONED_TTL"]
+        return config["DEFAULT_TTL"]
+
+    def store(self, rendered: HttpResponse) -> None:
+        if rendered.status_code != status.HTTP_200_OK or rendered.streaming:
+            self.finish(None)
+            return
+        etag = self.etag or _payload_etag(rendered.content)
+        _validators(rendered, etag, self.last_modified)
+        timeout = self.timeout
+        entry = {
+            "content": rendered.content,
+            "headers": {
+                header: rendered[header]
+                for header in STORED_HEADERS
+                if rendered.has_header(header)
+            },
+            "etag": etag,
+            "version": self.version,
+            "stored_at": time.time(),
+        }
+        entry["expires_at"] = entry["stored_at"] + timeout
+        if self.config["ENABLED"]:
+            try:
+                self.cache.set(self.key, entry, timeout)
+                if self.latest_key is not None:
+                    self.cache.set(self.latest_key, entry, timeout + self.max_stale)
+            except Exception as exc:  # a cache outage must not fail the request
+                logging.warning(f"could not cache {self.endpoint}: {exc}")
+        self.finish(entry)
+
+
+def cache_response(ttl: Optional[int] = None, stale_while_revalidate: int = 0):
+    """
+    Cache the rendered response of a dashboard view in the `DASHBOARD_CACHE` cache
+    and answer conditional GETs.
+
+    Keyed by endpoint, query parameters and the data scope of the user, not by the
+    user, so every user seeing the same data shares one entry, and by the data
+    version of the tables the view reads (see `analytics.freshness`), so a new ETL
+    load invalidates the entry right away. The TTL is, in order,
+    `DASHBOARD_CACHE["TTLS"][<view name>]`, `ttl`, `DASHBOARD_CACHE["VERSIONED_TTL"]`
+    when every table is versioned, or `DASHBOARD_CACHE["DEFAULT_TTL"]`.
+
+    Responses carry a strong `ETag` and, for versioned tables, a `Last-Modified`
+    from their load stamp. When every table is versioned the ETag derives from the
+    data version, so `If-None-Match` / `If-Modified-Since` get a `304` without
+    running the view at all; otherwise it is the hash of the payload.
+
+    Concurrent identical requests (same key) are coalesced: the first one runs the
+    view, the others wait for its rendered response (`X-Cache: COALESCED`), across
+    the workers too with `DASHBOARD_COALESCE["CROSS_WORKER"]`.
+
+    With `stale_while_revalidate` (or `DASHBOARD_CACHE["MAX_STALE"][<view name>]`)
+    seconds, an expired or outdated response is still served, at most that long
+    (`X-Cache: STALE`, `Age`, `Warning`), while a background thread refreshes it.
+
+    Must be placed below `@permission_classes`, the permissions are still checked
+    on every request.
+    """
+
+    def decorator(func):
+        endpoint = func.__name__
+
+        @wraps(func)
+        def wrapper(request: Request, *args, **kwargs):
+            if request.method != "GET":
+                return func(request, *args, **kwargs)
+            max_stale = settings.DASHBOARD_CACHE["MAX_STALE"].get(
+                endpoint, stale_while_revalidate
+            )
+            call = _CachedCall(wrapper, func, ttl, max_stale, request, args, kwargs)
+            return call.answer()
+
+        wrapper.cache_ttl = ttl
+        wrapper.max_stale = stale_while_revalidate
+        cached_views[endpoint] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, Any]:
+    config = settings.DASHBOARD_CACHE
+    cache = response_cache()
+    return {
+        "enabled": config["ENABLED"],
+        "backend": f"{cache.__class__.__module__}.{cache.__class__.__name__}",
+        "default_ttl": config["DEFAULT_TTL"],
+        "versioned_ttl": config["VERSIONED_TTL"],
+        "tables_ttl": config["TABLES_TTL"],
+        "ttls": config["TTLS"],
+        "max_stale": config["MAX_STALE"],
+        "refreshing": len(_refreshing),
+        "coalesce": settings.DASHBOARD_COALESCE,
+        "in_flight": _flights.in_flight,
+        **counters.as_dict(),
+        "freshness": get_freshness_registry().as_dict(),
+    }
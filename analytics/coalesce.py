@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from django.core.cache import BaseCache
+
+__all__ = ["Flight", "SingleFlight", "RemoteLock"]
+
+
+class Flight:
+    """One in-progress computation, followers wait on its result."""
+
+    def __init__(self, timeout: float):
+        self.result: Optional[Any] = None
+        # a leader that never finished (e.g. the response was never rendered) must
+        # not hold the key forever
+        self.expires_at = time.monotonic() + timeout
+        self._done = threading.Event()
+
+    def wait(self, timeout: float) -> Optional[Any]:
+        """Result of the leader, `None` if it failed or did not finish in time."""
+        if not self._done.wait(timeout):
+            return None
+        return self.result
+
+    def resolve(self, result: Optional[Any]) -> None:
+        self.result = result
+        self._done.set()
+
+
+class SingleFlight:
+    """
+    In-process request coalescing: the first caller of a key becomes the leader and
+    computes, concurrent callers of the same key wait for the leader's result
+    instead of running the very same query.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: str, timeout: float) -> Tuple[Flight, bool]:
+        """Return the flight of `key` and whether the caller leads it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.expires_at > time.monotonic():
+                return flight, False
+            flight = self._flights[key] = Flight(timeout)
+            return flight, True
+
+    def finish(self, key: str, flight: Flight, result: Optional[Any]) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.resolve(result)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+
+class RemoteLock:
+    """
+    Cross-worker coalescing through the shared cache: `cache.add` is atomic on the
+    redis and file backends, so a single worker computes a key while the others
+    poll the cache for its result.
+    """
+
+    def __init__(self, cache: BaseCache, key: str, timeout: int):
+        self.cache = cache
+        self.key = f"{key}:lock"
+        self.timeout = timeout
+
+    def acquire(self) -> bool:
+        return self.cache.add(self.key, os.getpid(), self.timeout)
+
+    def release(self) -> None:
+        self.cache.delete(self.key)
+
+    def wait_for(self, key: str, timeout: float, interval: float) -> Optional[Any]:
+        """Poll `key` until the owner stored it, gave up the lock or `timeout` passed."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            entry = self.cache.get(key)
+            if entry is not None:
+                return entry
+            if self.cache.get(self.key) is None:
+                return self.cache.get(key)
+            time.sleep(interval)
+        return None
@@ -0,0 +1,58 @@
+import hashlib
+from logging import getLogger
+
+from django.conf import settings
+
+from core.pagination import SQLAlchemyPagination, SQLAlchemyPaginator
+
+from .cache import response_cache
+from .freshness import get_freshness_registry, statement_tables
+
+logging = getLogger("analytics.counting")
+
+__all__ = ["CachedCountPaginator", "DashboardPagination"]
+
+
+class CachedCountPaginator(SQLAlchemyPaginator):
+    """
+    `SQLAlchemyPaginator` keeping the exact totals in the dashboards cache, keyed by
+    the count statement, its parameters (the filters of the list) and the data
+    version of the tables it reads: the next page of a list, or any user paging
+    the same filter, reuses the count until the ETL loads the tables again.
+    """
+
+    def exact_count(self) -> int:
+        config = settings.DASHBOARD_COUNTS
+        if not config["ENABLED"]:
+            return super().exact_count()
+
+        statement = self.count_query
+        tables = statement_tables(statement)
+        registry = get_freshness_registry()
+        if tables and registry.is_versioned(tables):
+            version, ttl = registry.version_of(tables), config["TTL"]
+        else:
+            version, ttl = "", config["UNVERSIONED_TTL"]
+
+        compiled = statement.compile()
+        raw = f"{compiled}|{sorted(compiled.params.items())!r}|{version}"
+        key = f"dashboards:count:{hashlib.sha256(raw.encode()).hexdigest()}"
+        cache = response_cache()
+        try:
+            count = cache.get(key)
+        except Exception as exc:  # counted in the database instead
+            logging.warning(f"could not read the count of {sorted(tables)}: {exc}")
+            count = None
+        if count is None:
+            count = super().exact_count()
+            try:
+                cache.set(key, count, ttl)
+            except Exception as exc:  # the count is served all the same
+                logging.warning(f"could not cache the count of {sorted(tables)}: {exc}")
+        return count
+
+
+class DashboardPagination(SQLAlchemyPagination):
+    """`SQLAlchemyPagination` of the analytics lists, with cached totals."""
+
+    django_paginator_class = CachedCountPaginator
@@ -0,0 +1,300 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime
+from logging import getLogger
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+)
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.utils import timezone
+from sqlalchemy import Column, Engine, Table, event, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import visitors
+
+from db import BaseOrm, db_session
+from db.routing import use_primary
+
+logging = getLogger("analytics.freshness")
+
+__all__ = [
+    "FreshnessRegistry",
+    "get_freshness_registry",
+    "statement_tables",
+    "track_tables",
+]
+
+# columns stamped by the ETL on every load, in order of preference
+FRESHNESS_COLUMNS = ("push_date", "trading_date")
+
+# the versions polled by one worker for all of them, and the claim of the interval
+VERSIONS_KEY = "dashboards:freshness:versions"
+POLLER_KEY = "dashboards:freshness:poller"
+
+_tracked_tables: ContextVar[Optional[Set[str]]] = ContextVar(
+    "analytics_tracked_tables", default=None
+)
+
+
+@contextmanager
+def track_tables() -> Iterator[Set[str]]:
+    """Collect the names of the tables read by the statements run inside the block."""
+    tables: Set[str] = set()
+    token = _tracked_tables.set(tables)
+    try:
+        yield tables
+    finally:
+        _tracked_tables.reset(token)
+
+
+def statement_tables(statement) -> Set[str]:
+    """Names of the tables a statement reads."""
+    return {
+        element.name
+        for element in visitors.iterate(statement)
+        if isinstance(element, Table)
+    }
+
+
+@event.listens_for(Engine, "before_execute")
+def _track_statement_tables(
+    conn, clauseelement, multiparams, params, execution_options
+):
+    tables = _tracked_tables.get()
+    if tables is None:
+        return
+    tables.update(statement_tables(clauseelement))
+
+
+def _as_datetime(value: date) -> datetime:
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    if timezone.is_naive(value):
+        # the ETL stamps local (`TIME_ZONE`) times
+        value = timezone.make_aware(value)
+    return value
+
+
+class FreshnessRegistry:
+    """
+    Data version of every ETL loaded table of `analytics.orm`.
+
+    Each `FRESHNESS["POLL_INTERVAL"]` seconds a single worker, the first to claim
+    the interval in the dashboards cache, polls `MAX(push_date)` (or
+    `MAX(trading_date)`) of every table and publishes the versions there, the other
+    workers read them. The maximum itself is the version of the table, it changes
+    as soon as the ETL pushes a new load. The tables read by an endpoint are learned
+    from the statements it runs (see `track_tables`).
+    """
+
+    def __init__(self, poll_interval: int, static_tables: Iterable[str] = ()):
+        self.poll_interval = poll_interval
+        # reference tables without a load stamp that hardly ever change
+        self.static_tables = frozenset(static_tables)
+        self.columns: Dict[str, Column] = self._discover()
+        self.versions: Dict[str, str] = {}
+        self.stamps: Dict[str, datetime] = {}
+        # when this process noticed the last version change of a table
+        self.changed_at: Dict[str, float] = {}
+        self.endpoints: Dict[str, FrozenSet[str]] = {}
+        # called with the names of the tables a poll found a new load in
+        self.listeners: List[Callable[[Set[str]], None]] = []
+        self.polls = 0
+        self.poll_failures = 0
+        # intervals polled by another worker
+        self.shared_reads = 0
+        self.changes = 0
+        self.last_poll_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _discover() -> Dict[str, Column]:
+        columns: Dict[str, Column] = {}
+        for mapper in BaseOrm.registry.mappers:
+            if not mapper.class_.__module__.startswith("analytics.orm"):
+                continue
+            table = mapper.local_table
+            for attribute in FRESHNESS_COLUMNS:
+                if attribute in mapper.columns:
+                    columns.setdefault(table.name, mapper.columns[attribute])
+                    break
+        return columns
+
+    @staticmethod
+    def _cache() -> BaseCache:
+        return caches[settings.DASHBOARD_CACHE["ALIAS"]]
+
+    def update(self) -> None:
+        """
+        Read the versions another worker polled this interval, or claim the interval
+        and poll them: a single worker queries the tables at a time.
+        """
+        cache = self._cache()
+        try:
+            if not cache.add(POLLER_KEY, os.getpid(), self.poll_interval):
+                published = cache.get(VERSIONS_KEY)
+                if published is not None:
+                    self.shared_reads += 1
+                    self._apply(*published, time.time())
+                    return
+        except Exception as exc:  # a cache outage must not stop the versioning
+            logging.warning(f"could not read the published data versions: {exc}")
+        self.poll()
+
+    def poll(self) -> None:
+        """Fetch the version of every table, each on its own, and publish them."""
+        self.polls += 1
+        self.last_poll_at = time.time()
+        # a table that could not be polled keeps its last known version
+        versions, stamps = dict(self.versions), dict(self.stamps)
+        try:
+            with use_primary(), db_session() as session:
+                for name, column in self.columns.items():
+                    try:
+                        version = session.execute(select(func.max(column))).scalar()
+                    except SQLAlchemyError as exc:  # not to hide the other tables
+                        self.poll_failures += 1
+                        logging.warning(f"could not poll the version of {name}: {exc}")
+                        session.rollback()
+                        continue
+                    versions[name] = str(version) if version is not None else ""
+                    if version is not None:
+                        stamps[name] = _as_datetime(version)
+                    else:
+                        stamps.pop(name, None)
+        except (SQLAlchemyError, ConnectionError) as exc:
+            self.poll_failures += 1
+            logging.warning(f"could not poll the data versions: {exc}")
+            return
+
+        try:
+            # outlives a few intervals only: a dead poller must not freeze the others
+            self._cache().set(VERSIONS_KEY, (versions, stamps), 3 * self.poll_interval)
+        except Exception as exc:
+            logging.warning(f"could not publish the data versions: {exc}")
+        self._apply(versions, stamps, self.last_poll_at)
+
+    def _apply(
+        self, versions: Dict[str, str], stamps: Dict[str, datetime], at: float
+    ) -> None:
+        with self._lock:
+            changed = [
+                name
+                for name, version in versions.items()
+                if name in self.versions and self.versions[name] != version
+            ]
+            self.versions = versions
+            self.stamps = stamps
+            self.changed_at.update(dict.fromkeys(changed, at))
+        if changed:
+            self.changes += len(changed)
+            logging.info(f"new data loaded into {', '.join(sorted(changed))}")
+            for listener in self.listeners:
+                try:
+                    listener(set(changed))
+                except Exception as exc:
+                    logging.exception(exc)
+
+    def start(self) -> None:
+        """Start polling, once per process."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="analytics-freshness", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.update()
+            except Exception as exc:  # the poller must never die
+                logging.exception(exc)
+            time.sleep(self.poll_interval)
+
+    def subscribe(self, listener: Callable[[Set[str]], None]) -> None:
+        self.listeners.append(listener)
+
+    def learn(self, endpoint: str, tables: Iterable[str]) -> None:
+        self.endpoints[endpoint] = frozenset(tables)
+
+    def tables_for(self, endpoint: str) -> Optional[FrozenSet[str]]:
+        return self.endpoints.get(endpoint)
+
+    def is_versioned(self, tables: Iterable[str]) -> bool:
+        """Whether a push invalidates every (non static) table of the set."""
+        versions = self.versions
+        return all(table in versions or table in self.static_tables for table in tables)
+
+    def version_of(self, tables: Iterable[str]) -> str:
+        versions = self.versions
+        return ";".join(
+            f"{table}={versions[table]}"
+            for table in sorted(tables)
+            if table in versions
+        )
+
+    def last_modified(self, tables: Iterable[str]) -> Optional[datetime]:
+        """Most recent load stamp of the tables, `None` if none is known."""
+        stamps = self.stamps
+        return max((stamps[table] for table in tables if table in stamps), default=None)
+
+    def last_change(self, tables: Iterable[str]) -> Optional[float]:
+        """When a new load of the tables was last noticed, `None` if not since start."""
+        changed_at = self.changed_at
+        return max(
+            (changed_at[table] for table in tables if table in changed_at), default=None
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "poll_interval": self.poll_interval,
+            "static_tables": sorted(self.static_tables),
+            "polls": self.polls,
+            "poll_failures": self.poll_failures,
+            "shared_reads": self.shared_reads,
+            "changes": self.changes,
+            "last_poll_at": self.last_poll_at,
+            "versions": dict(self.versions),
+            "endpoints": {
+                endpoint: sorted(tables) for endpoint, tables in self.endpoints.items()
+            },
+        }
+
+
+_registry: Optional[FreshnessRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_freshness_registry() -> FreshnessRegistry:
+    """Return the process wide registry, polling from the first use on."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = FreshnessRegistry(
+                    settings.FRESHNESS["POLL_INTERVAL"],
+                    settings.FRESHNESS["STATIC_TABLES"],
+                )
+                if settings.DASHBOARD_WARM["ON_LOAD"]:
+                    from .warming import warm_on_load
+
+                    _registry.subscribe(warm_on_load)
+                _registry.start()
+    return _registry
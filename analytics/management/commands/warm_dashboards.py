@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.cache import response_cache
+from analytics.warming import warm_dashboards
+
+
+class Command(BaseCommand):
+    help = "Precompute every dashboard of every data scope into the dashboards cache, e.g. after the ETL load"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="endpoints",
+            metavar="VIEW_NAME",
+            help="warm this view only, repeatable (default: every board but the realtime ones)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.DASHBOARD_WARM["WORKERS"],
+            help="requests run at a time",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="recompute the responses already cached too",
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(response_cache(), LocMemCache):
+            raise CommandError(
+                "the dashboards cache is in the memory of this process and would be "
+                "lost once warmed, set DASHBOARD_CACHE_BACKEND to file or redis"
+            )
+        if not settings.DASHBOARD_WARM["ORIGIN"]:
+            self.stderr.write(
+                self.style.WARNING(
+                    "DASHBOARD_WARM_ORIGIN is not set, warming the responses of "
+                    f"http://{settings.ALLOWED_HOSTS[0]}"
+                )
+            )
+
+        report = warm_dashboards(
+            options["endpoints"], options["workers"], options["force"]
+        )
+
+        width = max((len(endpoint) for endpoint in report.endpoints), default=8)
+        self.stdout.write(
+            f"{'endpoint':<{width}}  requests  failures  total (s)  slowest (s)  outcomes"
+        )
+        for endpoint, timing in report.as_dict()["endpoints"].items():
+            outcomes = ", ".join(
+                f"{outcome}={count}"
+                for outcome, count in sorted(timing["outcomes"].items())
+            )
+            self.stdout.write(
+                f"{endpoint:<{width}}  {timing['requests']:>8}  {timing['failures']:>8}  "
+                f"{timing['seconds']:>9.2f}  {timing['slowest']:>11.2f}  {outcomes}"
+            )
+
+        summary = (
+            f"warmed {len(report.endpoints)} endpoint(s) for {report.scopes} scope(s): "
+            f"{report.requests} request(s), {report.failures} failure(s) "
+            f"in {report.seconds:.2f}s"
+        )
+        style = self.style.WARNING if report.failures else self.style.SUCCESS
+        self.stdout.write(style(summary))
@@ -0,0 +1,201 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from http import HTTPMethod
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Type
+
+from django.urls import URLPattern, path
+from drf_spectacular.utils import extend_schema
+from pydantic import BaseModel
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from sqlalchemy import Result, Select, select
+from sqlalchemy.orm import Session
+
+from authusers.models import User
+from core.renderer import CustomRenderer
+from db import BaseOrm, db_session
+
+from .cache import cache_response
+from .scope import get_data_scope
+from .serialization import serialize_rows
+
+__all__ = [
+    "Pivot",
+    "WidgetDefinition",
+    "WidgetRegistry",
+    "widget_registry",
+]
+
+
+@dataclass(frozen=True)
+class Pivot:
+    """
+    `pivot_table(index, columns, values, aggfunc="sum")` of the rows: a record per
+    `index` value (stripped, the labels are padded), under `name` and in sorted
+    order, with a lowercased key per `columns` value, sorted too, and NaN for the
+    cells without rows. Rows whose stripped `index` is in `exclude` are left out.
+
+    Computed in one pass over the row tuples: for the few hundred rows of a board,
+    building the DataFrame cost more than the pivot itself. The sums are those of
+    pandas for the `Numeric` (`Decimal`) and integer values pivoted here; floats
+    would differ from its compensated summation in the last digits.
+    """
+
+    index: str
+    columns: str
+    values: str
+    name: str = "name"
+    exclude: FrozenSet[str] = frozenset()
+
+    def apply(self, rows: Result) -> List[Dict[str, Any]]:
+        keys = list(rows.keys())
+        index = keys.index(self.index)
+        columns = keys.index(self.columns)
+        values = keys.index(self.values)
+
+        sums: Dict[str, Dict[Any, Any]] = {}
+        seen = set()
+        for row in rows:
+            label, column, value = row[index], row[columns], row[values]
+            # as the missing keys of a groupby
+            if label is None or column is None:
+                continue
+            label = label.strip()
+            if label in self.exclude:
+                continue
+            cells = sums.get(label)
+            if cells is None:
+                cells = sums[label] = {}
+            seen.add(column)
+            cells[column] = cells[column] + value if column in cells else value
+
+        nan = float("nan")
+        names = [(column, column.lower()) for column in sorted(seen)]
+        return [
+            {
+                self.name: label,
+                **{name: sums[label].get(column, nan) for column, name in names},
+            }
+            for label in sorted(sums)
+        ]
+
+
+@dataclass
+class WidgetDefinition:
+    """
+    A branch wise dashboard widget declared once: its table, projection, grouping,
+    ordering and payload. It is served by two views, over the data scope of the
+    user (`route`) and over one branch (`route<int:id>`), both cached with
+    `cache_response`.
+    """
+
+    name: str
+    route: str
+    source: Type[BaseOrm]
+    columns: Sequence[Any]
+    tag: str
+    description: str = ""
+    model: Optional[Type[BaseModel]] = None
+    group_by: Sequence[Any] = ()
+    order_by: Sequence[Any] = ()
+    # only the rows of the last days in the scope view, sometimes the tables still
+    # hold very old data
+    recent_days: Optional[int] = None
+    pivot: Optional[Pivot] = None
+    # shapes the serialized rows into the payload, e.g. a single summary
+    transform: Optional[Callable[[List[Dict[str, Any]]], Any]] = None
+    ttl: Optional[int] = None
+    stale_while_revalidate: int = 0
+    # name of the branch view, `<name>_by_branchid` by default
+    branch_name: Optional[str] = None
+    # the branch view is restricted to the data scope of the user too
+    scope_branch_view: bool = False
+    # the branch the branch view reads for a user, the requested one by default
+    branch_of: Optional[Callable[[User, int], int]] = None
+
+    view: Callable = field(init=False, repr=False)
+    branch_view: Callable = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.view = self._build_view(self.name, self.description)
+        self.branch_view = self._build_view(
+            self.branch_name or f"{self.name}_by_branchid",
+            f"{self.description} of a branch",
+        )
+
+    def query(self, user: User, branch_id: Optional[int] = None) -> Select:
+        qs = select(*self.columns)
+        if branch_id is None:
+            if self.recent_days is not None:
+                threshold_date = datetime.now() - timedelta(days=self.recent_days)
+                qs = qs.where(self.source.trading_date >= threshold_date)
+        else:
+            if self.branch_of is not None:
+                branch_id = self.branch_of(user, branch_id)
+            qs = qs.where(self.source.branch_code == branch_id)
+        qs = qs.group_by(*self.group_by).order_by(*self.order_by)
+        if branch_id is None or self.scope_branch_view:
+            qs = get_data_scope(user).apply(qs, self.source)
+        return qs
+
+    def fetch(
+        self, session: Session, user: User, branch_id: Optional[int] = None
+    ) -> Any:
+        rows = session.execute(self.query(user, branch_id))
+        if self.pivot is not None:
+            results = self.pivot.apply(rows)
+        elif self.model is not None:
+            results = serialize_rows(self.model, rows)
+        else:
+            results = [row._asdict() for row in rows]
+        return self.transform(results) if self.transform is not None else results
+
+    def _build_view(self, name: str, description: str) -> Callable:
+        def view(request: Request, id: Optional[int] = None) -> Response:
+            request.accepted_renderer = CustomRenderer()
+
+            with db_session() as session:
+                results = self.fetch(session, request.user, id)
+            return Response(results)
+
+        # the name identifies the widget: cache keys, batch calls and metrics
+        view.__name__ = view.__qualname__ = name
+        view.__doc__ = description
+
+        view = cache_response(self.ttl, self.stale_while_revalidate)(view)
+        view = permission_classes([IsAuthenticated])(view)
+        view = api_view([HTTPMethod.GET])(view)
+        return extend_schema(tags=[self.tag])(view)
+
+    def urlpatterns(self) -> List[URLPattern]:
+        return [
+            path(self.route, self.view),
+            path(f"{self.route}<int:id>", self.branch_view),
+        ]
+
+
+class WidgetRegistry:
+    """The declared widgets, in declaration order, and their routes."""
+
+    def __init__(self):
+        self.definitions: Dict[str, WidgetDefinition] = {}
+
+    def register(self, definition: WidgetDefinition) -> WidgetDefinition:
+        if definition.name in self.definitions:
+            raise ValueError(f"widget {definition.name} is already registered")
+        self.definitions[definition.name] = definition
+        return definition
+
+    def urlpatterns(self, tag: Optional[str] = None) -> List[URLPattern]:
+        """Routes of the widgets, only those of the OpenAPI `tag` if given."""
+        return [
+            pattern
+            for definition in self.definitions.values()
+            if tag is None or definition.tag == tag
+            for pattern in definition.urlpatterns()
+        ]
+
+
+widget_registry = WidgetRegistry()
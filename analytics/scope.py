@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Optional, Type
+
+from sqlalchemy import Select, select
+
+from authusers.models import RoleChoices, User
+from db import BaseOrm
+
+from .orm import ClusterManagerOrm
+
+__all__ = ["ScopeKind", "DataScope", "get_data_scope"]
+
+
+class ScopeKind(StrEnum):
+    ALL = "all"  # admin, management and regional managers
+    BRANCH = "branch"  # branch manager, the branch of the profile
+    CLUSTER = "cluster"  # cluster manager, the branches assigned in `BI_trd_Branch_Region_Info`
+
+
+@dataclass(frozen=True)
+class DataScope:
+    """
+    Slice of the branch wise data a user is entitled to.
+
+    Applied in SQL: a cluster manager's branches are a semi-join against
+    `BI_trd_Branch_Region_Info` instead of a list of branch codes fetched up front,
+    so every widget runs a single statement with a stable plan.
+    """
+
+    kind: ScopeKind
+    username: str
+    # as stored: staff users keep the role they were created with
+    role: str
+    branch_id: Optional[int] = None
+    is_admin: bool = False
+
+    @classmethod
+    def for_user(cls, user: User) -> "DataScope":
+        profile = getattr(user, "profile", None)
+        branch_id = profile.branch_id if profile is not None else None
+        if user.is_cluster_manager():
+            kind = ScopeKind.CLUSTER
+        elif user.is_branch_manager():
+            kind = ScopeKind.BRANCH
+        else:
+            kind = ScopeKind.ALL
+        return cls(kind, user.username, user.role, branch_id, user.is_admin())
+
+    @property
+    def cache_key(self) -> str:
+        """
+        Users sharing a cache key get the very same dashboard payloads, so it holds
+        every attribute of the user a view reads: the role as stored, `is_admin()`
+        (branch views), the username (cluster and regional managers, see `lov`) or
+        else the profile branch (branch scope and, unless admin, the branch views
+        of `daily_trade_performance`).
+        """
+        prefix = f"{self.role}:{'admin' if self.is_admin else 'user'}"
+        match self.role:
+            case RoleChoices.CLUSTER_MANAGER | RoleChoices.REGIONAL_MANAGER:
+                return f"{prefix}:{self.username}"
+            case RoleChoices.BRANCH_MANAGER:
+                return f"{prefix}:{self.branch_id}"
+            case _ if self.is_admin:
+                return prefix
+            case _:
+                return f"{prefix}:{self.branch_id}"
+
+    def apply(self, queryset: Select, orm_class: Type[BaseOrm]) -> Select:
+        """Restrict `queryset` to the branches of the scope through `orm_class.branch_code`."""
+        if self.kind == ScopeKind.ALL:
+            return queryset
+
+        branch_code = getattr(orm_class, "branch_code", None)
+        if branch_code is None:
+            raise ValueError(f"{orm_class.__name__} has no branch_code to scope by")
+
+        if self.kind == ScopeKind.BRANCH:
+            return queryset.where(branch_code == self.branch_id)
+
+        cluster_branches = select(ClusterManagerOrm.branch_code).where(
+            ClusterManagerOrm.manager_name == self.username
+        )
+        return queryset.where(branch_code.in_(cluster_branches))
+
+
+def get_data_scope(user: User) -> DataScope:
+    """
+    The data scope of `user`, from its role and profile as they are now: nothing is
+    kept across requests, a changed role or branch applies on the next one. The
+    profile is loaded once per user instance, the widgets of a batch share it.
+    """
+    return DataScope.for_user(user)
@@ -0,0 +1,208 @@
+import heapq
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from sqlalchemy import ColumnElement, Select, select, union
+from sqlalchemy.exc import SQLAlchemyError
+
+from db import db_session
+
+from .freshness import get_freshness_registry, statement_tables, track_tables
+from .orm import (
+    CompanyWiseSaleableStockOrm,
+    CompanyWiseSaleableStockPercentageOrm,
+    InvestorWiseSaleableStockOrm,
+    TraderOrm,
+)
+
+logging = getLogger("analytics.search")
+
+__all__ = ["TrigramIndex", "SEARCH_SOURCES", "get_search_index", "search_filter"]
+
+# no trigram spans the key and the label of an entry
+_SEPARATOR = "\x00"
+
+
+def _normalize(term: str) -> str:
+    return term.strip().lower()
+
+
+def _trigrams(text: str) -> Iterable[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Case insensitive substring search, as `ILIKE '%term%'`, over the `(key, label)`
+    entries of a lookup: the entries having the rarest trigram of the term are
+    checked for the whole term. Terms of less than three characters scan them all.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        self.keys: List[str] = []
+        self.labels: List[str] = []
+        self.texts: List[str] = []
+        postings: Dict[str, List[int]] = {}
+        for key, label in entries:
+            if key is None:
+                continue
+            # kept as stored, `resolve` compares them by equality
+            key, label = str(key), str(label or "").strip()
+            text = f"{key.lower()}{_SEPARATOR}{label.lower()}"
+            position = len(self.keys)
+            self.keys.append(key)
+            self.labels.append(label)
+            self.texts.append(text)
+            for gram in _trigrams(text):
+                postings.setdefault(gram, []).append(position)
+        # entries are added in order, every posting list is sorted
+        self.postings: Dict[str, array] = {
+            gram: array("I", positions) for gram, positions in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def matches(self, term: str) -> List[int]:
+        """Positions of the entries whose key or label contains `term`."""
+        term = _normalize(term)
+        if not term:
+            return []
+        texts = self.texts
+        if len(term) < 3:
+            return [i for i, text in enumerate(texts) if term in text]
+
+        # the rarest trigram of the term, checking its entries for the whole term
+        # is cheaper than intersecting the longer posting lists
+        rarest = None
+        for gram in _trigrams(term):
+            positions = self.postings.get(gram)
+            if positions is None:
+                return []
+            if rarest is None or len(positions) < len(rarest):
+                rarest = positions
+        return [i for i in rarest if term in texts[i]]
+
+    def search(self, term: str, limit: int) -> List[Dict[str, str]]:
+        """
+        The `limit` best matches of `term`: key or label starting with it first, then
+        by where it appears and the shortest labels.
+        """
+        normalized = _normalize(term)
+
+        def rank(i: int):
+            key, label = self.keys[i].strip().lower(), self.labels[i].lower()
+            prefix = key.startswith(normalized) or label.startswith(normalized)
+            return (not prefix, self.texts[i].find(normalized), len(label), label)
+
+        best = heapq.nsmallest(limit, self.matches(term), key=rank)
+        return [{"key": self.keys[i].strip(), "label": self.labels[i]} for i in best]
+
+    def resolve(self, term: str) -> List[str]:
+        """The distinct keys matching `term`, to query them by equality."""
+        return list(dict.fromkeys(self.keys[i] for i in self.matches(term)))
+
+
+@dataclass
+class SearchSource:
+    """A lookup searched in memory, the `(key, label)` rows of `query`."""
+
+    query: Select
+    index: Optional[TrigramIndex] = None
+    version: Optional[str] = None
+    built_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def is_current(self, version: Optional[str]) -> bool:
+        if self.index is None:
+            return False
+        if version is not None:
+            return version == self.version
+        return time.monotonic() - self.built_at < settings.DASHBOARD_SEARCH["TTL"]
+
+    def get(self) -> TrigramIndex:
+        """
+        The index of the current data: rebuilt when the data version of the tables
+        read changes (see `analytics.freshness`), after `DASHBOARD_SEARCH["TTL"]`
+        seconds for tables without one.
+        """
+        tables = statement_tables(self.query)
+        registry = get_freshness_registry()
+        version = registry.version_of(tables) if registry.is_versioned(tables) else None
+        if not version:
+            version = None
+        if self.is_current(version):
+            return self.index
+
+        with self.lock:
+            if not self.is_current(version):
+                started = time.perf_counter()
+                # not tables of the endpoint building it, for `cache_response`
+                with track_tables(), db_session() as session:
+                    rows = session.execute(self.query).all()
+                self.index = TrigramIndex(rows)
+                self.version, self.built_at = version, time.monotonic()
+                logging.info(
+                    f"indexed {len(self.index)} entries of {', '.join(sorted(tables))}"
+                    f" in {time.perf_counter() - started:.2f}s"
+                )
+        return self.index
+
+
+def _distinct(*queries: Select) -> Select:
+    return union(*queries).subquery().select()
+
+
+SEARCH_SOURCES: Dict[str, SearchSource] = {
+    # every company of the saleable stock lists
+    "companies": SearchSource(
+        _distinct(
+            *(
+                select(orm.company_name.label("key"), orm.company_name.label("label"))
+                for orm in (
+                    CompanyWiseSaleableStockOrm,
+                    CompanyWiseSaleableStockPercentageOrm,
+                    InvestorWiseSaleableStockOrm,
+                )
+            )
+        )
+    ),
+    "investors": SearchSource(
+        select(
+            InvestorWiseSaleableStockOrm.investor_code.label("key"),
+            InvestorWiseSaleableStockOrm.client_name.label("label"),
+        ).distinct()
+    ),
+    "traders": SearchSource(
+        select(
+            TraderOrm.trader_id.label("key"), TraderOrm.trader_name.label("label")
+        ).distinct()
+    ),
+}
+
+
+def get_search_index(name: str) -> TrigramIndex:
+    return SEARCH_SOURCES[name].get()
+
+
+def search_filter(name: str, column: ColumnElement, term: str) -> ColumnElement[bool]:
+    """
+    `column` containing `term`, case insensitive and taken literally (`%` and `_`
+    too), resolved through the index of `name` to the matching keys, compared by
+    equality: an index seek instead of a scan of the table. An escaped `LIKE`
+    stays when the index is unavailable or the term matches more than
+    `DASHBOARD_SEARCH["MAX_KEYS"]` keys.
+    """
+    try:
+        keys: Optional[Sequence[str]] = get_search_index(name).resolve(term)
+    except SQLAlchemyError as exc:
+        logging.warning(f"could not index the {name}, searching the table: {exc}")
+        keys = None
+    if keys is None or len(keys) > settings.DASHBOARD_SEARCH["MAX_KEYS"]:
+        return column.icontains(_normalize(term), autoescape=True)
+    return column.in_(keys)
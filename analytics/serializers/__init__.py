@@ -1 +1,3 @@
 from .lov import *  # noqa: I001, F403
+from .batch import *  # noqa: I001, F403
+from .search import *  # noqa: I001, F403
@@ -0,0 +1,36 @@
+from django.conf import settings
+from rest_framework import serializers as sz
+
+__all__ = [
+    "BatchWidgetSerializer",
+    "BatchRequestSerializer",
+    "BatchWidgetResultSerializer",
+]
+
+
+class BatchWidgetSerializer(sz.Serializer):
+    name = sz.CharField(max_length=255)
+    params = sz.DictField(
+        child=sz.CharField(allow_blank=True), required=False, default=dict
+    )
+    args = sz.DictField(child=sz.IntegerField(), required=False, default=dict)
+
+
+class BatchRequestSerializer(sz.Serializer):
+    widgets = BatchWidgetSerializer(many=True, allow_empty=False)
+
+    def validate_widgets(self, widgets):
+        limit = settings.DASHBOARD_BATCH["MAX_WIDGETS"]
+        if len(widgets) > limit:
+            raise sz.ValidationError(f"at most {limit} widgets per batch")
+        return widgets
+
+
+class BatchWidgetResultSerializer(sz.Serializer):
+    name = sz.CharField()
+    status = sz.CharField()
+    code = sz.IntegerField()
+    data = sz.JSONField(allow_null=True)
+    message = sz.CharField(allow_null=True)
+    cache = sz.CharField(allow_null=True)
+    elapsed_ms = sz.FloatField()
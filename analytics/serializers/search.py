@@ -0,0 +1,8 @@
+from rest_framework import serializers as sz
+
+__all__ = ["SearchSuggestionSerializer"]
+
+
+class SearchSuggestionSerializer(sz.Serializer):
+    key = sz.CharField()
+    label = sz.CharField(allow_blank=True)
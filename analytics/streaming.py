@@ -0,0 +1,84 @@
+from logging import getLogger
+from typing import Iterator, List, Type
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from pydantic import BaseModel
+from rest_framework.request import Request
+from sqlalchemy import Result, Select
+
+from core.renderer import CustomRenderer
+from db.session import ReadOnlySession, current_scope
+
+from .serialization import serialize_rows
+
+logging = getLogger("analytics.streaming")
+
+__all__ = ["STREAM_PARAMETER", "wants_stream", "stream_rows"]
+
+STREAM_PARAMETER = OpenApiParameter(
+    "stream",
+    OpenApiTypes.BOOL,
+    OpenApiParameter.QUERY,
+    required=False,
+    description="stream every row, unpaginated, as the database returns them",
+)
+
+
+def wants_stream(request: Request) -> bool:
+    return request.query_params.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def _chunks(model: Type[BaseModel], result: Result) -> Iterator[List[dict]]:
+    try:
+        for partition in result.partitions():
+            yield serialize_rows(model, partition)
+    except Exception as exc:
+        # the status and the head of the envelope are already sent
+        logging.exception(f"stream of {model.__name__} aborted: {exc}")
+        raise
+
+
+def stream_rows(
+    model: Type[BaseModel], query: Select, scalars: bool = False
+) -> StreamingHttpResponse:
+    """
+    Stream the rows of `query`, serialized through `model`, in the envelope of
+    `CustomRenderer`. The query runs now, so failures are regular error responses
+    and `cache_response` sees the tables read. Its rows are fetched from a server
+    side cursor `DASHBOARD_STREAMING["YIELD_PER"]` at a time while the body is
+    sent: the memory of a worker no longer grows with the size of the result.
+
+    `scalars` for a query of ORM entities, e.g. `select(SomeOrm)`.
+    """
+    scope = current_scope()
+    if scope is not None:
+        # closed by `RequestSessionMiddleware` once the body is sent
+        session, close = scope.session, None
+    else:
+        from db import engine
+
+        session = ReadOnlySession(engine)
+        close = session.close
+
+    try:
+        result = session.execute(
+            query,
+            execution_options={"yield_per": settings.DASHBOARD_STREAMING["YIELD_PER"]},
+        )
+    except Exception:
+        if close is not None:
+            close()
+        raise
+    if scalars:
+        result = result.scalars()
+
+    response = StreamingHttpResponse(
+        CustomRenderer().stream(_chunks(model, result)),
+        content_type="application/json",
+    )
+    if close is not None:
+        response._resource_closers.append(close)
+    return response
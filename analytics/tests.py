@@ -1 +1,220 @@
-# Create your tests here.
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.template.response import SimpleTemplateResponse
+from django.test import SimpleTestCase
+from fakeredis import FakeConnection
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from authusers.models import RoleChoices, User, UserProfile
+from core.renderer import CustomRenderer
+
+from .cache import cache_response, make_cache_key, response_cache
+from .freshness import FreshnessRegistry
+from .scope import ScopeKind, get_data_scope
+
+factory = APIRequestFactory(SERVER_NAME="localhost")
+
+
+def make_user(role: str, username: str, branch_id=None, is_staff=False) -> User:
+    user = User(username=username, role=role, is_staff=is_staff)
+    if branch_id is not None:
+        # cached on `user.profile`, nothing is saved
+        UserProfile(user=user, branch_id=branch_id)
+    return user
+
+
+def admin() -> User:
+    return make_user(RoleChoices.ADMIN, "admin", branch_id=1)
+
+
+def staff_regional_manager() -> User:
+    return make_user(RoleChoices.REGIONAL_MANAGER, "rm", branch_id=2, is_staff=True)
+
+
+def cluster_manager() -> User:
+    return make_user(RoleChoices.CLUSTER_MANAGER, "cm", branch_id=3)
+
+
+def branch_user() -> User:
+    return make_user(RoleChoices.BRANCH_MANAGER, "bm", branch_id=4)
+
+
+class DataScopeTests(SimpleTestCase):
+    def test_admin(self):
+        scope = get_data_scope(admin())
+        self.assertEqual(scope.kind, ScopeKind.ALL)
+        self.assertEqual(scope.cache_key, "ADMIN:admin")
+
+    def test_staff_regional_manager(self):
+        scope = get_data_scope(staff_regional_manager())
+        self.assertEqual(scope.kind, ScopeKind.ALL)
+        self.assertEqual(scope.cache_key, "REGIONAL_MANAGER:admin:rm")
+
+    def test_cluster_manager(self):
+        scope = get_data_scope(cluster_manager())
+        self.assertEqual(scope.kind, ScopeKind.CLUSTER)
+        self.assertEqual(scope.cache_key, "CLUSTER_MANAGER:user:cm")
+
+    def test_branch_user(self):
+        scope = get_data_scope(branch_user())
+        self.assertEqual(scope.kind, ScopeKind.BRANCH)
+        self.assertEqual(scope.branch_id, 4)
+        self.assertEqual(scope.cache_key, "BRANCH_MANAGER:user:4")
+
+    def test_same_data_same_key(self):
+        other = make_user(RoleChoices.BRANCH_MANAGER, "bm2", branch_id=4)
+        self.assertEqual(
+            get_data_scope(other).cache_key, get_data_scope(branch_user()).cache_key
+        )
+
+    def test_roles_never_share_a_key(self):
+        users = [admin(), staff_regional_manager(), cluster_manager(), branch_user()]
+        users += [
+            make_user(RoleChoices.REGIONAL_MANAGER, "rm2", branch_id=2, is_staff=True),
+            make_user(RoleChoices.CLUSTER_MANAGER, "cm2", branch_id=3),
+            make_user(RoleChoices.BRANCH_MANAGER, "bm5", branch_id=5),
+            make_user(RoleChoices.MANAGEMENT, "mgmt", branch_id=4),
+        ]
+        keys = [get_data_scope(user).cache_key for user in users]
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_follows_a_role_change(self):
+        user = branch_user()
+        self.assertEqual(get_data_scope(user).kind, ScopeKind.BRANCH)
+        user.role = RoleChoices.CLUSTER_MANAGER
+        self.assertEqual(get_data_scope(user).cache_key, "CLUSTER_MANAGER:user:bm")
+
+
+class MakeCacheKeyTests(SimpleTestCase):
+    def key(self, path="/api/v1/dashboards/board/", scope="s", version="", **extra):
+        return make_cache_key(Request(factory.get(path, **extra)), scope, version)
+
+    def test_normalized_parameters(self):
+        self.assertEqual(
+            self.key("/api/v1/dashboards/board/?b=2&a=1&c="),
+            self.key("/api/v1/dashboards/board/?a=1&b=%202%20"),
+        )
+        self.assertNotEqual(
+            self.key("/api/v1/dashboards/board/?a=1"),
+            self.key("/api/v1/dashboards/board/?a=2"),
+        )
+
+    def test_bounded_key(self):
+        key = self.key("/api/v1/dashboards/board/?q=" + "x" * 1000)
+        self.assertTrue(key.startswith("dashboards:"))
+        self.assertEqual(len(key), len("dashboards:") + 64)
+
+    def test_varies(self):
+        key = self.key()
+        self.assertNotEqual(key, self.key(path="/api/v1/dashboards/other/"))
+        self.assertNotEqual(key, self.key(scope="t"))
+        self.assertNotEqual(key, self.key(version="t=1"))
+        self.assertNotEqual(key, self.key(secure=True))
+        self.assertNotEqual(key, self.key(SERVER_NAME="127.0.0.1"))
+
+    def test_scopes_never_share_a_key(self):
+        users = [admin(), staff_regional_manager(), cluster_manager(), branch_user()]
+        keys = {self.key(scope=get_data_scope(user).cache_key) for user in users}
+        self.assertEqual(len(keys), len(users))
+
+
+runs = []
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@cache_response()
+def scoped_board(request):
+    request.accepted_renderer = CustomRenderer()
+    runs.append(request.user.username)
+    return Response({"scope": get_data_scope(request.user).cache_key})
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@cache_response()
+def broken_board(request):
+    request.accepted_renderer = CustomRenderer()
+    runs.append(request.user.username)
+    return Response({"value": object()})
+
+
+class CacheBackendTests:
+    """The response cache on one `DASHBOARD_CACHE_BACKENDS` backend."""
+
+    backend: dict
+
+    def setUp(self):
+        caches = {**settings.CACHES, "dashboards": {**self.backend, "KEY_PREFIX": "bi"}}
+        self.enterContext(self.settings(CACHES=caches))
+        registry = FreshnessRegistry(10, settings.FRESHNESS["STATIC_TABLES"])
+        self.enterContext(
+            mock.patch("analytics.cache.get_freshness_registry", return_value=registry)
+        )
+        response_cache().clear()
+        self.addCleanup(response_cache().clear)
+        runs.clear()
+
+    def get(self, view, user: User, path="/api/v1/dashboards/board/?page=1"):
+        request = factory.get(path)
+        force_authenticate(request, user=user)
+        response = view(request)
+        if isinstance(response, SimpleTemplateResponse):
+            # a miss, rendered by the handler as usual
+            response.render()
+        return response
+
+    def test_hit_within_a_scope(self):
+        first = self.get(scoped_board, branch_user())
+        second = self.get(scoped_board, make_user(RoleChoices.BRANCH_MANAGER, "bm2", 4))
+        self.assertEqual((first["X-Cache"], second["X-Cache"]), ("MISS", "HIT"))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(runs, ["bm"])
+
+    def test_scopes_never_share_an_entry(self):
+        users = [admin(), staff_regional_manager(), cluster_manager(), branch_user()]
+        for user in users:
+            response = self.get(scoped_board, user)
+            self.assertEqual(response["X-Cache"], "MISS")
+            self.assertContains(response, get_data_scope(user).cache_key)
+        for user in users:
+            response = self.get(scoped_board, user)
+            self.assertEqual(response["X-Cache"], "HIT")
+            self.assertContains(response, get_data_scope(user).cache_key)
+        self.assertEqual(runs, [user.username for user in users])
+
+    def test_error_envelope_not_cached(self):
+        for _ in range(2):
+            response = self.get(broken_board, admin())
+            self.assertEqual(response.status_code, 500)
+            self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(runs), 2)
+
+
+class LocMemCacheTests(CacheBackendTests, SimpleTestCase):
+    backend = settings.DASHBOARD_CACHE_BACKENDS["locmem"]
+
+
+class FileCacheTests(CacheBackendTests, SimpleTestCase):
+    def setUp(self):
+        location = self.enterContext(tempfile.TemporaryDirectory())
+        self.backend = {
+            **settings.DASHBOARD_CACHE_BACKENDS["file"],
+            "LOCATION": location,
+        }
+        super().setUp()
+
+
+class RedisCacheTests(CacheBackendTests, SimpleTestCase):
+    backend = {
+        **settings.DASHBOARD_CACHE_BACKENDS["redis"],
+        "LOCATION": "redis://localhost:6379/1",
+        # an in-memory redis server shared by the connections of the test
+        "OPTIONS": {"connection_class": FakeConnection},
+    }
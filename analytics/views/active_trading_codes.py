@@ -9,14 +9,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import Sequence, func, select
-from sqlalchemy.orm import Session
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 
 from core.metadata.openapi import OpenApiTags
 from core.permissions import IsManagementUser
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
+from db.routing import primary_only
 
+from ..cache import REALTIME_TTL, cache_response
 from ..models import (
     ActiveTradingSummary,
     AdminOMSBranchWiseTurnoverAsOnMonth,
@@ -45,6 +46,7 @@ from ..orm import (
     AdminRealTimeTurnoverComparisonTop20SectorWiseORM,
     AdminOMSBranchWiseTurnoverDtAsOnMonthORM
 )
+from ..serialization import serialize_rows
 
 __all__ = [
     "get_active_trading_summary",
@@ -72,18 +74,19 @@ def get_sum_of_property(property: str, rows: Sequence[Dict[str, Any]]) -> int:
 @extend_schema(tags=[OpenApiTags.ACTIVE_TRADING_CODE])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_active_trading_summary(request: Request) -> Response:
     """fetch branch wise turnover status"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(ActiveTradingCodeSummaryORM).order_by(
                 ActiveTradingCodeSummaryORM.trading_date
             )
         ).scalars()
 
-        results = [ActiveTradingSummary.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(ActiveTradingSummary, qs)
 
     return Response(results)
 
@@ -91,18 +94,19 @@ def get_active_trading_summary(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ACTIVE_TRADING_CODE])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_active_trading_summary_daywise(request: Request) -> Response:
     """fetch branch wise turnover status"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(ActiveTradingCodeDayWiseSummaryORM).order_by(
                 ActiveTradingCodeDayWiseSummaryORM.trading_date
             )
         ).scalars()
 
-        results = [ActiveTradingSummary.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(ActiveTradingSummary, qs)
 
     return Response(results)
 
@@ -110,11 +114,12 @@ def get_active_trading_summary_daywise(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ACTIVE_TRADING_CODE])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_active_trading_monthwise_client(request: Request) -> Response:
     """fetch branch wise turnover status"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(
                 ActiveTradingCodeMonthWiseSummaryORM.month_year,
@@ -180,18 +185,19 @@ def get_active_trading_monthwise_client(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ACTIVE_TRADING_CODE])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_oms_branch_wise_turnover_as_on_month(request: Request) -> Response:
     """fetch admin OMS Branch wise turnover as on month status"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminOMSBranchWiseTurnoverAsOnMonthORM).order_by(
                 AdminOMSBranchWiseTurnoverAsOnMonthORM.branch_Name
             )
         ).scalars()
 
-        results = [AdminOMSBranchWiseTurnoverAsOnMonth.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminOMSBranchWiseTurnoverAsOnMonth, qs)
 
         
     response = {
@@ -211,18 +217,19 @@ def get_admin_oms_branch_wise_turnover_as_on_month(request: Request) -> Response
 @extend_schema(tags=[OpenApiTags.ACTIVE_TRADING_CODE])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_oms_branch_wise_turnover_dt_as_on_month(request: Request) -> Response:
     """fetch admin OMS Branch wise turnover Dt as on month status"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminOMSBranchWiseTurnoverDtAsOnMonthORM).order_by(
                 AdminOMSBranchWiseTurnoverDtAsOnMonthORM.branch_Name
             )
         ).scalars()
 
-        results = [AdminOMSBranchWiseTurnoverDtAsOnMonth.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminOMSBranchWiseTurnoverDtAsOnMonth, qs)
 
         
     response = {
@@ -242,18 +249,19 @@ def get_admin_oms_branch_wise_turnover_dt_as_on_month(request: Request) -> Respo
 @extend_schema(tags=[OpenApiTags.ACTIVE_TRADING_CODE])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_oms_datewise_turnover(request: Request) -> Response:
     """fetch admin OMS Branch wise turnover as on month status"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminOMSDateWiseTurnoverORM).order_by(
                 AdminOMSDateWiseTurnoverORM.trading_date.desc()
             )
         ).scalars()
 
-        results = [AdminOMSDateWiseTurnover.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminOMSDateWiseTurnover, qs)
 
         
     response = {
@@ -269,18 +277,20 @@ def get_admin_oms_datewise_turnover(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ACTIVE_TRADING_CODE])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_admin_sector_wise_turnover(request: Request) -> Response:
     """fetch admin sector wise turnover """
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminSectorWiseTurnoverORM).order_by(
                 AdminSectorWiseTurnoverORM.value.desc()
             )
         ).scalars()
 
-        results = [AdminSectorWiseTurnover.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminSectorWiseTurnover, qs)
 
     return Response(results)
 
@@ -299,13 +309,15 @@ def get_admin_sector_wise_turnover(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ACTIVE_TRADING_CODE])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_admin_sector_wise_turnover_breakdown(request: Request) -> Response:
     """fetch admin sector wise turnover breakdown """
     request.accepted_renderer = CustomRenderer()
 
     has_sector_name= request.query_params.get("sector_name", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = (
             select(AdminSectorWiseTurnoverBreakdownORM).order_by(
                 AdminSectorWiseTurnoverBreakdownORM.value.desc()
@@ -319,7 +331,7 @@ def get_admin_sector_wise_turnover_breakdown(request: Request) -> Response:
 
         qs = session.execute(qs).scalars()
 
-        results = [AdminSectorWiseTurnoverBreakdown.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminSectorWiseTurnoverBreakdown, qs)
 
     return Response(results)
 
@@ -337,12 +349,14 @@ def get_admin_sector_wise_turnover_breakdown(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_admin_realtime_turnover_top_20(request: Request) -> Response:
     """fetch admin real time turnover top 20"""
     request.accepted_renderer = CustomRenderer()
     has_trading_date = request.query_params.get("trading_date")
 
-    with Session(engine) as session:
+    with db_session() as session:
         if has_trading_date:
             try:
                 trading_date = datetime.strptime(has_trading_date, "%Y-%m-%d")
@@ -364,7 +378,7 @@ def get_admin_realtime_turnover_top_20(request: Request) -> Response:
             .limit(20)
         ).scalars()
 
-        results = [AdminRealTimeTurnoverTop20.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminRealTimeTurnoverTop20, qs)
 
     return Response(results)
 
@@ -382,12 +396,14 @@ def get_admin_realtime_turnover_top_20(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_admin_realtime_turnover_exchange_top_20(request: Request) -> Response:
     """fetch admin real time turnover exchange top 20"""
     request.accepted_renderer = CustomRenderer()
     has_trading_date = request.query_params.get("trading_date")
 
-    with Session(engine) as session:
+    with db_session() as session:
         if has_trading_date:
             try:
                 trading_date = datetime.strptime(has_trading_date, "%Y-%m-%d")
@@ -407,7 +423,7 @@ def get_admin_realtime_turnover_exchange_top_20(request: Request) -> Response:
             .order_by(AdminRealTimeTurnoverExchangeTop20ORM.value.desc())
         ).scalars()
 
-        results = [AdminRealTimeTurnoverExchangeTop20.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminRealTimeTurnoverExchangeTop20, qs)
 
     return Response(results)
 
@@ -426,12 +442,14 @@ def get_admin_realtime_turnover_exchange_top_20(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_admin_realtime_turnover_comaparison_sector_wise(request: Request) -> Response:
     """Fetch admin real-time turnover comparison sector-wise for a given trading date or the latest trading date."""
     request.accepted_renderer = CustomRenderer()
     has_trading_date = request.query_params.get("trading_date")
 
-    with Session(engine) as session:
+    with db_session() as session:
         if has_trading_date:
             try:
                 trading_date = datetime.strptime(has_trading_date, "%Y-%m-%d")
@@ -451,10 +469,7 @@ def get_admin_realtime_turnover_comaparison_sector_wise(request: Request) -> Res
             .order_by(AdminRealTimeTurnoverComparisonSectorWiseORM.primary_value.desc())
         ).scalars()
 
-        results = [
-            AdminRealTimeTurnoverComparisonSectorWise.model_validate(row).model_dump()
-            for row in qs
-        ]
+        results = serialize_rows(AdminRealTimeTurnoverComparisonSectorWise, qs)
 
     return Response(results)
 
@@ -473,12 +488,14 @@ def get_admin_realtime_turnover_comaparison_sector_wise(request: Request) -> Res
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_admin_realtime_turnover_comaparison_top20_sector_wise(request: Request) -> Response:
     """fetch admin real time turnover comparison top 20 sector wise"""
     request.accepted_renderer = CustomRenderer()
     has_trading_date = request.query_params.get("trading_date")
 
-    with Session(engine) as session:
+    with db_session() as session:
         if has_trading_date:
             try:
                 trading_date = datetime.strptime(has_trading_date, "%Y-%m-%d")
@@ -499,6 +516,6 @@ def get_admin_realtime_turnover_comaparison_top20_sector_wise(request: Request)
             .order_by(AdminRealTimeTurnoverComparisonTop20SectorWiseORM.primary_value.desc())
         ).scalars()
 
-        results = [AdminRealTimeTurnoverComparisonTop20SectorWise.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminRealTimeTurnoverComparisonTop20SectorWise, qs)
 
     return Response(results)
\ No newline at end of file
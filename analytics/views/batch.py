@@ -0,0 +1,48 @@
+import time
+from http import HTTPMethod
+
+from drf_spectacular.utils import extend_schema
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.helper import enveloper
+from core.metadata.openapi import OpenApiTags
+from core.renderer import CustomRenderer
+
+from ..serializers import BatchRequestSerializer, BatchWidgetResultSerializer
+from ..widgets import WidgetCall, run_widgets
+
+__all__ = ["run_dashboard_batch"]
+
+
+@extend_schema(
+    request=BatchRequestSerializer,
+    responses={200: enveloper(BatchWidgetResultSerializer, many=True)},
+    tags=[OpenApiTags.DASHBOARDS],
+)
+@api_view([HTTPMethod.POST])
+@permission_classes([IsAuthenticated])
+def run_dashboard_batch(request: Request) -> Response:
+    """
+    run many dashboard widgets (view names of the dashboard routes) in one call.
+    every widget keeps its own permissions and payload, see `analytics.widgets`.
+    """
+    request.accepted_renderer = CustomRenderer()
+    started = time.perf_counter()
+
+    serializer = BatchRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    calls = [
+        WidgetCall(widget["name"], widget["params"], widget["args"])
+        for widget in serializer.validated_data["widgets"]
+    ]
+    results = run_widgets(request.user, calls, request._request)
+
+    response = Response([call.as_dict() for call in results])
+    response["Server-Timing"] = (
+        f"batch;dur={(time.perf_counter() - started) * 1000:.1f}"
+    )
+    return response
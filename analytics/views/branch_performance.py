@@ -8,13 +8,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import select
-from sqlalchemy.orm import Session
 
 from authusers.models import User
 from core.metadata.openapi import OpenApiTags
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
 
+from ..cache import cache_response
 from ..models import (
     BranchWiseFundStatus,
     BranchWiseMarginStatus,
@@ -26,6 +26,7 @@ from ..orm import (
     BranchWiseMarginStatusOrm,
     BranchWiseTurnoverStatusOrm,
 )
+from ..serialization import serialize_rows
 from .utils import rolewise_branch_data_filter
 
 __all__ = [
@@ -50,6 +51,7 @@ __all__ = [
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_bw_turnover_status(request: Request) -> Response:
     """fetch branch wise turnover status"""
     request.accepted_renderer = CustomRenderer()
@@ -57,7 +59,7 @@ def get_bw_turnover_status(request: Request) -> Response:
 
     has_branch = request.query_params.get("branch", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(
             BranchWiseTurnoverStatusOrm.branch_code,
             BranchWiseTurnoverStatusOrm.branch_name,
@@ -73,10 +75,7 @@ def get_bw_turnover_status(request: Request) -> Response:
             qs = qs.where(BranchWiseTurnoverStatusOrm.branch_code == has_branch)
 
         rows = session.execute(qs)
-        results = [
-            BranchWiseTurnoverStatus.model_validate(row._asdict()).model_dump()
-            for row in rows
-        ]
+        results = serialize_rows(BranchWiseTurnoverStatus, rows)
     return Response(results)
 
 
@@ -94,6 +93,7 @@ def get_bw_turnover_status(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_bw_margin_status(request: Request) -> Response:
     """fetch branch wise turnover status"""
     request.accepted_renderer = CustomRenderer()
@@ -101,7 +101,7 @@ def get_bw_margin_status(request: Request) -> Response:
 
     has_branch = request.query_params.get("branch", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(
             BranchWiseMarginStatusOrm.branch_code,
             BranchWiseMarginStatusOrm.branch_name,
@@ -118,10 +118,7 @@ def get_bw_margin_status(request: Request) -> Response:
             qs = qs.where(BranchWiseMarginStatusOrm.branch_code == has_branch)
 
         rows = session.execute(qs)
-        results = [
-            BranchWiseMarginStatus.model_validate(row._asdict()).model_dump()
-            for row in rows
-        ]
+        results = serialize_rows(BranchWiseMarginStatus, rows)
     return Response(results)
 
 
@@ -139,13 +136,14 @@ def get_bw_margin_status(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_bw_fund_status(request: Request) -> Response:
     """fetch branch wise fund status"""
     request.accepted_renderer = CustomRenderer()
     current_user: User = request.user
     has_branch = request.query_params.get("branch", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(
             BranchWiseFundStatusOrm.branch_code,
             BranchWiseFundStatusOrm.branch_name,
@@ -162,10 +160,7 @@ def get_bw_fund_status(request: Request) -> Response:
             qs = qs.where(BranchWiseFundStatusOrm.branch_code == has_branch)
 
         rows = session.execute(qs)
-        results = [
-            BranchWiseFundStatus.model_validate(row._asdict()).model_dump()
-            for row in rows
-        ]
+        results = serialize_rows(BranchWiseFundStatus, rows)
     return Response(results)
 
 
@@ -183,6 +178,7 @@ def get_bw_fund_status(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_bw_exposure_status(request: Request) -> Response:
     """fetch branch wise fund status"""
     request.accepted_renderer = CustomRenderer()
@@ -190,7 +186,7 @@ def get_bw_exposure_status(request: Request) -> Response:
 
     has_branch = request.query_params.get("branch", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(
             BranchWiseMarginExposureStatusOrm.branch_code,
             BranchWiseMarginExposureStatusOrm.branch_name,
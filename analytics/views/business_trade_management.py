@@ -1,20 +1,21 @@
 from http import HTTPMethod
-from urllib.parse import urlencode
 
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 
 from core.metadata.openapi import OpenApiTags
+from core.pagination import CURSOR_PARAMETERS
 from core.permissions import IsManagementUser
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
+from db.routing import primary_only
 
+from ..cache import MAX_STALE, REALTIME_TTL, cache_response
+from ..counting import DashboardPagination
 from ..models import (
     ATBMarketShareSME,
     BoardTurnOver,
@@ -34,14 +35,33 @@ from ..orm import (
     InvestorWiseSaleableStockOrm,
     MarketShareLBSLOrm
 )
+from ..search import search_filter
+from ..serialization import serialize_rows
+from ..streaming import STREAM_PARAMETER, stream_rows, wants_stream
 
 
-class StockPagination(PageNumberPagination):
+class StockPagination(DashboardPagination):
     page_size = 50  # Customize the page size
-    page_size_query_param = "page_size"  # Allow clients to control page size
     max_page_size = 100  # Max limit to prevent very large queries
 
 
+class InvestorStockPagination(DashboardPagination):
+    page_size = 10
+
+
+# unique sort keys of the `cursor` pages
+COMPANY_STOCK_KEYSET = (CompanyWiseSaleableStockOrm.company_name,)
+INVESTOR_STOCK_KEYSET = (
+    InvestorWiseSaleableStockOrm.company_name,
+    InvestorWiseSaleableStockOrm.branch_name,
+    InvestorWiseSaleableStockOrm.investor_code,
+)
+COMPANY_STOCK_PERCENTAGE_KEYSET = (
+    CompanyWiseSaleableStockPercentageOrm.company_name,
+    CompanyWiseSaleableStockPercentageOrm.branch_name,
+)
+
+
 def _sanitaize_query_param(query: str) -> str | None:
     if query != "''" and query != '""' and query != "" and query:
         return query
@@ -51,16 +71,18 @@ def _sanitaize_query_param(query: str) -> str | None:
 @extend_schema(tags=[OpenApiTags.BUSINESS_TRADE_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_board_turnovers(request: Request) -> Response:
     """fetch branch turnovers"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(BoardTurnOverOrm).order_by(BoardTurnOverOrm.turnover.desc())
         ).scalars()
 
-        results = [BoardTurnOver.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(BoardTurnOver, qs)
 
     return Response(results)
 
@@ -68,20 +90,20 @@ def get_board_turnovers(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.BUSINESS_TRADE_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_board_turnovers_breakdown(request: Request) -> Response:
     """fetch branch turnovers breakdowns"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(BoardTurnOverBreakdownOrm).order_by(
                 BoardTurnOverBreakdownOrm.push_date.desc()
             )
         ).scalars()
 
-        results = [
-            BoardTurnOverBreakdown.model_validate(row).model_dump() for row in qs
-        ]
+        results = serialize_rows(BoardTurnOverBreakdown, qs)
 
     return Response(results)
 
@@ -89,11 +111,12 @@ def get_board_turnovers_breakdown(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.BUSINESS_TRADE_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_market_share_details(request: Request) -> Response:
     """fetch lbsl market share details"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = (
             session.execute(
                 select(MarketShareLBSLOrm).order_by(
@@ -110,11 +133,12 @@ def get_market_share_details(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.BUSINESS_TRADE_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_atb_markte_share_details(request: Request) -> Response:
     """fetch lbsl atb market share details"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = (
             session.execute(
                 select(ATBMarketShareSMEOrm).order_by(
@@ -150,10 +174,12 @@ def get_atb_markte_share_details(request: Request) -> Response:
             required=False,
             type=int,
         ),
+        *CURSOR_PARAMETERS,
     ],
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_company_wise_saleable_stock(request: Request) -> Response:
     """fetch company wise saleable stock"""
     request.accepted_renderer = CustomRenderer()
@@ -162,14 +188,16 @@ def get_company_wise_saleable_stock(request: Request) -> Response:
     company_q = _sanitaize_query_param(request.query_params.get("company"))
     gsec_flag_q = _sanitaize_query_param(request.query_params.get("gsec_flag"))
 
-    with Session(engine) as session:
+    with db_session() as session:
         query = select(CompanyWiseSaleableStockOrm).order_by(
             CompanyWiseSaleableStockOrm.company_name.asc()
         )
 
         if company_q:
             query = query.where(
-                CompanyWiseSaleableStockOrm.company_name.ilike(f"%{company_q}%")
+                search_filter(
+                    "companies", CompanyWiseSaleableStockOrm.company_name, company_q
+                )
             )
         
         if gsec_flag_q: 
@@ -177,13 +205,10 @@ def get_company_wise_saleable_stock(request: Request) -> Response:
                 CompanyWiseSaleableStockOrm.gsec_flag == gsec_flag_q
             )
 
-        qs = session.execute(query).scalars().all()
-
-        paginated_queryset = paginator.paginate_queryset(qs, request)
-        results = [
-            CompanyWiseSaleableStock.model_validate(row).model_dump()
-            for row in paginated_queryset
-        ]
+        paginated_queryset = paginator.paginate_query(
+            session, query, request, scalars=True, keyset=COMPANY_STOCK_KEYSET
+        )
+        results = serialize_rows(CompanyWiseSaleableStock, paginated_queryset)
 
         return paginator.get_paginated_response(results)
 
@@ -206,76 +231,43 @@ def get_company_wise_saleable_stock(request: Request) -> Response:
             required=False,
             type=int,
         ),
+        *CURSOR_PARAMETERS,
+        STREAM_PARAMETER,
     ],
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_investor_wise_saleable_stock(request: Request) -> Response:
     """fetch investor wise saleable stock"""
     request.accepted_renderer = CustomRenderer()
 
+    paginator = InvestorStockPagination()
+
     company_q = _sanitaize_query_param(request.query_params.get("company"))
     investor_q = _sanitaize_query_param(request.query_params.get("investor"))
-    # Get pagination info from request
-    page_number = request.query_params.get("page", 1)
-    page_size = request.query_params.get("page_size", 10)
-    offset = (int(page_number) - 1) * int(page_size)
-
-    with Session(engine) as session:
-        query = select(InvestorWiseSaleableStockOrm).order_by(
-            InvestorWiseSaleableStockOrm.company_name.asc(),
-            InvestorWiseSaleableStockOrm.branch_name.asc(),
-        )
+
+    with db_session() as session:
+        query = select(InvestorWiseSaleableStockOrm).order_by(*INVESTOR_STOCK_KEYSET)
         if company_q:
             query = query.where(
-                InvestorWiseSaleableStockOrm.company_name.ilike(f"%{company_q}%")
+                search_filter(
+                    "companies", InvestorWiseSaleableStockOrm.company_name, company_q
+                )
             )
         if investor_q:
             query = query.where(
                 InvestorWiseSaleableStockOrm.investor_code.ilike(f"{investor_q}")
             )
-        # Count total rows for pagination metadata
-        total_count = session.execute(
-            select(func.count()).select_from(query.subquery())
-        ).scalar()
-        # Apply pagination at the SQLAlchemy level
-        query = query.offset(offset).limit(page_size)
-
-        qs = session.execute(query).scalars().all()
-
-        results = [
-            InvestorWiseSaleableStock.model_validate(row).model_dump() for row in qs
-        ]
-
-        # Construct next and previous URLs
-        def build_page_url(page):
-            # Keep existing query parameters but modify the "page"
-            query_params = request.query_params.copy()
-            query_params["page"] = page
-            return request.build_absolute_uri(f"?{urlencode(query_params)}")
-
-        next_url = (
-            build_page_url(int(page_number) + 1)
-            if offset + int(page_size) < total_count
-            else None
-        )
-        previous_url = (
-            build_page_url(int(page_number) - 1) if int(page_number) > 1 else None
-        )
+        if wants_stream(request):
+            return stream_rows(InvestorWiseSaleableStock, query, scalars=True)
 
-        # Construct custom paginated response
-        response_data = {
-            "count": total_count,
-            "total_pages": (total_count // int(page_size))
-            + (1 if total_count % int(page_size) > 0 else 0),
-            "next": next_url,
-            "previous": previous_url,
-            "current_page": int(page_number),
-            "page_size": page_size,
-            "results": results,
-        }
+        paginated_queryset = paginator.paginate_query(
+            session, query, request, scalars=True, keyset=INVESTOR_STOCK_KEYSET
+        )
+        results = serialize_rows(InvestorWiseSaleableStock, paginated_queryset)
 
-        return Response(response_data)
+        return paginator.get_paginated_response(results)
 
 
 @extend_schema(
@@ -293,10 +285,13 @@ def get_investor_wise_saleable_stock(request: Request) -> Response:
             required=False,
             type=int,
         ),
+        *CURSOR_PARAMETERS,
+        STREAM_PARAMETER,
     ],
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_company_wise_saleable_stock_percentage(request: Request) -> Response:
     """fetch company wise saleable stock percentage"""
     request.accepted_renderer = CustomRenderer()
@@ -304,7 +299,7 @@ def get_company_wise_saleable_stock_percentage(request: Request) -> Response:
 
     company_q = _sanitaize_query_param(request.query_params.get("company"))
 
-    with Session(engine) as session:
+    with db_session() as session:
         query = select(CompanyWiseSaleableStockPercentageOrm).order_by(
             CompanyWiseSaleableStockPercentageOrm.company_name.asc(),
             CompanyWiseSaleableStockPercentageOrm.branch_name.asc(),
@@ -312,16 +307,22 @@ def get_company_wise_saleable_stock_percentage(request: Request) -> Response:
 
         if company_q:
             query = query.where(
-                CompanyWiseSaleableStockPercentageOrm.company_name.ilike(
-                    f"%{company_q}%"
+                search_filter(
+                    "companies",
+                    CompanyWiseSaleableStockPercentageOrm.company_name,
+                    company_q,
                 )
             )
-
-        qs = session.execute(query).scalars().all()
-        paginated_results = paginator.paginate_queryset(qs, request)
-        results = [
-            CompanyWiseSaleableStockPercentage.model_validate(row).model_dump()
-            for row in paginated_results
-        ]
+        if wants_stream(request):
+            return stream_rows(CompanyWiseSaleableStockPercentage, query, scalars=True)
+
+        paginated_results = paginator.paginate_query(
+            session,
+            query,
+            request,
+            scalars=True,
+            keyset=COMPANY_STOCK_PERCENTAGE_KEYSET,
+        )
+        results = serialize_rows(CompanyWiseSaleableStockPercentage, paginated_results)
         return paginator.get_paginated_response(results)
     
@@ -7,13 +7,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import select
-from sqlalchemy.orm import Session
 
 from core.metadata.openapi import OpenApiTags
 from core.permissions import IsManagementUser
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
 
+from ..cache import MAX_STALE, cache_response
 from ..models import (
     AdminBMClientSegmentationEquity,
     AdminBMClientSegmentationLedger,
@@ -39,6 +39,7 @@ from ..orm import (
     AdminGsecTurnoverComparisonOrm,
 
 )
+from ..serialization import serialize_rows
 
 
 def get_sum_of_property(property: str, rows: Sequence[Dict[str, Any]]) -> int:
@@ -51,20 +52,19 @@ def get_sum_of_property(property: str, rows: Sequence[Dict[str, Any]]) -> int:
 @extend_schema(tags=[OpenApiTags.ADMIN_CUSTOMER_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_client_segmentation_summary(request: Request) -> Response:
     """fetch client segmentation summary"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(ClientSegmentationSummaryOrm).order_by(
                 ClientSegmentationSummaryOrm.total_clients.desc()
             )
         ).scalars()
 
-        results = [
-            ClientSegmentationSummary.model_validate(row).model_dump() for row in qs
-        ]
+        results = serialize_rows(ClientSegmentationSummary, qs)
 
     response = {
         "detail": {
@@ -79,20 +79,19 @@ def get_client_segmentation_summary(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ADMIN_CUSTOMER_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_branchwise_client_numbers_ratio(request: Request) -> Response:
     """fetch branch turnovers"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(BranchWiseClientNumbersOrm).order_by(
                 BranchWiseClientNumbersOrm.total_clients.desc()
             )
         ).scalars()
 
-        results = [
-            BranchWiseClientNumbers.model_validate(row).model_dump() for row in qs
-        ]
+        results = serialize_rows(BranchWiseClientNumbers, qs)
 
     response = {
         "detail": {
@@ -110,18 +109,19 @@ def get_branchwise_client_numbers_ratio(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ADMIN_CUSTOMER_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_non_performers_client_ratio(request: Request) -> Response:
     """fetch non performers clients"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(NonPerformerClientOrm).order_by(
                 NonPerformerClientOrm.total_clients.desc()
             )
         ).scalars()
 
-        results = [NonPerformerClient.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(NonPerformerClient, qs)
 
     response = {
         "detail": {
@@ -139,20 +139,18 @@ def get_non_performers_client_ratio(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ADMIN_CUSTOMER_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_admin_client_segmentation_turnover(request: Request) -> Response:
     """fetch admin client segmentation turnover ratio"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminBMClientSegmentationTurnoverOrm).order_by(
                 AdminBMClientSegmentationTurnoverOrm.turnover.desc()
             )
         ).scalars()
-        results = [
-            AdminBMClientSegmentationTurnover.model_validate(row).model_dump()
-            for row in qs
-        ]
+        results = serialize_rows(AdminBMClientSegmentationTurnover, qs)
 
     response = {
         "detail": {
@@ -167,20 +165,19 @@ def get_admin_client_segmentation_turnover(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ADMIN_CUSTOMER_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_admin_client_segmentation_tpv(request: Request) -> Response:
     """fetch admin client segmentation tpv ratio"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminBMClientSegmentationTPVOrm).order_by(
                 AdminBMClientSegmentationTPVOrm.tpv_total.desc()
             )
         ).scalars()
 
-        results = [
-            AdminBMClientSegmentationTPV.model_validate(row).model_dump() for row in qs
-        ]
+        results = serialize_rows(AdminBMClientSegmentationTPV, qs)
 
     response = {
         "detail": {
@@ -202,21 +199,19 @@ def get_admin_client_segmentation_tpv(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ADMIN_CUSTOMER_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_admin_client_segmentation_equity(request: Request) -> Response:
     """fetch admin client segmentation equity ratio"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminBMClientSegmentationEquityOrm).order_by(
                 AdminBMClientSegmentationEquityOrm.equity.desc()
             )
         ).scalars()
 
-        results = [
-            AdminBMClientSegmentationEquity.model_validate(row).model_dump()
-            for row in qs
-        ]
+        results = serialize_rows(AdminBMClientSegmentationEquity, qs)
     response = {
         "detail": {
             "sum_of_equity": get_sum_of_property("equity", results),
@@ -229,21 +224,19 @@ def get_admin_client_segmentation_equity(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ADMIN_CUSTOMER_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_admin_client_segmentation_ledger(request: Request) -> Response:
     """fetch admin client segmentation ledger ratio"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminBMClientSegmentationLedgerOrm).order_by(
                 AdminBMClientSegmentationLedgerOrm.margin.desc()
             )
         ).scalars()
 
-        results = [
-            AdminBMClientSegmentationLedger.model_validate(row).model_dump()
-            for row in qs
-        ]
+        results = serialize_rows(AdminBMClientSegmentationLedger, qs)
     response = {
         "detail": {
             "sum_of_margin": get_sum_of_property("margin", results),
@@ -256,18 +249,19 @@ def get_admin_client_segmentation_ledger(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ADMIN_CUSTOMER_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_market_share(request: Request) -> Response:
     """fetch admin market share ratio"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminMarketShareOrm).order_by(
                 AdminMarketShareOrm.year.asc(),
             )
         ).scalars()
 
-        results = [AdminMarketShare.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminMarketShare, qs)
 
     response = {
         "detail": {
@@ -282,18 +276,19 @@ def get_admin_market_share(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ADMIN_CUSTOMER_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_gsec_turnover(request: Request) -> Response:
     """fetch admin gsec turnover"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminGsecTurnoverOrm).order_by(
                 AdminGsecTurnoverOrm.trading_date.desc(),
             )
         ).scalars()
 
-        results = [AdminGsecTurnover.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminGsecTurnover, qs)
 
     response = {
         "detail": {
@@ -306,18 +301,19 @@ def get_admin_gsec_turnover(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.ADMIN_CUSTOMER_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_gsec_turnover_comparison(request: Request) -> Response:
     """fetch admin gsec turnover comparison"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminGsecTurnoverComparisonOrm).order_by(
                 AdminGsecTurnoverComparisonOrm.year.desc(),
             )
         ).scalars()
 
-        results = [AdminGsecTurnoverComparison.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminGsecTurnoverComparison, qs)
 
     response = {
         "detail": {
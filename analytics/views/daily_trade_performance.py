@@ -1,18 +1,9 @@
-from datetime import datetime, timedelta
-from http import HTTPMethod
+from typing import Any, Dict, List
 
-from drf_spectacular.utils import extend_schema
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.request import Request
-from rest_framework.response import Response
-from sqlalchemy import desc, func, select, text
-from sqlalchemy.orm import Session
+from sqlalchemy import desc, func, text
 
 from authusers.models import User
 from core.metadata.openapi import OpenApiTags
-from core.renderer import CustomRenderer
-from db import engine
 
 from ..models import DailyMarginLoanUsage, DailyTurnoverPerformance, SectorExposure
 from ..orm import (
@@ -22,7 +13,8 @@ from ..orm import (
     SectorExposureCashCodeOrm,
     SectorExposureMarginCodeOrm,
 )
-from .utils import parse_summary, rolewise_branch_data_filter
+from ..registry import WidgetDefinition, widget_registry
+from .utils import parse_summary
 
 __all__ = [
     "get_basic_summaries",
@@ -37,7 +29,7 @@ __all__ = [
     "get_margincode_sector_exposure_by_branchid",
 ]
 
-SUMMARY_QUERY_STR = select(
+SUMMARY_COLUMNS = (
     func.sum(OverallSummaryOrm.total_client).label("total_clients"),
     func.sum(OverallSummaryOrm.total_active_client).label("total_active_clients"),
     func.sum(OverallSummaryOrm.cash_active_client).label("cash_active_clients"),
@@ -68,297 +60,121 @@ METRICS_OF_SUMMARY_QUERY = {
 }
 
 
-@extend_schema(tags=[OpenApiTags.DTP])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_basic_summaries(request: Request) -> Response:
-    """fetch basic branch summary"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
+def merge_summaries(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """the single row of sums as the short, cash code and margin code summaries"""
+    results = {
+        key: {"name": METRICS_OF_SUMMARY_QUERY[key], "value": value}
+        for key, value in rows[0].items()
+        if key in METRICS_OF_SUMMARY_QUERY
+    }
 
-    with Session(engine) as session:
-        qs = SUMMARY_QUERY_STR
-        qs = rolewise_branch_data_filter(qs, current_user, OverallSummaryOrm)
+    short_summary = parse_summary(results, "short_summary")
+    cash_code_summary = parse_summary(results, "cash_code_summary")
+    margin_code_summary = parse_summary(results, "margin_code_summary")
 
-        rows = session.execute(qs).first()._asdict()
+    return short_summary | cash_code_summary | margin_code_summary
 
-        results = {
-            key: {"name": METRICS_OF_SUMMARY_QUERY[key], "value": value}
-            for key, value in rows.items()
-            if key in METRICS_OF_SUMMARY_QUERY
-        }
 
-        short_summary = parse_summary(results, "short_summary")
-        cash_code_summary = parse_summary(results, "cash_code_summary")
-        margin_code_summary = parse_summary(results, "margin_code_summary")
+def summary_branch(user: User, branch_id: int) -> int:
+    """admins and cluster managers see the summary of any branch, the others their own"""
+    if user.is_admin() or user.is_cluster_manager():
+        return branch_id
+    return user.profile.branch_id
 
-        merged_dict = short_summary | cash_code_summary | margin_code_summary
-    return Response(merged_dict)
 
+BASIC_SUMMARIES = widget_registry.register(
+    WidgetDefinition(
+        name="get_basic_summaries",
+        route="basic-summaries/",
+        source=OverallSummaryOrm,
+        columns=SUMMARY_COLUMNS,
+        transform=merge_summaries,
+        branch_of=summary_branch,
+        tag=OpenApiTags.DTP,
+        description="fetch basic branch summary",
+    )
+)
 
-@extend_schema(tags=[OpenApiTags.DTP])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_basic_summaries_by_branchid(request: Request, id: int) -> Response:
-    """fetch basic branch summary with branch_id"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
-
-    with Session(engine) as session:
-        qs = SUMMARY_QUERY_STR
-        if current_user.is_admin() or current_user.is_cluster_manager():
-            qs = qs.where(OverallSummaryOrm.branch_code == id)
-        else:
-            qs = qs.where(
-                OverallSummaryOrm.branch_code == current_user.profile.branch_id
-            )
-
-        rows = session.execute(qs).first()._asdict()
-
-        results = {
-            key: {"name": METRICS_OF_SUMMARY_QUERY[key], "value": value}
-            for key, value in rows.items()
-            if key in METRICS_OF_SUMMARY_QUERY
-        }
-
-        short_summary = parse_summary(results, "short_summary")
-        cash_code_summary = parse_summary(results, "cash_code_summary")
-        margin_code_summary = parse_summary(results, "margin_code_summary")
-
-        merged_dict = short_summary | cash_code_summary | margin_code_summary
-    return Response(merged_dict)
-
-
-@extend_schema(tags=[OpenApiTags.DTP])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_turnover_performance_statistics(request: Request) -> Response:
-    """fetch the turnover performance statistics for all"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
-    # defining a threshold-date as sometimes database returning very old data
-    threshold_date = datetime.now() - timedelta(days=120)
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                DailyTurnoverPerformanceOrm.trading_date.label("trading_date"),
-                func.sum(DailyTurnoverPerformanceOrm.generated).label("generated"),
-                func.sum(DailyTurnoverPerformanceOrm.target).label("target"),
-            )
-            .where(DailyTurnoverPerformanceOrm.trading_date >= threshold_date)
-            .group_by(DailyTurnoverPerformanceOrm.trading_date)
-            .order_by(DailyTurnoverPerformanceOrm.trading_date)
-        )
-        qs = rolewise_branch_data_filter(qs, current_user, DailyTurnoverPerformanceOrm)
-        rows = session.execute(qs).all()
-
-        results = [
-            DailyTurnoverPerformance.model_validate(row._asdict()).model_dump()
-            for row in rows
-        ]
-
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.DTP])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_turnover_performance_statistics_by_branchid(
-    request: Request, id: int
-) -> Response:
-    """fetch the turnover performance statistics for all"""
-    request.accepted_renderer = CustomRenderer()
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                DailyTurnoverPerformanceOrm.trading_date.label("trading_date"),
-                func.sum(DailyTurnoverPerformanceOrm.generated).label("generated"),
-                func.sum(DailyTurnoverPerformanceOrm.target).label("target"),
-            )
-            .where(DailyTurnoverPerformanceOrm.branch_code == id)
-            .group_by(DailyTurnoverPerformanceOrm.trading_date)
-            .order_by(DailyTurnoverPerformanceOrm.trading_date)
-        )
-
-        rows = session.execute(qs).all()
-
-        results = [
-            DailyTurnoverPerformance.model_validate(row._asdict()).model_dump()
-            for row in rows
-        ]
-
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.DTP])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_margin_loan_statistics(request: Request) -> Response:
-    """fetch the margin loan statistics for all"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                DailyMarginLoanUsageOrm.trading_date.label("trading_date"),
-                func.sum(DailyMarginLoanUsageOrm.loan_amount).label("total_allocated"),
-                func.sum(DailyMarginLoanUsageOrm.daily_turnover).label("daily_usage"),
-            )
-            .group_by(DailyMarginLoanUsageOrm.trading_date)
-            .order_by(DailyMarginLoanUsageOrm.trading_date)
-        )
-
-        qs = rolewise_branch_data_filter(qs, current_user, DailyMarginLoanUsageOrm)
-
-        rows = session.execute(qs).all()
-
-        results = [
-            DailyMarginLoanUsage.model_validate(row._asdict()).model_dump()
-            for row in rows
-        ]
-
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.DTP])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_margin_loan_statistics_by_branchid(request: Request, id: int) -> Response:
-    """fetch the margin loan statistics for branch"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user  # noqa: F841
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                DailyMarginLoanUsageOrm.trading_date.label("trading_date"),
-                func.sum(DailyMarginLoanUsageOrm.loan_amount).label("total_allocated"),
-                func.sum(DailyMarginLoanUsageOrm.daily_turnover).label("daily_usage"),
-            )
-            .where(DailyMarginLoanUsageOrm.branch_code == id)
-            .group_by(DailyMarginLoanUsageOrm.trading_date)
-            .order_by(DailyMarginLoanUsageOrm.trading_date)
-        )
-        rows = session.execute(qs).all()
-
-        results = [
-            DailyMarginLoanUsage.model_validate(row._asdict()).model_dump()
-            for row in rows
-        ]
-
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.DTP])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_cashcode_sector_exposure(request: Request) -> Response:
-    """fetch the margin loan statistics for all"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user  # noqa: F841
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                SectorExposureCashCodeOrm.sector_name.label("name"),
-                func.sum(SectorExposureCashCodeOrm.total_qty).label("value"),
-            )
-            .group_by(SectorExposureCashCodeOrm.sector_name)
-            .order_by(desc(text("value")))
-        )
-
-        qs = rolewise_branch_data_filter(qs, current_user, SectorExposureCashCodeOrm)
-
-        rows = session.execute(qs).all()
-
-        results = [
-            SectorExposure.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.DTP])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_cashcode_sector_exposure_by_branchid(request: Request, id: int) -> Response:
-    """fetch the margin loan statistics for all"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user  # noqa: F841
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                SectorExposureCashCodeOrm.sector_name.label("name"),
-                func.sum(SectorExposureCashCodeOrm.total_qty).label("value"),
-            )
-            .where(SectorExposureCashCodeOrm.branch_code == id)
-            .group_by(SectorExposureCashCodeOrm.sector_name)
-            .order_by(desc(text("value")))
-        )
-        rows = session.execute(qs).all()
-
-        results = [
-            SectorExposure.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.DTP])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_margincode_sector_exposure(request: Request) -> Response:
-    """fetch the margin loan statistics for all"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user  # noqa: F841
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                SectorExposureMarginCodeOrm.sector_name.label("name"),
-                func.sum(SectorExposureMarginCodeOrm.total_qty).label("value"),
-            )
-            .group_by(SectorExposureMarginCodeOrm.sector_name)
-            .order_by(desc(text("value")))
-        )
-
-        qs = rolewise_branch_data_filter(qs, current_user, SectorExposureMarginCodeOrm)
-
-        rows = session.execute(qs).all()
-
-        results = [
-            SectorExposure.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-
-    return Response(results)
-
+TURNOVER_PERFORMANCE_STATISTICS = widget_registry.register(
+    WidgetDefinition(
+        name="get_turnover_performance_statistics",
+        route="daily-trade-performance/",
+        source=DailyTurnoverPerformanceOrm,
+        columns=(
+            DailyTurnoverPerformanceOrm.trading_date.label("trading_date"),
+            func.sum(DailyTurnoverPerformanceOrm.generated).label("generated"),
+            func.sum(DailyTurnoverPerformanceOrm.target).label("target"),
+        ),
+        group_by=(DailyTurnoverPerformanceOrm.trading_date,),
+        order_by=(DailyTurnoverPerformanceOrm.trading_date,),
+        recent_days=120,
+        model=DailyTurnoverPerformance,
+        tag=OpenApiTags.DTP,
+        description="fetch the turnover performance statistics",
+    )
+)
 
-@extend_schema(tags=[OpenApiTags.DTP])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_margincode_sector_exposure_by_branchid(request: Request, id: int) -> Response:
-    """fetch the margin loan statistics for all"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user  # noqa: F841
+MARGIN_LOAN_STATISTICS = widget_registry.register(
+    WidgetDefinition(
+        name="get_margin_loan_statistics",
+        route="margin-loan-usage/",
+        source=DailyMarginLoanUsageOrm,
+        columns=(
+            DailyMarginLoanUsageOrm.trading_date.label("trading_date"),
+            func.sum(DailyMarginLoanUsageOrm.loan_amount).label("total_allocated"),
+            func.sum(DailyMarginLoanUsageOrm.daily_turnover).label("daily_usage"),
+        ),
+        group_by=(DailyMarginLoanUsageOrm.trading_date,),
+        order_by=(DailyMarginLoanUsageOrm.trading_date,),
+        model=DailyMarginLoanUsage,
+        tag=OpenApiTags.DTP,
+        description="fetch the margin loan statistics",
+    )
+)
 
-    with Session(engine) as session:
-        qs = (
-            select(
-                SectorExposureMarginCodeOrm.sector_name.label("name"),
-                func.sum(SectorExposureMarginCodeOrm.total_qty).label("value"),
-            )
-            .where(SectorExposureMarginCodeOrm.branch_code == id)
-            .group_by(SectorExposureMarginCodeOrm.sector_name)
-            .order_by(desc(text("value")))
-        )
-        rows = session.execute(qs).all()
+CASHCODE_SECTOR_EXPOSURE = widget_registry.register(
+    WidgetDefinition(
+        name="get_cashcode_sector_exposure",
+        route="sector-exposure-cashcode/",
+        source=SectorExposureCashCodeOrm,
+        columns=(
+            SectorExposureCashCodeOrm.sector_name.label("name"),
+            func.sum(SectorExposureCashCodeOrm.total_qty).label("value"),
+        ),
+        group_by=(SectorExposureCashCodeOrm.sector_name,),
+        order_by=(desc(text("value")),),
+        model=SectorExposure,
+        tag=OpenApiTags.DTP,
+        description="fetch the sector exposure of the cash code investors",
+    )
+)
 
-        results = [
-            SectorExposure.model_validate(row._asdict()).model_dump() for row in rows
-        ]
+MARGINCODE_SECTOR_EXPOSURE = widget_registry.register(
+    WidgetDefinition(
+        name="get_margincode_sector_exposure",
+        route="sector-exposure-margincode/",
+        source=SectorExposureMarginCodeOrm,
+        columns=(
+            SectorExposureMarginCodeOrm.sector_name.label("name"),
+            func.sum(SectorExposureMarginCodeOrm.total_qty).label("value"),
+        ),
+        group_by=(SectorExposureMarginCodeOrm.sector_name,),
+        order_by=(desc(text("value")),),
+        model=SectorExposure,
+        tag=OpenApiTags.DTP,
+        description="fetch the sector exposure of the margin code investors",
+    )
+)
 
-    return Response(results)
+get_basic_summaries = BASIC_SUMMARIES.view
+get_basic_summaries_by_branchid = BASIC_SUMMARIES.branch_view
+get_turnover_performance_statistics = TURNOVER_PERFORMANCE_STATISTICS.view
+get_turnover_performance_statistics_by_branchid = (
+    TURNOVER_PERFORMANCE_STATISTICS.branch_view
+)
+get_margin_loan_statistics = MARGIN_LOAN_STATISTICS.view
+get_margin_loan_statistics_by_branchid = MARGIN_LOAN_STATISTICS.branch_view
+get_cashcode_sector_exposure = CASHCODE_SECTOR_EXPOSURE.view
+get_cashcode_sector_exposure_by_branchid = CASHCODE_SECTOR_EXPOSURE.branch_view
+get_margincode_sector_exposure = MARGINCODE_SECTOR_EXPOSURE.view
+get_margincode_sector_exposure_by_branchid = MARGINCODE_SECTOR_EXPOSURE.branch_view
@@ -6,6 +6,7 @@ from drf_spectacular.utils import extend_schema,OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from core.metadata.openapi.configs import OpenApiTags
 from rest_framework.request import Request
+from analytics.cache import REALTIME_TTL, cache_response
 from analytics.views.utils import fetch_from_lankabd_api,fetchAamarStockWeb
 
 __all__ = ["live_dse_trade",
@@ -23,6 +24,7 @@ __all__ = ["live_dse_trade",
 
 @extend_schema(tags=[OpenApiTags.PORTAL_LIVE_DATA])
 @api_view(["GET"])
+@cache_response(ttl=REALTIME_TTL)
 def live_dse_trade(request: Request):
     data = fetch_from_lankabd_api("/api/datafeed/IndexLiveData/LiveDSETradeStatistics")
     if data is None:
@@ -35,6 +37,7 @@ def live_dse_trade(request: Request):
 
 @extend_schema(tags=[OpenApiTags.PORTAL_LIVE_DATA])
 @api_view(["GET"])
+@cache_response(ttl=REALTIME_TTL)
 def live_tickers(request: Request):
     data = fetch_from_lankabd_api("/api/datafeed/LiveStockFeed?count=15")
     if data is None:
@@ -46,6 +49,7 @@ def live_tickers(request: Request):
 
 @extend_schema(tags=[OpenApiTags.PORTAL_LIVE_DATA])
 @api_view(["GET"])
+@cache_response(ttl=REALTIME_TTL)
 def live_dse_dsex(request: Request):
     data = fetch_from_lankabd_api("/api/datafeed/IndexLiveData/LiveIndexSummary?symbol=DSEX")
     if data is None:
@@ -57,6 +61,7 @@ def live_dse_dsex(request: Request):
 
 @extend_schema(tags=[OpenApiTags.PORTAL_LIVE_DATA])
 @api_view(["GET"])
+@cache_response(ttl=REALTIME_TTL)
 def live_dse_dsex_summary(request: Request):
     data = fetch_from_lankabd_api("/api/datafeed/IndexLiveData/LiveIndexSummaryCDP?symbol=DSEX")
     if data is None:
@@ -68,6 +73,7 @@ def live_dse_dsex_summary(request: Request):
 
 @extend_schema(tags=[OpenApiTags.PORTAL_LIVE_DATA])
 @api_view(["GET"])
+@cache_response()
 def dse_dsex_trade_summary_previous_ten_days(request: Request):
     data = fetch_from_lankabd_api("/api/APIMarket/GetTradeStatisitcsHistory?count=10")
     if data is None:
@@ -81,6 +87,7 @@ def dse_dsex_trade_summary_previous_ten_days(request: Request):
 
 @extend_schema(tags=[OpenApiTags.PORTAL_LIVE_DATA])
 @api_view(["GET"])
+@cache_response()
 def fear_greed(request: Request):
     try:
         data = fetchAamarStockWeb("https://www.amarstock.com/Home/GetFearGreedOnly")
@@ -90,6 +97,7 @@ def fear_greed(request: Request):
     
 @extend_schema(tags=[OpenApiTags.PORTAL_LIVE_DATA])
 @api_view(["GET"])
+@cache_response()
 def stock_pe_ration(request: Request):
     try:
         data = fetchAamarStockWeb("https://www.amarstock.com/pe-data-chart")
@@ -99,6 +107,7 @@ def stock_pe_ration(request: Request):
 
 @extend_schema(tags=[OpenApiTags.PORTAL_LIVE_DATA])
 @api_view(["GET"])
+@cache_response()
 def dse_traded_company_list(request: Request):
     data = fetch_from_lankabd_api("/api/datafeed/IndexLiveData/LiveStockWatchData")
     if data is None:
@@ -120,6 +129,7 @@ def dse_traded_company_list(request: Request):
         )]
                )
 @api_view(["GET"])
+@cache_response()
 def get_poral_pe_rsi_conpanywise(request: Request):
     company_code = request.query_params.get("company_code", "")
 
@@ -178,6 +188,7 @@ def get_poral_pe_rsi_conpanywise(request: Request):
                )
 @extend_schema(tags=[OpenApiTags.PORTAL_LIVE_DATA])
 @api_view(["GET"])
+@cache_response()
 def dse_history_company(request: Request):
     # ✅ Get symbol from query params
     symbol = request.query_params.get("symbol")
@@ -1,8 +1,7 @@
 from http import HTTPMethod
 from sqlalchemy import select
-from sqlalchemy.orm import Session
 from analytics.views.utils import generate_csv
-from db import engine
+from db import db_session
 from datetime import datetime
 
 from drf_spectacular.utils import extend_schema
@@ -13,6 +12,7 @@ from core.metadata.openapi.configs import OpenApiTags
 from rest_framework.permissions import IsAuthenticated
 from core.permissions import IsManagementUser
 
+from ..cache import cache_response
 from ..models import (
     AdminOMSBranchWiseTurnoverAsOnMonth,
     AdminOMSBranchWiseTurnoverDtAsOnMonth
@@ -21,6 +21,7 @@ from ..orm import (
     AdminOMSBranchWiseTurnoverAsOnMonthORM,
     AdminOMSBranchWiseTurnoverDtAsOnMonthORM
 )
+from ..serialization import serialize_rows
 
 __all__ = [
     "download_admin_oms_datewise_turnover_csv",
@@ -30,16 +31,17 @@ __all__ = [
 
 @extend_schema(tags=[OpenApiTags.ACTIVE_TRADING_CODE])
 @api_view([HTTPMethod.GET])
+@cache_response()
 def download_admin_oms_datewise_turnover_csv(request):
     """Download admin OMS Branch wise turnover as CSV"""
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminOMSBranchWiseTurnoverAsOnMonthORM).order_by(
                 AdminOMSBranchWiseTurnoverAsOnMonthORM.branch_Name
             )
         ).scalars()
 
-        results = [AdminOMSBranchWiseTurnoverAsOnMonth.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminOMSBranchWiseTurnoverAsOnMonth, qs)
         
     header_mapping = {
         "branch_Name": "Branch Name",
@@ -60,16 +62,17 @@ def download_admin_oms_datewise_turnover_csv(request):
 
 @extend_schema(tags=[OpenApiTags.ACTIVE_TRADING_CODE])
 @api_view([HTTPMethod.GET])
+@cache_response()
 def download_admin_oms_datewise_dt_turnover_csv(request):
     """Download admin OMS Branch wise dt turnover as CSV"""
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(AdminOMSBranchWiseTurnoverDtAsOnMonthORM).order_by(
                 AdminOMSBranchWiseTurnoverDtAsOnMonthORM.branch_Name
             )
         ).scalars()
 
-        results = [AdminOMSBranchWiseTurnoverDtAsOnMonth.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(AdminOMSBranchWiseTurnoverDtAsOnMonth, qs)
         
     header_mapping = {
         "branch_Name": "Branch Name",
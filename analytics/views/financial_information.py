@@ -8,14 +8,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import Sequence, func, select
-from sqlalchemy.orm import Session
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 
 from core.metadata.openapi import OpenApiTags
 from core.permissions import IsManagementUser
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
 
+from ..cache import cache_response
 from ..models import (
     TotalDepositToday,
     TotalDepositThisYear,
@@ -36,6 +36,7 @@ from ..orm import (
     DayWiseSSLDetailsORM,
     YearWiseSSLDetailsORM,
 )
+from ..serialization import serialize_rows
 
 __all__ = [
     "get_admin_total_deposit_branch_wise_today",
@@ -59,18 +60,19 @@ def get_sum_of_property(property: str, rows: Sequence[Dict[str, Any]]) -> int:
 @extend_schema(tags=[OpenApiTags.FINANCIAL_INFORMATION])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_total_deposit_branch_wise_today(request: Request) -> Response:
     """fetch admin total deposit branch wise today"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(TotalDepositTodayOrm).order_by(
                 TotalDepositTodayOrm.branch_code
             )
         ).scalars()
 
-        results = [TotalDepositToday.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(TotalDepositToday, qs)
 
         
     response = {
@@ -101,18 +103,19 @@ def get_admin_total_deposit_branch_wise_today(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.FINANCIAL_INFORMATION])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_total_deposit_branch_wise_this_year(request: Request) -> Response:
     """fetch admin total deposit branch wise this year"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(TotalDepositThisYearOrm).order_by(
                 TotalDepositThisYearOrm.branch_code
             )
         ).scalars()
 
-        results = [TotalDepositThisYear.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(TotalDepositThisYear, qs)
 
         
     response = {
@@ -139,18 +142,19 @@ def get_admin_total_deposit_branch_wise_this_year(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.FINANCIAL_INFORMATION])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_total_withdrawal_branch_wise_today(request: Request) -> Response:
     """fetch admin total withdrawal branch wise today"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(TotalWithdrawalTodayOrm).order_by(
                 TotalWithdrawalTodayOrm.branch_code
             )
         ).scalars()
 
-        results = [TotalWithdrawalToday.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(TotalWithdrawalToday, qs)
 
         
     response = {
@@ -180,18 +184,19 @@ def get_admin_total_withdrawal_branch_wise_today(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.FINANCIAL_INFORMATION])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_total_withdrawal_branch_wise_this_year(request: Request) -> Response:
     """fetch admin total withdrawal branch wise this year"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(TotalWithdrawalThisYearOrm).order_by(
                 TotalWithdrawalThisYearOrm.branch_code
             )
         ).scalars()
 
-        results = [TotalWithdrawalThisYear.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(TotalWithdrawalThisYear, qs)
 
         
     response = {
@@ -221,18 +226,19 @@ def get_admin_total_withdrawal_branch_wise_this_year(request: Request) -> Respon
 @extend_schema(tags=[OpenApiTags.FINANCIAL_INFORMATION])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_total_deposit_branch_wise_monthly(request: Request) -> Response:
     """fetch admin total deposit branch wise monthly"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(TotalDepositMonthWiseORM).order_by(
                 TotalDepositMonthWiseORM.branch_code
             )
         ).scalars()
 
-        results = [TotalDepositMonthWise.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(TotalDepositMonthWise, qs)
 
         response = {
         "monthly_wise": {
@@ -260,18 +266,19 @@ def get_admin_total_deposit_branch_wise_monthly(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.FINANCIAL_INFORMATION])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_total_withdrawal_branch_wise_monthly(request: Request) -> Response:
     """fetch admin total withdrawal branch wise monthly"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(TotalPaymentMonthWiseORM).order_by(
                 TotalPaymentMonthWiseORM.branch_code
             )
         ).scalars()
 
-        results = [TotalPaymentMonthWise.model_validate(row).model_dump() for row in qs]
+        results = serialize_rows(TotalPaymentMonthWise, qs)
 
         response = {
         "monthly_wise": {
@@ -311,12 +318,13 @@ def get_admin_total_withdrawal_branch_wise_monthly(request: Request) -> Response
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_year_wise_ssl_details(request: Request) -> Response:
     """fetch admin year wise ssl details"""
     request.accepted_renderer = CustomRenderer()
     has_year = request.query_params.get("year", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(YearWiseSSLDetailsORM).order_by(
                 YearWiseSSLDetailsORM.amount.desc()
             )
@@ -326,7 +334,7 @@ def get_admin_year_wise_ssl_details(request: Request) -> Response:
 
         rows = session.execute(qs).scalars()
 
-        results = [YearWiseSSLDetails.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(YearWiseSSLDetails, rows)
 
     return Response(results)
 
@@ -335,18 +343,19 @@ def get_admin_year_wise_ssl_details(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.FINANCIAL_INFORMATION])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated, IsManagementUser])
+@cache_response()
 def get_admin_day_wise_ssl_details(request: Request) -> Response:
     """fetch admin day wise ssl details"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(DayWiseSSLDetailsORM).order_by(
                 DayWiseSSLDetailsORM.amount.desc()
             )
 
         rows = session.execute(qs).scalars()
 
-        results = [DayWiseSSLDetails.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(DayWiseSSLDetails, rows)
 
     return Response(results)
 
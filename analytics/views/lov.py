@@ -6,16 +6,17 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import select
-from sqlalchemy.orm import Session
 
 from authusers.models import RoleChoices, User
 from core.helper import enveloper
 from core.metadata.openapi import OpenApiTags
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
 
+from ..cache import cache_response
 from ..models import Branch, ClusterManager, Trader
 from ..orm import BranchOrm, ClusterManagerOrm, TraderOrm
+from ..serialization import serialize_rows
 from ..serializers import BranchSerializer, ClusterManagerSerializer, TraderSerializer
 
 __all__ = [
@@ -36,13 +37,14 @@ __all__ = [
         IsAuthenticated,
     ]
 )
+@cache_response()
 def get_regions(request: Request) -> Response:
     """fetch all regions. results will be automatically filters according to user role."""
     request.accepted_renderer = CustomRenderer()
 
     current_user: User = request.user
 
-    with Session(engine) as session:
+    with db_session() as session:
         match current_user.role:
             # case RoleChoices.BRANCH_MANAGER | RoleChoices.REGIONAL_MANAGER:
             #     qs = session.execute(
@@ -65,7 +67,7 @@ def get_regions(request: Request) -> Response:
                     .distinct(ClusterManagerOrm.region_id)
                     .order_by(ClusterManagerOrm.region_name)
                 ).scalars()
-        results = [ClusterManager.model_validate(region).model_dump() for region in qs]
+        results = serialize_rows(ClusterManager, qs)
     return Response(results)
 
 @extend_schema(
@@ -77,13 +79,14 @@ def get_regions(request: Request) -> Response:
         IsAuthenticated,
     ]
 )
+@cache_response()
 def get_branches(request: Request) -> Response:
     """fetch all branches. results will be automatically filters according to user role."""
     request.accepted_renderer = CustomRenderer()
 
     current_user: User = request.user
 
-    with Session(engine) as session:
+    with db_session() as session:
         match current_user.role:
             case RoleChoices.BRANCH_MANAGER | RoleChoices.REGIONAL_MANAGER:
                 qs = session.execute(
@@ -105,7 +108,7 @@ def get_branches(request: Request) -> Response:
                 qs = session.execute(
                     select(BranchOrm).order_by(BranchOrm.branch_name)
                 ).scalars()
-        results = [Branch.model_validate(branch).model_dump() for branch in qs]
+        results = serialize_rows(Branch, qs)
     return Response(results)
 
 
@@ -118,15 +121,16 @@ def get_branches(request: Request) -> Response:
         IsAuthenticated,
     ]
 )
+@cache_response()
 def get_all_traders(request: Request) -> Request:
     """fetch all traders."""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(TraderOrm).order_by(TraderOrm.branch_name)
         ).scalars()
-        results = [Trader.model_validate(trader).model_dump() for trader in qs]
+        results = serialize_rows(Trader, qs)
         return Response(results)
 
 
@@ -141,19 +145,20 @@ def get_all_traders(request: Request) -> Request:
         IsAuthenticated,
     ]
 )
+@cache_response()
 def get_traders_for_branchid(request: Request, id: int) -> Request:
     """fetch all traders respective to branchId"""
     request.accepted_renderer = CustomRenderer()
     current_user: User = request.user
 
-    with Session(engine) as session:
+    with db_session() as session:
         query = select(TraderOrm).order_by(TraderOrm.trader_id)
         if current_user.role == RoleChoices.REGIONAL_MANAGER:
             query = query.where(TraderOrm.trader_id == current_user.username)
         else:
             query = query.where(TraderOrm.branch_code == id)
         qs = session.execute(query).scalars()
-        results = [Trader.model_validate(trader).model_dump() for trader in qs]
+        results = serialize_rows(Trader, qs)
         return Response(results)
 
 
@@ -168,13 +173,14 @@ def get_traders_for_branchid(request: Request, id: int) -> Request:
         IsAdminUser,
     ]
 )
+@cache_response()
 def get_cluster_managers(request: Request) -> Request:
     """fetch all cluster managers"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = session.execute(
             select(ClusterManagerOrm).order_by(ClusterManagerOrm.branch_name)
         ).scalars()
-        results = [ClusterManager.model_validate(cm).model_dump() for cm in qs]
+        results = serialize_rows(ClusterManager, qs)
         return Response(results)
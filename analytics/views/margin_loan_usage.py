@@ -9,13 +9,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import func, select
-from sqlalchemy.orm import Session
 
 from authusers.models import User
 from core.metadata.openapi import OpenApiTags
+from core.pagination import CURSOR_PARAMETERS
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
 
+from ..cache import cache_response
+from ..counting import DashboardPagination
 from ..models import Exposure, MarginLoanUsgae, MarkedInvestor, RMWiseNetTrade
 from ..orm import (
     ExposureControllingManagementOrm,
@@ -25,6 +27,9 @@ from ..orm import (
     RMWiseNetTradeOrm,
     YellowZoneInvestorOrm,
 )
+from ..registry import WidgetDefinition, widget_registry
+from ..serialization import serialize_rows
+from ..streaming import STREAM_PARAMETER, stream_rows, wants_stream
 from .utils import rolewise_branch_data_filter
 
 __all__ = [
@@ -74,126 +79,50 @@ def get_marked_investors(
     return qs
 
 
-@extend_schema(tags=[OpenApiTags.MLU])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_margin_loan_allocations(request: Request) -> Response:
-    """fetch all margin loan allocation summary"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                MarginLoanAllocationUsageOrm.col2.label("perticular"),
-                func.sum(MarginLoanAllocationUsageOrm.col1).label("amount"),
-            )
-            .group_by(MarginLoanAllocationUsageOrm.col2)
-            .order_by(MarginLoanAllocationUsageOrm.col2)
-        )
-
-        qs = rolewise_branch_data_filter(qs, current_user, MarginLoanAllocationUsageOrm)
-
-        rows = session.execute(qs)
-        results = [
-            MarginLoanUsgae.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.MLU])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_margin_loan_allocations_by_branchid(request: Request, id: int) -> Response:
-    """fetch all margin loan allocation summary by brnach id"""
-    request.accepted_renderer = CustomRenderer()
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                MarginLoanAllocationUsageOrm.col2.label("perticular"),
-                func.sum(MarginLoanAllocationUsageOrm.col1).label("amount"),
-            )
-            .where(MarginLoanAllocationUsageOrm.branch_code == id)
-            .group_by(MarginLoanAllocationUsageOrm.col2)
-            .order_by(MarginLoanAllocationUsageOrm.col2)
-        )
-        rows = session.execute(qs)
-        results = [
-            MarginLoanUsgae.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.MLU])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_exposures_list(request: Request) -> Response:
-    """fetch all margin loan allocation summary"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                ExposureControllingManagementOrm.exposure_type.label("exposure"),
-                func.sum(ExposureControllingManagementOrm.investors_count).label(
-                    "investors"
-                ),
-                func.sum(ExposureControllingManagementOrm.loan_amount).label(
-                    "loan_amount"
-                ),
-            )
-            .group_by(ExposureControllingManagementOrm.exposure_type)
-            .order_by(ExposureControllingManagementOrm.exposure_type)
-        )
-
-        qs = rolewise_branch_data_filter(
-            qs, current_user, ExposureControllingManagementOrm
-        )
-
-        rows = session.execute(qs)
-        results = [Exposure.model_validate(row._asdict()).model_dump() for row in rows]
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.MLU])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_exposures_list_by_branchid(request: Request, id: int) -> Response:
-    """fetch all margin loan allocation summary"""
-    request.accepted_renderer = CustomRenderer()
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                ExposureControllingManagementOrm.exposure_type.label("exposure"),
-                func.sum(ExposureControllingManagementOrm.investors_count).label(
-                    "investors"
-                ),
-                func.sum(ExposureControllingManagementOrm.loan_amount).label(
-                    "loan_amount"
-                ),
-            )
-            .where(ExposureControllingManagementOrm.branch_code == id)
-            .group_by(ExposureControllingManagementOrm.exposure_type)
-            .order_by(ExposureControllingManagementOrm.exposure_type)
-        )
-        rows = session.execute(qs)
-        results = [Exposure.model_validate(row._asdict()).model_dump() for row in rows]
-    return Response(results)
-
+MARGIN_LOAN_ALLOCATIONS = widget_registry.register(
+    WidgetDefinition(
+        name="get_margin_loan_allocations",
+        route="margin-loan-allocations/",
+        source=MarginLoanAllocationUsageOrm,
+        columns=(
+            MarginLoanAllocationUsageOrm.col2.label("perticular"),
+            func.sum(MarginLoanAllocationUsageOrm.col1).label("amount"),
+        ),
+        group_by=(MarginLoanAllocationUsageOrm.col2,),
+        order_by=(MarginLoanAllocationUsageOrm.col2,),
+        model=MarginLoanUsgae,
+        tag=OpenApiTags.MLU,
+        description="fetch all margin loan allocation summary",
+    )
+)
 
-@extend_schema(tags=[OpenApiTags.MLU])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_rmwise_net_trades(request: Request) -> Response:
-    """fetch all RM list with net trades"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
+EXPOSURES_LIST = widget_registry.register(
+    WidgetDefinition(
+        name="get_exposures_list",
+        route="exposure-list/",
+        source=ExposureControllingManagementOrm,
+        columns=(
+            ExposureControllingManagementOrm.exposure_type.label("exposure"),
+            func.sum(ExposureControllingManagementOrm.investors_count).label(
+                "investors"
+            ),
+            func.sum(ExposureControllingManagementOrm.loan_amount).label("loan_amount"),
+        ),
+        group_by=(ExposureControllingManagementOrm.exposure_type,),
+        order_by=(ExposureControllingManagementOrm.exposure_type,),
+        model=Exposure,
+        tag=OpenApiTags.MLU,
+        description="fetch the investors and loans by exposure",
+    )
+)
 
-    with Session(engine) as session:
-        qs = select(
+RMWISE_NET_TRADES = widget_registry.register(
+    WidgetDefinition(
+        name="get_rmwise_net_trades",
+        branch_name="get_rmwise_net_trades_by_branch_id",
+        route="rmwise-net-trades/",
+        source=RMWiseNetTradeOrm,
+        columns=(
             RMWiseNetTradeOrm.branch_code,
             RMWiseNetTradeOrm.branch_name,
             RMWiseNetTradeOrm.investor_code,
@@ -201,47 +130,21 @@ def get_rmwise_net_trades(request: Request) -> Response:
             RMWiseNetTradeOrm.ending_balance,
             RMWiseNetTradeOrm.net_buysell,
             RMWiseNetTradeOrm.rm_name,
-        ).order_by(RMWiseNetTradeOrm.branch_name)
-
-        qs = rolewise_branch_data_filter(qs, current_user, RMWiseNetTradeOrm)
-
-        rows = session.execute(qs)
-        results = [
-            RMWiseNetTrade.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.MLU])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_rmwise_net_trades_by_branch_id(request: Request, id: int) -> Response:
-    """fetch all RM list with net trades"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                RMWiseNetTradeOrm.branch_code,
-                RMWiseNetTradeOrm.branch_name,
-                RMWiseNetTradeOrm.investor_code,
-                RMWiseNetTradeOrm.opening_balance,
-                RMWiseNetTradeOrm.ending_balance,
-                RMWiseNetTradeOrm.net_buysell,
-                RMWiseNetTradeOrm.rm_name,
-            )
-            .where(RMWiseNetTradeOrm.branch_code == id)
-            .order_by(RMWiseNetTradeOrm.branch_name)
-        )
-
-        qs = rolewise_branch_data_filter(qs, current_user, RMWiseNetTradeOrm)
+        ),
+        order_by=(RMWiseNetTradeOrm.branch_name,),
+        scope_branch_view=True,
+        model=RMWiseNetTrade,
+        tag=OpenApiTags.MLU,
+        description="fetch all RM list with net trades",
+    )
+)
 
-        rows = session.execute(qs)
-        results = [
-            RMWiseNetTrade.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-    return Response(results)
+get_margin_loan_allocations = MARGIN_LOAN_ALLOCATIONS.view
+get_margin_loan_allocations_by_branchid = MARGIN_LOAN_ALLOCATIONS.branch_view
+get_exposures_list = EXPOSURES_LIST.view
+get_exposures_list_by_branchid = EXPOSURES_LIST.branch_view
+get_rmwise_net_trades = RMWISE_NET_TRADES.view
+get_rmwise_net_trades_by_branch_id = RMWISE_NET_TRADES.branch_view
 
 
 @extend_schema(
@@ -263,10 +166,13 @@ def get_rmwise_net_trades_by_branch_id(request: Request, id: int) -> Response:
             required=False,
             description="marked investors under specific branch",
         ),
+        STREAM_PARAMETER,
+        *CURSOR_PARAMETERS,
     ],
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_zone_marked_clients(request: Request) -> Response:
     """fetch all RM list with net trades"""
     request.accepted_renderer = CustomRenderer()
@@ -275,7 +181,7 @@ def get_zone_marked_clients(request: Request) -> Response:
     mark = request.query_params.get("investor_type")
     has_branch = request.query_params.get("branch")
 
-    with Session(engine) as session:
+    with db_session() as session:
         match mark:
             case MarkedInvestorEnum.RED:
                 qs = get_marked_investors(RedZoneInvestorOrm, current_user, has_branch)
@@ -287,9 +193,18 @@ def get_zone_marked_clients(request: Request) -> Response:
                 qs = get_marked_investors(
                     NegativeEquityInvestorOrm, current_user, has_branch
                 )
+        if wants_stream(request):
+            return stream_rows(MarkedInvestor, qs)
+
+        paginator = DashboardPagination()
+        if paginator.uses_cursor(request):
+            columns = qs.selected_columns
+            keyset = (columns.investor_name, columns.investor_code)
+            rows = paginator.paginate_query(session, qs, request, keyset=keyset)
+            return paginator.get_paginated_response(
+                serialize_rows(MarkedInvestor, rows)
+            )
 
         rows = session.execute(qs)
-        results = [
-            MarkedInvestor.model_validate(row._asdict()).model_dump() for row in rows
-        ]
+        results = serialize_rows(MarkedInvestor, rows)
     return Response(results)
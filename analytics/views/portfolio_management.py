@@ -1,21 +1,19 @@
 from copy import deepcopy
-from datetime import datetime, timedelta
 from http import HTTPMethod
 
-import pandas as pd
 from drf_spectacular.utils import extend_schema
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import func, select
-from sqlalchemy.orm import Session
 
 from authusers.models import User
 from core.metadata.openapi import OpenApiTags
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
 
+from ..cache import cache_response
 from ..models import DailyNetFundFlow, PortfolioStatus, TradeVsClient
 from ..orm import (
     AccountOpeningFundInOutFlowOrm,
@@ -24,6 +22,7 @@ from ..orm import (
     TurnoverAndClientsTradeOrm,
     TurnoverPerformanceOrm,
 )
+from ..registry import Pivot, WidgetDefinition, widget_registry
 from .utils import rolewise_branch_data_filter
 
 __all__ = [
@@ -39,125 +38,105 @@ __all__ = [
     "get_portfolio_status_by_branchid",
 ]
 
+DAILY_NET_FUNDFLOW = widget_registry.register(
+    WidgetDefinition(
+        name="get_daily_net_fundflow",
+        route="daily-net-fundflow/",
+        source=DailyNetFundFlowOrm,
+        columns=(
+            DailyNetFundFlowOrm.trading_date.label("trading_date"),
+            func.sum(DailyNetFundFlowOrm.fundflow).label("amount"),
+        ),
+        group_by=(DailyNetFundFlowOrm.trading_date,),
+        recent_days=120,
+        model=DailyNetFundFlow,
+        tag=OpenApiTags.PM,
+        description="fetch the daily net fundflow",
+    )
+)
 
-@extend_schema(tags=[OpenApiTags.PM])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_daily_net_fundflow(request: Request) -> Response:
-    """fetch basic branch summary"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
-    threshold_date = datetime.now() - timedelta(days=120)
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                DailyNetFundFlowOrm.trading_date.label("trading_date"),
-                func.sum(DailyNetFundFlowOrm.fundflow).label("amount"),
-            )
-            .where(DailyNetFundFlowOrm.trading_date >= threshold_date)
-            .group_by(DailyNetFundFlowOrm.trading_date)
-        )
-
-        qs = rolewise_branch_data_filter(qs, current_user, DailyNetFundFlowOrm)
-        rows = session.execute(qs)
-        results = [
-            DailyNetFundFlow.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.PM])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_daily_net_fundflow_by_branchid(request: Request, id: int) -> Response:
-    """fetch basic branch summary"""
-    request.accepted_renderer = CustomRenderer()
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                DailyNetFundFlowOrm.trading_date.label("trading_date"),
-                func.sum(DailyNetFundFlowOrm.fundflow).label("amount"),
-            )
-            .where(DailyNetFundFlowOrm.branch_code == id)
-            .group_by(DailyNetFundFlowOrm.trading_date)
-        )
-
-        rows = session.execute(qs)
-        results = [
-            DailyNetFundFlow.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.PM])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_trade_vs_client_statistics(request: Request) -> Response:
-    """fetch basic branch summary"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
-    threshold_date = datetime.now() - timedelta(days=120)
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                TurnoverAndClientsTradeOrm.trading_date.label("trading_date"),
-                func.sum(TurnoverAndClientsTradeOrm.turnover).label("turnover"),
-                func.sum(TurnoverAndClientsTradeOrm.active_client).label(
-                    "active_clients"
-                ),
-            )
-            .where(TurnoverAndClientsTradeOrm.trading_date >= threshold_date)
-            .group_by(TurnoverAndClientsTradeOrm.trading_date)
-        )
-
-        qs = rolewise_branch_data_filter(qs, current_user, TurnoverAndClientsTradeOrm)
+TRADE_VS_CLIENT_STATISTICS = widget_registry.register(
+    WidgetDefinition(
+        name="get_trade_vs_client_statistics",
+        route="trade-vs-clients/",
+        source=TurnoverAndClientsTradeOrm,
+        columns=(
+            TurnoverAndClientsTradeOrm.trading_date.label("trading_date"),
+            func.sum(TurnoverAndClientsTradeOrm.turnover).label("turnover"),
+            func.sum(TurnoverAndClientsTradeOrm.active_client).label("active_clients"),
+        ),
+        group_by=(TurnoverAndClientsTradeOrm.trading_date,),
+        recent_days=120,
+        model=TradeVsClient,
+        tag=OpenApiTags.PM,
+        description="fetch the daily turnover against the trading clients",
+    )
+)
 
-        rows = session.execute(qs)
-        results = [
-            TradeVsClient.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-    return Response(results)
+ACCOUNTS_FUNDFLOW = widget_registry.register(
+    WidgetDefinition(
+        name="get_accounts_fundflow",
+        route="accounts-fundflow/",
+        source=AccountOpeningFundInOutFlowOrm,
+        columns=(
+            AccountOpeningFundInOutFlowOrm.branch_code,
+            AccountOpeningFundInOutFlowOrm.branch_name,
+            AccountOpeningFundInOutFlowOrm.col1,
+            AccountOpeningFundInOutFlowOrm.col2,
+            AccountOpeningFundInOutFlowOrm.col3,
+        ),
+        pivot=Pivot(index="col2", columns="col3", values="col1"),
+        tag=OpenApiTags.PM,
+        description="fetch account and fundflow overview",
+    )
+)
 
+PORTFOLIO_STATUS = widget_registry.register(
+    WidgetDefinition(
+        name="get_portfolio_status",
+        route="portfolio-status/",
+        source=PortfolioManagementStatusOrm,
+        columns=(
+            PortfolioManagementStatusOrm.perticular,
+            func.sum(PortfolioManagementStatusOrm.amount).label("amount"),
+        ),
+        group_by=(PortfolioManagementStatusOrm.perticular,),
+        order_by=(PortfolioManagementStatusOrm.perticular,),
+        model=PortfolioStatus,
+        tag=OpenApiTags.PM,
+        description="fetch portfolio management status overview",
+    )
+)
 
-@extend_schema(tags=[OpenApiTags.PM])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_trade_vs_client_statistics_by_branchid(request: Request, id: int) -> Response:
-    """fetch basic branch summary"""
-    request.accepted_renderer = CustomRenderer()
+get_daily_net_fundflow = DAILY_NET_FUNDFLOW.view
+get_daily_net_fundflow_by_branchid = DAILY_NET_FUNDFLOW.branch_view
+get_trade_vs_client_statistics = TRADE_VS_CLIENT_STATISTICS.view
+get_trade_vs_client_statistics_by_branchid = TRADE_VS_CLIENT_STATISTICS.branch_view
+get_accounts_fundflow = ACCOUNTS_FUNDFLOW.view
+get_accounts_fundflow_by_branchid = ACCOUNTS_FUNDFLOW.branch_view
+get_portfolio_status = PORTFOLIO_STATUS.view
+get_portfolio_status_by_branchid = PORTFOLIO_STATUS.branch_view
 
-    with Session(engine) as session:
-        qs = (
-            select(
-                TurnoverAndClientsTradeOrm.trading_date.label("trading_date"),
-                func.sum(TurnoverAndClientsTradeOrm.turnover).label("turnover"),
-                func.sum(TurnoverAndClientsTradeOrm.active_client).label(
-                    "active_clients"
-                ),
-            )
-            .where(TurnoverAndClientsTradeOrm.branch_code == id)
-            .group_by(TurnoverAndClientsTradeOrm.trading_date)
-        )
 
-        rows = session.execute(qs)
-        results = [
-            TradeVsClient.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-    return Response(results)
+TURNOVER_PIVOT = Pivot(index="col2", columns="col3", values="col1")
+ACHIEVED_TURNOVER = "3.Achieved Turnover (times of target)"
+SCOPE_TURNOVER_PIVOT = Pivot(
+    index="col2", columns="col3", values="col1", exclude=frozenset({ACHIEVED_TURNOVER})
+)
 
 
+# the summary over the scope replaces the achieved ratios of the branches by the
+# ratio of the sums, so both routes stay written out
 @extend_schema(tags=[OpenApiTags.PM])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_turnover_performance(request: Request, *args, **kwargs) -> Response:
     """fetch summary of turnover performance"""
     request.accepted_renderer = CustomRenderer()
     current_user: User = request.user
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(
             TurnoverPerformanceOrm.branch_code,
             TurnoverPerformanceOrm.branch_name,
@@ -169,26 +148,13 @@ def get_turnover_performance(request: Request, *args, **kwargs) -> Response:
         qs = rolewise_branch_data_filter(qs, current_user, TurnoverPerformanceOrm)
 
         rows = session.execute(qs)
-
-        df = pd.DataFrame([row._asdict() for row in rows], columns=rows.keys())
-        df["col2"] = df["col2"].str.strip()  # trim the col2, has space
-
-        df = df[df["col2"] != "3.Achieved Turnover (times of target)"]
-
-        pivot_df = df.pivot_table(
-            index="col2", columns="col3", values="col1", aggfunc="sum"
-        ).reset_index()  # aggregate the df
-
-        pivot_df.columns = map(str.lower, pivot_df.columns)
-
-        pivot_df.rename(columns={"col2": "name"}, inplace=True)
-        data = pivot_df.to_dict(orient="records")
+        data = SCOPE_TURNOVER_PIVOT.apply(rows)
 
         _target_sums = deepcopy(data[0])
         _generated_sums = deepcopy(data[-1])
         _target_sums.pop("name")
         _generated_sums.pop("name")
-        data.append({"name": "3.Achieved Turnover (times of target)"})
+        data.append({"name": ACHIEVED_TURNOVER})
         for key, val in _target_sums.items():
             data[-1][key] = f"{(_generated_sums.get(key) / val):.2f}"
     return Response(data)
@@ -197,11 +163,12 @@ def get_turnover_performance(request: Request, *args, **kwargs) -> Response:
 @extend_schema(tags=[OpenApiTags.PM])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_turnover_performance_by_branchid(request: Request, id: int) -> Response:
     """fetch summary of turnover performance"""
     request.accepted_renderer = CustomRenderer()
 
-    with Session(engine) as session:
+    with db_session() as session:
         query = select(
             TurnoverPerformanceOrm.branch_code,
             TurnoverPerformanceOrm.branch_name,
@@ -210,137 +177,5 @@ def get_turnover_performance_by_branchid(request: Request, id: int) -> Response:
             TurnoverPerformanceOrm.col3,
         ).where(TurnoverPerformanceOrm.branch_code == id)
         rows = session.execute(query)
-
-        df = pd.DataFrame([row._asdict() for row in rows], columns=rows.keys())
-        df["col2"] = df["col2"].str.strip()  # trim the col2, has space
-
-        pivot_df = df.pivot_table(
-            index="col2", columns="col3", values="col1", aggfunc="sum"
-        ).reset_index()  # aggregate the df
-
-        pivot_df.columns = map(str.lower, pivot_df.columns)
-
-        pivot_df.rename(
-            columns={
-                "col2": "name",
-            },
-            inplace=True,
-        )
-    return Response(pivot_df.to_dict(orient="records"))
-
-
-@extend_schema(tags=[OpenApiTags.PM])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_accounts_fundflow(request: Request) -> Response:
-    """fetch account and fundflow overview"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
-
-    with Session(engine) as session:
-        qs = select(
-            AccountOpeningFundInOutFlowOrm.branch_code,
-            AccountOpeningFundInOutFlowOrm.branch_name,
-            AccountOpeningFundInOutFlowOrm.col1,
-            AccountOpeningFundInOutFlowOrm.col2,
-            AccountOpeningFundInOutFlowOrm.col3,
-        )
-
-        qs = rolewise_branch_data_filter(
-            qs, current_user, AccountOpeningFundInOutFlowOrm
-        )
-
-        rows = session.execute(qs)
-
-        df = pd.DataFrame([row._asdict() for row in rows], columns=rows.keys())
-        df["col2"] = df["col2"].str.strip()  # trim the col2, has space
-
-        pivot_df = df.pivot_table(
-            index="col2", columns="col3", values="col1", aggfunc="sum"
-        ).reset_index()  # aggregate the df
-
-        pivot_df.columns = map(str.lower, pivot_df.columns)
-
-        pivot_df.rename(columns={"col2": "name"}, inplace=True)
-    return Response(pivot_df.to_dict(orient="records"))
-
-
-@extend_schema(tags=[OpenApiTags.PM])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_accounts_fundflow_by_branchid(request: Request, id: int) -> Response:
-    """fetch account and fundflow overview"""
-    request.accepted_renderer = CustomRenderer()
-
-    with Session(engine) as session:
-        query = select(
-            AccountOpeningFundInOutFlowOrm.branch_code,
-            AccountOpeningFundInOutFlowOrm.branch_name,
-            AccountOpeningFundInOutFlowOrm.col1,
-            AccountOpeningFundInOutFlowOrm.col2,
-            AccountOpeningFundInOutFlowOrm.col3,
-        ).where(AccountOpeningFundInOutFlowOrm.branch_code == id)
-        rows = session.execute(query)
-
-        df = pd.DataFrame([row._asdict() for row in rows], columns=rows.keys())
-        df["col2"] = df["col2"].str.strip()  # trim the col2, has space
-
-        pivot_df = df.pivot_table(
-            index="col2", columns="col3", values="col1", aggfunc="sum"
-        ).reset_index()  # aggregate the df
-
-        pivot_df.columns = map(str.lower, pivot_df.columns)
-
-        pivot_df.rename(columns={"col2": "name"}, inplace=True)
-    return Response(pivot_df.to_dict(orient="records"))
-
-
-@extend_schema(tags=[OpenApiTags.PM])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_portfolio_status(request: Request) -> Response:
-    """fetch portfolio management status overview"""
-    request.accepted_renderer = CustomRenderer()
-    current_user: User = request.user
-
-    with Session(engine) as session:
-        qs = (
-            select(
-                PortfolioManagementStatusOrm.perticular,
-                func.sum(PortfolioManagementStatusOrm.amount).label("amount"),
-            )
-            .group_by(PortfolioManagementStatusOrm.perticular)
-            .order_by(PortfolioManagementStatusOrm.perticular)
-        )
-
-        qs = rolewise_branch_data_filter(qs, current_user, PortfolioManagementStatusOrm)
-
-        rows = session.execute(qs)
-        results = [
-            PortfolioStatus.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-    return Response(results)
-
-
-@extend_schema(tags=[OpenApiTags.PM])
-@api_view([HTTPMethod.GET])
-@permission_classes([IsAuthenticated])
-def get_portfolio_status_by_branchid(request: Request, id: int) -> Response:
-    """fetch portfolio management status overview"""
-    request.accepted_renderer = CustomRenderer()
-
-    with Session(engine) as session:
-        query = (
-            select(
-                PortfolioManagementStatusOrm.perticular,
-                func.sum(PortfolioManagementStatusOrm.amount).label("amount"),
-            )
-            .where(PortfolioManagementStatusOrm.branch_code == id)
-            .group_by(PortfolioManagementStatusOrm.perticular)
-            .order_by(PortfolioManagementStatusOrm.perticular)
-        )
-        rows = session.execute(query)
-        results = [
-            PortfolioStatus.model_validate(row._asdict()).model_dump() for row in rows
-        ]
-    return Response(results)
+        data = TURNOVER_PIVOT.apply(rows)
+    return Response(data)
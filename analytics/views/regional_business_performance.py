@@ -12,14 +12,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import Sequence, func, select
-from sqlalchemy.orm import Session
 
 from analytics.views.utils import rolewise_branch_data_filter
 from authusers.models import User
 from core.metadata.openapi import OpenApiTags
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
 
+from ..cache import MAX_STALE, cache_response
 from ..models import (
      BranchWisearketStatistics,
      ExchangeWisearketStatistics,
@@ -48,6 +48,7 @@ from ..orm import (
     RegionalBusinessPerformanceORM,
     RegionalOfficeSpaceORM
 )
+from ..serialization import serialize_rows
 
 __all__ = [
     "get_exchange_wise_market_statistics",
@@ -85,6 +86,7 @@ def get_sum_of_property(property: str, rows: Sequence[Dict[str, Any]]) -> int:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_exchange_wise_market_statistics(request: Request) -> Response:
     """fetch exchange wise market statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -92,16 +94,18 @@ def get_exchange_wise_market_statistics(request: Request) -> Response:
 
     has_exchange = request.query_params.get("exchange", None)
     
-    with Session(engine) as session:
-      qs = select(ExchangeWisearketStatisticsORM).order_by(ExchangeWisearketStatisticsORM.exchange)
-
-    #qs = rolewise_branch_data_filter(qs, current_user, ExchangeWisearketStatisticsORM)
+    with db_session() as session:
+        # exchange level totals of the whole house, the table has no branch_code
+        # to scope by
+        qs = select(ExchangeWisearketStatisticsORM).order_by(
+            ExchangeWisearketStatisticsORM.exchange
+        )
 
-    if has_exchange:
+        if has_exchange:
             qs = qs.where(ExchangeWisearketStatisticsORM.exchange == has_exchange)
 
-    rows = session.execute(qs).scalars()
-    results = [ExchangeWisearketStatistics.model_validate(row).model_dump()for row in rows ]
+        rows = session.execute(qs).scalars()
+        results = serialize_rows(ExchangeWisearketStatistics, rows)
 
     response = {
         "detail": {
@@ -137,6 +141,7 @@ def get_exchange_wise_market_statistics(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_market_statistics(request: Request) -> Response:
     """fetch branch wise market statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -145,7 +150,7 @@ def get_branch_wise_market_statistics(request: Request) -> Response:
     has_region_name = request.query_params.get("region_name", None)
     has_branch_code = request.query_params.get("branch_code", None)
     
-    with Session(engine) as session:
+    with db_session() as session:
       qs = select(BranchWisearketStatisticsORM).order_by(BranchWisearketStatisticsORM.branch_code)
 
     qs = rolewise_branch_data_filter(qs, current_user, BranchWisearketStatisticsORM)
@@ -157,7 +162,7 @@ def get_branch_wise_market_statistics(request: Request) -> Response:
             qs = qs.where(BranchWisearketStatisticsORM.branch_code == has_branch_code)
 
     rows = session.execute(qs).scalars()
-    results = [BranchWisearketStatistics.model_validate(row).model_dump()for row in rows ]
+    results = serialize_rows(BranchWisearketStatistics, rows)
     
     response = {
         "detail": {
@@ -190,6 +195,7 @@ def get_branch_wise_market_statistics(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_regional_client_performance_nonperformance_list(request: Request) -> Response:
     """Fetch branch-wise regional client performance/non-performance summary"""
     
@@ -199,7 +205,7 @@ def get_branch_wise_regional_client_performance_nonperformance_list(request: Req
     has_region_name = request.query_params.get("region_name")
     has_branch_code = request.query_params.get("branch_code")
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(
             func.sum(RegionalClientPerformanceNonPerformanceORM.total_investor).label("total_investor"),
             func.sum(RegionalClientPerformanceNonPerformanceORM.texpress_investor).label("texpress_investor"),
@@ -249,6 +255,7 @@ def get_branch_wise_regional_client_performance_nonperformance_list(request: Req
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_regional_eCRM_details_list(request: Request) -> Response:
     """fetch branch wise regional eCRM details statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -257,7 +264,7 @@ def get_branch_wise_regional_eCRM_details_list(request: Request) -> Response:
     has_region_name = request.query_params.get("region_name", None)
     has_branch_code = request.query_params.get("branch_code", None)
     
-    with Session(engine) as session:
+    with db_session() as session:
       qs = select(
            func.sum(RegionalECRMDetailsORM.total_visits).label("total_visits"),
            func.sum(RegionalECRMDetailsORM.total_success).label("total_success"),
@@ -299,6 +306,7 @@ def get_branch_wise_regional_eCRM_details_list(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_regional_eKYC_details_list(request: Request) -> Response:
     """fetch branch wise regional eKYC details statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -307,7 +315,7 @@ def get_branch_wise_regional_eKYC_details_list(request: Request) -> Response:
     has_region_name = request.query_params.get("region_name", None)
     has_branch_code = request.query_params.get("branch_code", None)
     
-    with Session(engine) as session:
+    with db_session() as session:
       qs = select(
                    func.sum(RegionaleKYCDetailORM.total_investor).label("total_investor"),
                    func.sum(RegionaleKYCDetailORM.total_submitted).label("total_submitted"),
@@ -349,6 +357,7 @@ def get_branch_wise_regional_eKYC_details_list(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_regional_employee_structure_list(request: Request) -> Response:
     """fetch branch wise regional employee structure statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -357,7 +366,7 @@ def get_branch_wise_regional_employee_structure_list(request: Request) -> Respon
     has_region_name = request.query_params.get("region_name", None)
     has_branch_code = request.query_params.get("branch_code", None)
     
-    with Session(engine) as session:
+    with db_session() as session:
       qs = select(
                     func.sum(RegionalEmployeeStructureORM.permanent_trader).label("permanent_trader"),
                     func.sum(RegionalEmployeeStructureORM.contractual_with_salary).label("contractual_with_salary"),
@@ -399,6 +408,7 @@ def get_branch_wise_regional_employee_structure_list(request: Request) -> Respon
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_regional_channel_wise_trades_list(request: Request) -> Response:
     """fetch branch wise regional channel wise trades statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -407,7 +417,7 @@ def get_branch_wise_regional_channel_wise_trades_list(request: Request) -> Respo
     has_region_name = request.query_params.get("region_name", None)
     has_branch_code = request.query_params.get("branch_code", None)
     
-    with Session(engine) as session:
+    with db_session() as session:
       qs = select(RegionalChannelWiseTradesORM)
     qs = rolewise_branch_data_filter(qs, current_user, RegionalChannelWiseTradesORM)
    
@@ -417,7 +427,7 @@ def get_branch_wise_regional_channel_wise_trades_list(request: Request) -> Respo
             qs = qs.where(RegionalChannelWiseTradesORM.branch_code == has_branch_code)
 
     rows = session.execute(qs).scalars()
-    results = [RegionalChannelWiseTrades.model_validate(row).model_dump()for row in rows ]
+    results = serialize_rows(RegionalChannelWiseTrades, rows)
     
     return Response(results)
 
@@ -443,6 +453,7 @@ def get_branch_wise_regional_channel_wise_trades_list(request: Request) -> Respo
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_regional_party_wise_turnover_commission(request: Request) -> Response:
     """fetch branch wise regional party wise turnover commission statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -451,7 +462,7 @@ def get_branch_wise_regional_party_wise_turnover_commission(request: Request) ->
     has_region_name = request.query_params.get("region_name", None)
     has_branch_code = request.query_params.get("branch_code", None)
     
-    with Session(engine) as session:
+    with db_session() as session:
       qs = select(
              func.sum(RegionalPartyTurnoverCommissionORM.total_party).label("total_party"),
              func.sum(RegionalPartyTurnoverCommissionORM.total_investor).label("total_investor"),
@@ -493,6 +504,7 @@ def get_branch_wise_regional_party_wise_turnover_commission(request: Request) ->
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_regional_deposit_withdraw_details(request: Request) -> Response:
     """fetch branch wise regional deposit and withdrawal details statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -501,7 +513,7 @@ def get_branch_wise_regional_deposit_withdraw_details(request: Request) -> Respo
     has_region_name = request.query_params.get("region_name", None)
     has_branch_code = request.query_params.get("branch_code", None)
     
-    with Session(engine) as session:
+    with db_session() as session:
       qs = select(
            func.sum(RegionalCashMarginDetailsORM.total_deposit).label("total_deposit"),
            func.sum(RegionalCashMarginDetailsORM.total_withdrawal).label("total_withdrawal"),
@@ -543,6 +555,7 @@ def get_branch_wise_regional_deposit_withdraw_details(request: Request) -> Respo
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_regional_exposure_details(request: Request) -> Response:
     """fetch branch wise regional exposure details statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -551,7 +564,7 @@ def get_branch_wise_regional_exposure_details(request: Request) -> Response:
     has_region_name = request.query_params.get("region_name", None)
     has_branch_code = request.query_params.get("branch_code", None)
     
-    with Session(engine) as session:
+    with db_session() as session:
       qs = select(
            func.sum(RegionalExposureDetailsORM.ledger_bal).label("ledger_bal"),
            func.sum(RegionalExposureDetailsORM.green).label("green"),
@@ -592,6 +605,7 @@ def get_branch_wise_regional_exposure_details(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_regional_business_performance(request: Request) -> Response:
     """fetch branch wise regional business performance statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -600,7 +614,7 @@ def get_branch_wise_regional_business_performance(request: Request) -> Response:
     has_region_name = request.query_params.get("region_name", None)
     has_branch_code = request.query_params.get("branch_code", None)
     
-    with Session(engine) as session:
+    with db_session() as session:
       qs = select(RegionalBusinessPerformanceORM).order_by(RegionalBusinessPerformanceORM.branch_code)
     qs = rolewise_branch_data_filter(qs, current_user, RegionalBusinessPerformanceORM)
    
@@ -610,7 +624,7 @@ def get_branch_wise_regional_business_performance(request: Request) -> Response:
             qs = qs.where(RegionalBusinessPerformanceORM.branch_code == has_branch_code)
 
     rows = session.execute(qs).scalars()
-    results = [RegionalBusinessPerformance.model_validate(row).model_dump()for row in rows ]
+    results = serialize_rows(RegionalBusinessPerformance, rows)
     
     # response = {
     #     "detail": {
@@ -647,6 +661,7 @@ def get_branch_wise_regional_business_performance(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(stale_while_revalidate=MAX_STALE)
 def get_branch_wise_regional_office_space_details(request: Request) -> Response:
     """fetch branch wise regional office space details statistics"""
     request.accepted_renderer = CustomRenderer()
@@ -655,7 +670,7 @@ def get_branch_wise_regional_office_space_details(request: Request) -> Response:
     has_region_name = request.query_params.get("region_name", None)
     has_branch_code = request.query_params.get("branch_code", None)
     
-    with Session(engine) as session:
+    with db_session() as session:
       qs = select(RegionalOfficeSpaceORM).order_by(RegionalOfficeSpaceORM.branch_code)
     qs = rolewise_branch_data_filter(qs, current_user, RegionalOfficeSpaceORM)
    
@@ -665,6 +680,6 @@ def get_branch_wise_regional_office_space_details(request: Request) -> Response:
             qs = qs.where(RegionalOfficeSpaceORM.branch_code == has_branch_code)
 
     rows = session.execute(qs).scalars()
-    results = [RegionalOfficeSpace.model_validate(row).model_dump()for row in rows ]
+    results = serialize_rows(RegionalOfficeSpace, rows)
 
     return Response(results)
\ No newline at end of file
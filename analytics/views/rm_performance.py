@@ -8,15 +8,17 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import select
-from sqlalchemy.orm import Session
 
 from authusers.models import User
 from core.metadata.openapi import OpenApiTags
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
 
+from ..cache import cache_response
 from ..models import RMWiseClientDetail,InvestroLiveNetTradeRMWise,LiveInvestorTopSaleRMWise,LiveInvestorTopBuyRMWise,BranchWiseNonePerformClient,RMAuction,RMOffMarket
 from ..orm import RMWiseClientDetailOrm, RMWiseTurnoverPerformanceOrm,InvestroLiveNetTradeRMWiseOrm,LiveInvestorTopBuyRMWiseOrm,LiveInvestorTopSaleRMWiseOrm,BranchWiseNonePerformClientOrm,RMOffMarketOrm,RMAuctionOrm 
+from ..serialization import serialize_rows
+from ..streaming import STREAM_PARAMETER, stream_rows, wants_stream
 from .utils import rolewise_branch_data_filter
 
 __all__ = ["get_turnover_perfomance_rmwise", 
@@ -52,6 +54,7 @@ __all__ = ["get_turnover_perfomance_rmwise",
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_turnover_perfomance_rmwise(request: Request) -> Response:
     """fetch summary of turnover performance"""
     request.accepted_renderer = CustomRenderer()
@@ -60,7 +63,7 @@ def get_turnover_perfomance_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(
             RMWiseTurnoverPerformanceOrm.branch_code,
             RMWiseTurnoverPerformanceOrm.branch_name,
@@ -111,10 +114,12 @@ def get_turnover_perfomance_rmwise(request: Request) -> Response:
             required=True,
             description="Username of the RM",
         ),
+        STREAM_PARAMETER,
     ],
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_client_detail_rmwise(request: Request) -> Response:
     """fetch the turnover performance statistics rm wise"""
     request.accepted_renderer = CustomRenderer()
@@ -123,7 +128,7 @@ def get_client_detail_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(RMWiseClientDetailOrm).order_by(RMWiseClientDetailOrm.trader_id)
         qs = rolewise_branch_data_filter(qs, current_user, RMWiseClientDetailOrm)
 
@@ -135,9 +140,11 @@ def get_client_detail_rmwise(request: Request) -> Response:
             qs = qs.where(
                 RMWiseClientDetailOrm.trader_id == has_trader,
             )
+        if wants_stream(request):
+            return stream_rows(RMWiseClientDetail, qs, scalars=True)
         rows = session.execute(qs).scalars()
 
-        results = [RMWiseClientDetail.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(RMWiseClientDetail, rows)
 
     return Response(results)
 
@@ -163,6 +170,7 @@ def get_client_detail_rmwise(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_investor_live_net_trade_rm_wise(request: Request) -> Response:
     """fetch the investor live net trade rm wise"""
     request.accepted_renderer = CustomRenderer()
@@ -171,7 +179,7 @@ def get_investor_live_net_trade_rm_wise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(InvestroLiveNetTradeRMWiseOrm).order_by(InvestroLiveNetTradeRMWiseOrm.net.desc())
         qs = rolewise_branch_data_filter(qs, current_user, InvestroLiveNetTradeRMWiseOrm)
 
@@ -185,7 +193,7 @@ def get_investor_live_net_trade_rm_wise(request: Request) -> Response:
             )
         rows = session.execute(qs).scalars()
 
-        results = [InvestroLiveNetTradeRMWise.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(InvestroLiveNetTradeRMWise, rows)
 
     return Response(results)
 
@@ -210,6 +218,7 @@ def get_investor_live_net_trade_rm_wise(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_top_turnover_investor(request: Request) -> Response:
     """fetch the top turnover investor"""
     request.accepted_renderer = CustomRenderer()
@@ -218,7 +227,7 @@ def get_top_turnover_investor(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(InvestroLiveNetTradeRMWiseOrm).order_by(InvestroLiveNetTradeRMWiseOrm.turnover.desc()).limit(20)
         qs = rolewise_branch_data_filter(qs, current_user, InvestroLiveNetTradeRMWiseOrm)
 
@@ -232,7 +241,7 @@ def get_top_turnover_investor(request: Request) -> Response:
             )
         rows = session.execute(qs).scalars()
 
-        results = [InvestroLiveNetTradeRMWise.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(InvestroLiveNetTradeRMWise, rows)
 
     return Response(results)
 
@@ -259,13 +268,14 @@ def get_top_turnover_investor(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.BUSINESS_TRADE_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_live_investor_top_sale_rm_wise(request: Request) -> Response:
     """fetch live investor top sale rm wise"""
     request.accepted_renderer = CustomRenderer()
     current_user: User = request.user
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(LiveInvestorTopSaleRMWiseOrm).order_by(LiveInvestorTopSaleRMWiseOrm.turnover.desc())
         qs = rolewise_branch_data_filter(qs, current_user, LiveInvestorTopSaleRMWiseOrm)
         if has_branch:
@@ -278,7 +288,7 @@ def get_live_investor_top_sale_rm_wise(request: Request) -> Response:
             )
         qs = qs.limit(20)
         rows = session.execute(qs).scalars()
-        results = [LiveInvestorTopSaleRMWise.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(LiveInvestorTopSaleRMWise, rows)
     return Response(results)
 
 
@@ -304,13 +314,14 @@ def get_live_investor_top_sale_rm_wise(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.BUSINESS_TRADE_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_live_investor_top_buy_rm_wise(request: Request) -> Response:
     """fetch live investor top buy rm wise"""
     request.accepted_renderer = CustomRenderer()
     current_user: User = request.user
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(LiveInvestorTopBuyRMWiseOrm).order_by(LiveInvestorTopBuyRMWiseOrm.turnover.desc())
         qs = rolewise_branch_data_filter(qs, current_user, LiveInvestorTopBuyRMWiseOrm)
         if has_branch:
@@ -323,7 +334,7 @@ def get_live_investor_top_buy_rm_wise(request: Request) -> Response:
             )
         qs = qs.limit(20)
         rows = session.execute(qs).scalars()
-        results = [LiveInvestorTopBuyRMWise.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(LiveInvestorTopBuyRMWise, rows)
     return Response(results)
 
 
@@ -349,13 +360,14 @@ def get_live_investor_top_buy_rm_wise(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.BUSINESS_TRADE_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_branch_wise_none_performing_client(request: Request) -> Response:
     """fetch live investor top buy rm wise"""
     request.accepted_renderer = CustomRenderer()
     current_user: User = request.user
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(BranchWiseNonePerformClientOrm).order_by(BranchWiseNonePerformClientOrm.available_balance.desc())
         qs = rolewise_branch_data_filter(qs, current_user, BranchWiseNonePerformClientOrm)
         if has_branch:
@@ -367,7 +379,7 @@ def get_branch_wise_none_performing_client(request: Request) -> Response:
                 BranchWiseNonePerformClientOrm.rm_name == has_trader,
             )
         rows = session.execute(qs).scalars()
-        results = [BranchWiseNonePerformClient.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(BranchWiseNonePerformClient, rows)
     return Response(results)
 
 
@@ -401,6 +413,7 @@ def get_branch_wise_none_performing_client(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.BUSINESS_TRADE_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_rm_wise_off_market(request: Request) -> Response:
     """fetch rm wise off market details"""
     request.accepted_renderer = CustomRenderer()
@@ -408,7 +421,7 @@ def get_rm_wise_off_market(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
     has_year = request.query_params.get("year", None)
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(RMOffMarketOrm).order_by(RMOffMarketOrm.off_market_income.desc()).order_by(RMOffMarketOrm.year)
         qs = rolewise_branch_data_filter(qs, current_user, RMOffMarketOrm)
         if has_branch:
@@ -424,7 +437,7 @@ def get_rm_wise_off_market(request: Request) -> Response:
                 RMOffMarketOrm.year == has_year,
             )
         rows = session.execute(qs).scalars()
-        results = [RMOffMarket.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(RMOffMarket, rows)
     return Response(results)
 
 
@@ -457,6 +470,7 @@ def get_rm_wise_off_market(request: Request) -> Response:
 @extend_schema(tags=[OpenApiTags.BUSINESS_TRADE_MANAGEMENT])
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_rm_wise_auction_market(request: Request) -> Response:
     """fetch rm wise auction market details"""
     request.accepted_renderer = CustomRenderer()
@@ -464,7 +478,7 @@ def get_rm_wise_auction_market(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
     has_year = request.query_params.get("year", None)
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(RMAuctionOrm).order_by(RMAuctionOrm.auction_income.desc()).order_by(RMAuctionOrm.year)
         qs = rolewise_branch_data_filter(qs, current_user, RMAuctionOrm)
         if has_branch:
@@ -480,7 +494,7 @@ def get_rm_wise_auction_market(request: Request) -> Response:
                 RMAuctionOrm.year == has_year,
             )
         rows = session.execute(qs).scalars()
-        results = [RMAuction.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(RMAuction, rows)
     return Response(results)
 
 
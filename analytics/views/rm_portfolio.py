@@ -10,13 +10,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import func, select
-from sqlalchemy.orm import Session
 
 from authusers.models import User
 from core.metadata.openapi import OpenApiTags
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
 
+from ..cache import cache_response
 from ..models import DailyNetFundFlow, MarkedInvestor, PortfolioMangement,RmPerformanceSummary
 from ..orm import (
     RMWiseDailyNetFundFlowORM,
@@ -26,6 +26,7 @@ from ..orm import (
     RMWiseYellowZoneTraderORM,
     RmPerformanceSummaryORM
 )
+from ..serialization import serialize_rows
 from .utils import rolewise_branch_data_filter
 
 __all__ = [
@@ -87,6 +88,7 @@ def get_marked_investors(
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_fund_collection_rmwise(request: Request) -> Response:
     """fetch summary of turnover performance"""
     request.accepted_renderer = CustomRenderer()
@@ -95,7 +97,7 @@ def get_fund_collection_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(
             RMWiseFundCollectionOrm.col1,
             RMWiseFundCollectionOrm.col2,
@@ -148,6 +150,7 @@ def get_fund_collection_rmwise(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_portfolio_management_rmwise(request: Request) -> Response:
     """fetch summary of portfolio management status"""
     request.accepted_renderer = CustomRenderer()
@@ -156,7 +159,7 @@ def get_portfolio_management_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(
             RMWisePortfolioMangementORM.particular_type.label("particular"),
             RMWisePortfolioMangementORM.amount,
@@ -174,10 +177,7 @@ def get_portfolio_management_rmwise(request: Request) -> Response:
             )
         rows = session.execute(qs)
 
-        results = [
-            PortfolioMangement.model_validate(row._asdict()).model_dump()
-            for row in rows
-        ]
+        results = serialize_rows(PortfolioMangement, rows)
     return Response(results)
 
 
@@ -202,6 +202,7 @@ def get_portfolio_management_rmwise(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_daily_net_fund_flow_rmwise(request: Request) -> Response:
     """fetch summary of portfolio management status"""
     request.accepted_renderer = CustomRenderer()
@@ -210,7 +211,7 @@ def get_daily_net_fund_flow_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(
             RMWiseDailyNetFundFlowORM.trading_date.label("trading_date"),
             func.sum(RMWiseDailyNetFundFlowORM.fundflow).label("amount"),
@@ -227,9 +228,7 @@ def get_daily_net_fund_flow_rmwise(request: Request) -> Response:
                 RMWiseDailyNetFundFlowORM.trader_id == has_trader,
             )
         rows = session.execute(qs)
-        results = [
-            DailyNetFundFlow.model_validate(row._asdict()).model_dump() for row in rows
-        ]
+        results = serialize_rows(DailyNetFundFlow, rows)
     return Response(results)
 
 
@@ -268,6 +267,7 @@ class MarkedInvestorEnum(StrEnum):
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_zone_marked_clients_rmwise(request: Request) -> Response:
     """fetch all RM list with net trades"""
     request.accepted_renderer = CustomRenderer()
@@ -276,7 +276,7 @@ def get_zone_marked_clients_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         match has_category:
             case MarkedInvestorEnum.RED:
                 qs = get_marked_investors(
@@ -290,9 +290,7 @@ def get_zone_marked_clients_rmwise(request: Request) -> Response:
                 raise ValueError("Invalid Type")
 
         rows = session.execute(qs)
-        results = [
-            MarkedInvestor.model_validate(row._asdict()).model_dump() for row in rows
-        ]
+        results = serialize_rows(MarkedInvestor, rows)
     return Response(results)
 
 
@@ -317,6 +315,7 @@ def get_zone_marked_clients_rmwise(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_rmwise_performance_summary(request: Request) -> Response:
     """fetch summary of RM performance status"""
     request.accepted_renderer = CustomRenderer()
@@ -325,7 +324,7 @@ def get_rmwise_performance_summary(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = select(RmPerformanceSummaryORM).order_by(RmPerformanceSummaryORM.branch_name)
 
         qs = rolewise_branch_data_filter(qs, current_user, RmPerformanceSummaryORM)
@@ -340,6 +339,6 @@ def get_rmwise_performance_summary(request: Request) -> Response:
             )
         rows = session.execute(qs).scalars().all()
 
-        results = [RmPerformanceSummary.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(RmPerformanceSummary, rows)
 
     return Response(results)
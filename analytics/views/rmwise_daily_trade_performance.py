@@ -7,14 +7,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from sqlalchemy import desc, func, select, text, case
-from sqlalchemy.orm import Session
 
 
 from authusers.models import User
 from core.metadata.openapi import OpenApiTags
 from core.renderer import CustomRenderer
-from db import engine
+from db import db_session
+from db.routing import primary_only
 
+from ..cache import REALTIME_TTL, cache_response
 from ..models import DailyTurnoverPerformance, SectorExposure,EcrmRetailsRMwise,RMwiseDailyTradeData,AdminRealtimeTopRmTurnover
 from ..orm import (
     RMWiseDailyTurnoverPerformanceOrm,
@@ -28,6 +29,7 @@ from ..orm import (
     AdminRealtimeTopRmTurnoverOrm,
     BranchOrm
 )
+from ..serialization import serialize_rows
 from .utils import parse_summary, rolewise_branch_data_filter
 
 __all__ = [
@@ -101,6 +103,7 @@ METRICS_OF_SUMMARY_QUERY = {
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_basic_summaries_rmwise(request: Request) -> Response:
     """fetch basic branch summary rmwise data"""
     request.accepted_renderer = CustomRenderer()
@@ -109,7 +112,7 @@ def get_basic_summaries_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = SUMMARY_QUERY_STR
         qs = rolewise_branch_data_filter(qs, current_user, RMWiseOverallSummaryOrm)
 
@@ -159,6 +162,7 @@ def get_basic_summaries_rmwise(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_turnover_performance_statistics_rmwise(request: Request) -> Response:
     """fetch the turnover performance statistics rm wise"""
     request.accepted_renderer = CustomRenderer()
@@ -167,7 +171,7 @@ def get_turnover_performance_statistics_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = (
             select(
                 RMWiseDailyTurnoverPerformanceOrm.trading_date.label("trading_date"),
@@ -193,9 +197,7 @@ def get_turnover_performance_statistics_rmwise(request: Request) -> Response:
             )
         rows = session.execute(qs)
 
-        results = [
-            DailyTurnoverPerformance.model_validate(row).model_dump() for row in rows
-        ]
+        results = serialize_rows(DailyTurnoverPerformance, rows)
 
     return Response(results)
 
@@ -221,6 +223,7 @@ def get_turnover_performance_statistics_rmwise(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_cashcode_sector_exposure_rmwise(request: Request) -> Response:
     """fetch the margin loan statistics for all"""
     request.accepted_renderer = CustomRenderer()
@@ -229,7 +232,7 @@ def get_cashcode_sector_exposure_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = (
             select(
                 RMWiseSectorExposureCashCodeOrm.sector_name.label("name"),
@@ -253,7 +256,7 @@ def get_cashcode_sector_exposure_rmwise(request: Request) -> Response:
             )
         rows = session.execute(qs)
 
-        results = [SectorExposure.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(SectorExposure, rows)
 
     return Response(results)
 
@@ -279,6 +282,7 @@ def get_cashcode_sector_exposure_rmwise(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_margincode_sector_exposure_rmwise(request: Request) -> Response:
     """fetch the margin loan statistics for all"""
     request.accepted_renderer = CustomRenderer()
@@ -287,7 +291,7 @@ def get_margincode_sector_exposure_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = (
             select(
                 RMWiseSectorExposureMarginCodeOrm.sector_name.label("name"),
@@ -311,7 +315,7 @@ def get_margincode_sector_exposure_rmwise(request: Request) -> Response:
             )
         rows = session.execute(qs)
 
-        results = [SectorExposure.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(SectorExposure, rows)
 
     return Response(results)
 
@@ -336,6 +340,7 @@ def get_margincode_sector_exposure_rmwise(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_ecrm_details_rmwise(request: Request) -> Response:
     """fetch the turnover performance statistics rm wise"""
     request.accepted_renderer = CustomRenderer()
@@ -344,7 +349,7 @@ def get_ecrm_details_rmwise(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = (
             select(
                 func.sum(RMWiseEcrmDetailsOrm.total_Visits).label("total_Visits"),
@@ -397,6 +402,7 @@ def get_ecrm_details_rmwise(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response()
 def get_rmwise_daily_trade_date(request: Request) -> Response:
     """fetch the turnover performance statistics rm wise"""
     request.accepted_renderer = CustomRenderer()
@@ -405,7 +411,7 @@ def get_rmwise_daily_trade_date(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = (
             select(RMWiseDailyTradeDataOrm).order_by(RMWiseDailyTradeDataOrm.total_turnover_today.desc())
         )
@@ -423,7 +429,7 @@ def get_rmwise_daily_trade_date(request: Request) -> Response:
             )
         rows = session.execute(qs).scalars().all()
 
-        results = [RMwiseDailyTradeData.model_validate(row).model_dump() for row in rows]
+        results = serialize_rows(RMwiseDailyTradeData, rows)
 
     return Response(results)
 
@@ -449,6 +455,8 @@ def get_rmwise_daily_trade_date(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_rm_live_turnover_sectorwise_date(request: Request) -> Response:
     """fetch the rm live turnover sector wise"""
     request.accepted_renderer = CustomRenderer()
@@ -457,7 +465,7 @@ def get_rm_live_turnover_sectorwise_date(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         # base aggregates
         aggregates = [
             func.sum(RMWiseLiveSectorDataOrm.turnOver).label("turnOver"),
@@ -529,6 +537,8 @@ def get_rm_live_turnover_sectorwise_date(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_brach_wise_rm_oms_realtime_summary(request: Request) -> Response:
     """fetch the brach wise rm oms realtime summary"""
     request.accepted_renderer = CustomRenderer()
@@ -537,7 +547,7 @@ def get_brach_wise_rm_oms_realtime_summary(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         # base aggregates
         aggregates = [
             func.sum(BranchWiseRMOmsRealtimeSummaryOrm.total_client).label("total_client"),
@@ -619,6 +629,8 @@ def get_brach_wise_rm_oms_realtime_summary(request: Request) -> Response:
 )
 @api_view([HTTPMethod.GET])
 @permission_classes([IsAuthenticated])
+@cache_response(ttl=REALTIME_TTL)
+@primary_only
 def get_admin_realtime_top_rm_turnover(request: Request) -> Response:
     """fetch the realtime top rm turnover"""
     request.accepted_renderer = CustomRenderer()
@@ -627,7 +639,7 @@ def get_admin_realtime_top_rm_turnover(request: Request) -> Response:
     has_branch = request.query_params.get("branch", None)
     has_trader = request.query_params.get("trader", None)
 
-    with Session(engine) as session:
+    with db_session() as session:
         qs = (
             select(AdminRealtimeTopRmTurnoverOrm,BranchOrm.branch_name)
             .join(BranchOrm,AdminRealtimeTopRmTurnoverOrm.branch_code==BranchOrm.branch_code,isouter=True)
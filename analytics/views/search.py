@@ -0,0 +1,70 @@
+from http import HTTPMethod
+
+from django.conf import settings
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.helper import enveloper
+from core.metadata.openapi import OpenApiTags
+from core.permissions import IsManagementUser
+from core.renderer import CustomRenderer
+
+from ..search import SEARCH_SOURCES, get_search_index
+from ..serializers import SearchSuggestionSerializer
+
+__all__ = ["get_search_suggestions"]
+
+
+@extend_schema(
+    tags=[OpenApiTags.LOV],
+    parameters=[
+        OpenApiParameter(
+            "kind",
+            OpenApiTypes.STR,
+            OpenApiParameter.PATH,
+            description="lookup to search",
+            enum=list(SEARCH_SOURCES),
+        ),
+        OpenApiParameter(
+            "q",
+            OpenApiTypes.STR,
+            OpenApiParameter.QUERY,
+            required=True,
+            description="part of the key (company name, investor code, trader id) "
+            "or of the name, case insensitive",
+        ),
+        OpenApiParameter(
+            "limit",
+            OpenApiTypes.INT,
+            OpenApiParameter.QUERY,
+            required=False,
+            description="suggestions returned, 10 by default",
+        ),
+    ],
+    responses={200: enveloper(SearchSuggestionSerializer, many=True)},
+)
+@api_view([HTTPMethod.GET])
+@permission_classes([IsAuthenticated, IsManagementUser])
+def get_search_suggestions(request: Request, kind: str) -> Response:
+    """typeahead of the company, investor and trader filters, from an in memory index"""
+    request.accepted_renderer = CustomRenderer()
+
+    if kind not in SEARCH_SOURCES:
+        return Response(
+            {"detail": f"unknown lookup {kind}"}, status=status.HTTP_404_NOT_FOUND
+        )
+    try:
+        limit = int(request.query_params.get("limit", 10))
+    except ValueError:
+        return Response(
+            {"detail": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    limit = max(1, min(limit, settings.DASHBOARD_SEARCH["MAX_LIMIT"]))
+
+    term = request.query_params.get("q", "")
+    return Response(get_search_index(kind).search(term, limit))
@@ -1,14 +1,13 @@
 from typing import Any, Dict, Type,List
 import csv
-from sqlalchemy import Select, select
-from sqlalchemy.orm import Session
+from sqlalchemy import Select
 from django.http import HttpResponse
 from authusers.models import User
-from db import BaseOrm, engine
+from db import BaseOrm
 import requests
 from bs4 import BeautifulSoup
 
-from ..orm import ClusterManagerOrm
+from ..scope import get_data_scope
 
 BASE_URL = "https://lankabd.com"
 TIMEOUT = 10
@@ -45,20 +44,8 @@ def rolewise_branch_data_filter(
     user: User,
     orm_class: Type[BaseOrm],
 ):
-    qs = queryset
-
-    with Session(engine) as session:
-        if user.is_cluster_manager():
-            branches_qs = select(ClusterManagerOrm.branch_code).where(
-                ClusterManagerOrm.manager_name == user.username
-            )
-            branch_codes = [result[0] for result in session.execute(branches_qs)]
-            qs = queryset.where(orm_class.branch_code.in_(branch_codes))
-        if user.is_branch_manager():
-            qs = queryset.where(orm_class.branch_code == user.profile.branch_id)
-
-    return qs
-
+    """restrict the queryset to the branches of the user, see `analytics.scope.DataScope`"""
+    return get_data_scope(user).apply(queryset, orm_class)
 
 
 def generate_csv(data: List[dict], headers: List[str], filename: str) -> HttpResponse:
@@ -0,0 +1,278 @@
+import hashlib
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest
+from django.test import RequestFactory
+from sqlalchemy import select
+
+from authusers.models import RoleChoices, User, UserProfile
+from db import db_session
+
+from .cache import _endpoint_tables, cached_views, response_cache, revalidating
+from .freshness import get_freshness_registry
+from .orm import BranchOrm
+from .scope import DataScope, ScopeKind
+from .widgets import Widget, get_widgets
+
+logging = getLogger("analytics.warming")
+
+__all__ = [
+    "WarmTarget",
+    "WarmReport",
+    "warm_scopes",
+    "warm_targets",
+    "warm_origin",
+    "warm_dashboards",
+    "warm_on_load",
+]
+
+
+@dataclass
+class WarmTarget:
+    """One dashboard request to precompute: a widget, its arguments and a user of a scope."""
+
+    widget: Widget
+    user: User
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    params: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class EndpointTiming:
+    requests: int = 0
+    failures: int = 0
+    seconds: float = 0.0
+    slowest: float = 0.0
+    # X-Cache of the responses: MISS (computed), HIT (already warm), ...
+    outcomes: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+class WarmReport:
+    def __init__(self, scopes: int = 0):
+        self.scopes = scopes
+        self.seconds = 0.0
+        self.endpoints: Dict[str, EndpointTiming] = defaultdict(EndpointTiming)
+
+    def add(self, endpoint: str, seconds: float, outcome: str) -> None:
+        timing = self.endpoints[endpoint]
+        timing.requests += 1
+        timing.seconds += seconds
+        timing.slowest = max(timing.slowest, seconds)
+        timing.outcomes[outcome] += 1
+        if outcome == "FAILED":
+            timing.failures += 1
+
+    @property
+    def requests(self) -> int:
+        return sum(timing.requests for timing in self.endpoints.values())
+
+    @property
+    def failures(self) -> int:
+        return sum(timing.failures for timing in self.endpoints.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "scopes": self.scopes,
+            "requests": self.requests,
+            "failures": self.failures,
+            "seconds": round(self.seconds, 3),
+            "endpoints": {
+                endpoint: {
+                    "requests": timing.requests,
+                    "failures": timing.failures,
+                    "seconds": round(timing.seconds, 3),
+                    "slowest": round(timing.slowest, 3),
+                    "outcomes": dict(timing.outcomes),
+                }
+                for endpoint, timing in sorted(self.endpoints.items())
+            },
+        }
+
+
+def _branch_manager(branch_code: int) -> User:
+    """Unsaved branch manager standing in for every user of the branch scope."""
+    user = User(
+        id=-branch_code,
+        username=f"warm-branch-{branch_code}",
+        role=RoleChoices.BRANCH_MANAGER,
+    )
+    user.profile = UserProfile(branch_id=branch_code)
+    return user
+
+
+def warm_scopes() -> Dict[str, User]:
+    """
+    One user per distinct data scope (see `DataScope.cache_key`): the active users
+    (admin, management, regional and cluster managers, ...) and a branch manager
+    of every branch of `BI_trd_Branch_Info`.
+    """
+    users: Dict[str, User] = {}
+    for user in User.objects.filter(is_active=True).select_related("profile"):
+        users.setdefault(DataScope.for_user(user).cache_key, user)
+
+    with db_session() as session:
+        branch_codes = session.execute(
+            select(BranchOrm.branch_code).order_by(BranchOrm.branch_code)
+        ).scalars()
+        for branch_code in branch_codes:
+            user = _branch_manager(branch_code)
+            users.setdefault(DataScope.for_user(user).cache_key, user)
+    return users
+
+
+def warm_targets(
+    users: Dict[str, User], endpoints: Optional[Iterable[str]] = None
+) -> List[WarmTarget]:
+    """
+    Every cached dashboard of `analytics.urls` for every scope, with no query
+    parameters and with the sets of `DASHBOARD_WARM["PARAMS"]`. Branch specific
+    routes (`<int:id>`) are warmed for the branch scopes, with their own branch.
+
+    Realtime boards (an explicit `ttl`) expire within seconds and are left out,
+    unless listed in `endpoints`, so are the boards a scope is not permitted.
+    """
+    wanted = set(endpoints) if endpoints is not None else None
+    params = settings.DASHBOARD_WARM["PARAMS"]
+    targets: List[WarmTarget] = []
+    for name, widget in get_widgets().items():
+        cached = cached_views.get(name)
+        if cached is None:
+            continue
+        if wanted is not None and name not in wanted:
+            continue
+        if wanted is None and cached.cache_ttl is not None:
+            continue
+
+        for user in users.values():
+            if not widget.permits(user):
+                continue
+            if widget.arguments:
+                scope = DataScope.for_user(user)
+                if scope.kind != ScopeKind.BRANCH:
+                    continue
+                kwargs = dict.fromkeys(widget.arguments, scope.branch_id)
+            else:
+                kwargs = {}
+            for param_set in [{}, *params.get(name, [])]:
+                targets.append(WarmTarget(widget, user, kwargs, dict(param_set)))
+    return targets
+
+
+def warm_origin() -> Optional[HttpRequest]:
+    """A request to `DASHBOARD_WARM["ORIGIN"]`, the host and scheme of the warm calls."""
+    origin = settings.DASHBOARD_WARM["ORIGIN"]
+    if not origin:
+        return None
+    url = urlsplit(origin)
+    return RequestFactory(HTTP_HOST=url.netloc).get("/", secure=url.scheme == "https")
+
+
+def _warm(
+    target: WarmTarget, force: bool, origin: Optional[HttpRequest] = None
+) -> Tuple[float, str]:
+    started = time.perf_counter()
+    try:
+        with revalidating() if force else nullcontext():
+            response = target.widget.call(
+                target.user, target.params, target.kwargs, origin
+            )
+        outcome = (
+            response.get("X-Cache", "UNCACHED")
+            if response.status_code == 200
+            else "FAILED"
+        )
+    except Exception as exc:
+        path = target.widget.path(target.kwargs)
+        logging.warning(f"could not warm {path} for {target.user}: {exc}")
+        outcome = "FAILED"
+    finally:
+        connections.close_all()
+    return time.perf_counter() - started, outcome
+
+
+def warm_dashboards(
+    endpoints: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> WarmReport:
+    """
+    Request every dashboard of every data scope with at most `workers` requests at
+    a time, storing the responses in the dashboards cache. Responses already cached
+    are left alone unless `force`.
+    """
+    started = time.perf_counter()
+    # the cache keys carry the data versions, know them before the first request
+    get_freshness_registry().poll()
+
+    users = warm_scopes()
+    targets = warm_targets(users, endpoints)
+    origin = warm_origin()
+    report = WarmReport(scopes=len(users))
+    with ThreadPoolExecutor(
+        workers or settings.DASHBOARD_WARM["WORKERS"],
+        thread_name_prefix="dashboard-warm",
+    ) as executor:
+        results = executor.map(lambda target: _warm(target, force, origin), targets)
+        for target, (seconds, outcome) in zip(targets, results, strict=True):
+            report.add(target.widget.name, seconds, outcome)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+_loaded_tables: Set[str] = set()
+_loaded_lock = threading.Lock()
+_loaded_timer: Optional[threading.Timer] = None
+
+
+def warm_on_load(tables: Set[str]) -> None:
+    """
+    Freshness listener (`DASHBOARD_WARM["ON_LOAD"]`): warm the boards reading the
+    loaded tables once no new load was noticed for `ON_LOAD_DELAY` seconds, as the
+    ETL fills its tables one after the other.
+    """
+    global _loaded_timer
+    with _loaded_lock:
+        _loaded_tables.update(tables)
+        if _loaded_timer is not None:
+            _loaded_timer.cancel()
+        _loaded_timer = threading.Timer(
+            settings.DASHBOARD_WARM["ON_LOAD_DELAY"], _warm_loaded
+        )
+        _loaded_timer.daemon = True
+        _loaded_timer.start()
+
+
+def _warm_loaded() -> None:
+    with _loaded_lock:
+        tables = set(_loaded_tables)
+        _loaded_tables.clear()
+
+    registry = get_freshness_registry()
+    cache = response_cache()
+    # every worker notices the load, the first one to claim it warms
+    digest = hashlib.sha256(registry.version_of(tables).encode()).hexdigest()
+    if not cache.add(f"dashboards:warm:{digest}", os.getpid(), 24 * 60 * 60):
+        return
+
+    endpoints = []
+    for endpoint, view in cached_views.items():
+        read = _endpoint_tables(cache, endpoint)
+        if view.cache_ttl is None and (read is None or read & tables):
+            endpoints.append(endpoint)
+    report = warm_dashboards(endpoints)
+    logging.info(
+        f"warmed {len(endpoints)} board(s) after a load of {', '.join(sorted(tables))}: "
+        f"{report.requests} request(s), {report.failures} failure(s) "
+        f"in {report.seconds:.1f}s"
+    )
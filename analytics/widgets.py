@@ -0,0 +1,217 @@
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from logging import getLogger
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory
+from django.urls import URLResolver, get_resolver
+from rest_framework.request import Request
+from rest_framework.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+)
+from rest_framework.test import force_authenticate
+
+from authusers.models import User
+from db.session import request_session_scope
+
+logging = getLogger("analytics.widgets")
+
+__all__ = ["Widget", "WidgetCall", "get_widgets", "run_widgets"]
+
+_CONVERTER = re.compile(r"<(?:\w+:)?(\w+)>")
+
+# copied from the calling request to build absolute URLs the same way
+_SERVER_META = ("HTTP_HOST", "SERVER_NAME", "SERVER_PORT", "wsgi.url_scheme")
+
+
+@dataclass(frozen=True)
+class Widget:
+    """A dashboard GET view of `analytics.urls`, callable outside of its own request."""
+
+    name: str
+    view: Callable
+    route: str
+    prefix: str
+    # path arguments, e.g. the branch of the `<int:id>` routes
+    arguments: Tuple[str, ...]
+
+    def path(self, kwargs: Optional[Dict[str, Any]] = None) -> str:
+        kwargs = kwargs or {}
+        return self.prefix + _CONVERTER.sub(
+            lambda match: str(kwargs[match.group(1)]), self.route
+        )
+
+    def permits(self, user: User) -> bool:
+        """Whether the permission classes of the view let `user` call it."""
+        view_class = self.view.cls
+        request = Request(RequestFactory().get(self.prefix))
+        request.user = user
+        view = view_class()
+        return all(
+            permission().has_permission(request, view)
+            for permission in view_class.permission_classes
+        )
+
+    def call(
+        self,
+        user: User,
+        params: Optional[Dict[str, str]] = None,
+        kwargs: Optional[Dict[str, Any]] = None,
+        origin: Optional[HttpRequest] = None,
+    ) -> HttpResponse:
+        """
+        Run the view for `user`, already authenticated, with its own database
+        session, and return the rendered response (stored by `cache_response`).
+        The host and scheme are those of `origin`, the first allowed host otherwise.
+        """
+        kwargs = kwargs or {}
+        if origin is not None:
+            server = {
+                key: origin.META[key] for key in _SERVER_META if key in origin.META
+            }
+        else:
+            server = {"SERVER_NAME": settings.ALLOWED_HOSTS[0]}
+        request = RequestFactory(**server).get(
+            self.path(kwargs),
+            params or {},
+            secure=server.get("wsgi.url_scheme") == "https",
+        )
+        force_authenticate(request, user=user)
+        with request_session_scope() as scope:
+            try:
+                response = self.view(request, **kwargs)
+                if hasattr(response, "render"):
+                    response.render()
+                if response.streaming:
+                    # the rows are read as the body is consumed, while the session lives
+                    content = b"".join(response.streaming_content)
+                    response.close()
+                    response = HttpResponse(
+                        content, status=response.status_code, headers=response.headers
+                    )
+            finally:
+                scope.close()
+        return response
+
+
+@lru_cache(maxsize=1)
+def get_widgets() -> Dict[str, Widget]:
+    """Every GET view of `analytics.urls`, by view name."""
+    from . import urls
+
+    for resolver in get_resolver().url_patterns:
+        if isinstance(resolver, URLResolver) and resolver.urlconf_module is urls:
+            break
+    else:
+        raise LookupError("analytics.urls is not included in the root urlconf")
+
+    widgets: Dict[str, Widget] = {}
+    for pattern in resolver.url_patterns:
+        view = pattern.callback
+        view_class = getattr(view, "cls", None)
+        if view_class is None or not hasattr(view_class, "get"):
+            continue
+        widgets[view_class.__name__] = Widget(
+            name=view_class.__name__,
+            view=view,
+            route=str(pattern.pattern),
+            prefix=f"/{resolver.pattern}",
+            arguments=tuple(pattern.pattern.converters),
+        )
+    return widgets
+
+
+@dataclass
+class WidgetCall:
+    """One widget of a batch and, once run, its outcome."""
+
+    name: str
+    params: Dict[str, str]
+    kwargs: Dict[str, Any]
+    status: str = "error"
+    code: int = HTTP_500_INTERNAL_SERVER_ERROR
+    data: Any = None
+    message: Optional[str] = None
+    cache: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "code": self.code,
+            "data": self.data,
+            "message": self.message,
+            "cache": self.cache,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+        }
+
+
+def _run(call: WidgetCall, user: User, origin: Optional[HttpRequest]) -> WidgetCall:
+    widget = get_widgets().get(call.name)
+    if widget is None:
+        call.code, call.message = HTTP_404_NOT_FOUND, "unknown widget"
+        return call
+    missing = [argument for argument in widget.arguments if argument not in call.kwargs]
+    if missing:
+        call.code = HTTP_400_BAD_REQUEST
+        call.message = f"missing argument(s): {', '.join(missing)}"
+        return call
+
+    started = time.perf_counter()
+    try:
+        response = widget.call(user, call.params, call.kwargs, origin)
+        if not response.get("Content-Type", "").startswith("application/json"):
+            call.code = HTTP_400_BAD_REQUEST
+            call.message = "the widget does not return JSON"
+        else:
+            # the envelope of `core.renderer.CustomRenderer`, or a bare `detail`
+            # when the request was refused before the view ran (auth, permissions)
+            envelope = json.loads(response.content)
+            call.status = envelope.get("status") or "error"
+            call.code = envelope.get("code", response.status_code)
+            call.data = envelope.get("data")
+            call.message = envelope.get("message") or envelope.get("detail")
+            call.cache = response.get("X-Cache")
+    except Exception as exc:
+        logging.exception(exc)
+        call.message = (
+            "an unexpected error happened. Please check log for more details."
+        )
+    finally:
+        call.elapsed_ms = (time.perf_counter() - started) * 1000
+        # the pool threads never see a request end
+        connections.close_all()
+    return call
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def run_widgets(
+    user: User, calls: List[WidgetCall], origin: Optional[HttpRequest] = None
+) -> List[WidgetCall]:
+    """
+    Run the widgets concurrently on the process wide `DASHBOARD_BATCH["WORKERS"]`
+    threads, each with its own connection.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    settings.DASHBOARD_BATCH["WORKERS"],
+                    thread_name_prefix="dashboard-batch",
+                )
+    return list(_executor.map(lambda call: _run(call, user, origin), calls))
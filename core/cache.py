@@ -0,0 +1,43 @@
+import os
+from contextlib import suppress
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+__all__ = ["LRUFileBasedCache"]
+
+
+class LRUFileBasedCache(FileBasedCache):
+    """
+    `FileBasedCache` shared by every worker of the host, evicting the least recently
+    used entries once `MAX_ENTRIES` is reached instead of a random sample.
+
+    Every hit bumps the modification time of the entry file (the expiry is stored
+    inside the file, so the timestamp is free to track recency).
+    """
+
+    _missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version)
+        if value is self._missing:
+            return default
+        with suppress(FileNotFoundError):
+            os.utime(self._key_to_file(key, version))
+        return value
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+
+        def last_used(fname):
+            with suppress(FileNotFoundError):
+                return os.path.getmtime(fname)
+            return 0.0
+
+        filelist.sort(key=last_used)
+        for fname in filelist[: int(num_entries / self._cull_frequency)]:
+            self._delete(fname)
@@ -21,6 +21,8 @@ class OpenApiTags:
     PORTAL_LIVE_DATA = "portal-live-data"
     FINANCIAL_INFORMATION = "financial-information"
     REGIONAL_BUSINESS_PERFORMANCE = "regional-business-performance"
+    DASHBOARDS = "dashboards"
+    SYSTEM = "system"
 
 
 openapi_description = r"""
@@ -0,0 +1,187 @@
+from logging import getLogger
+from typing import Optional
+
+from django.conf import settings
+from django.db import OperationalError as DjangoOperationalError
+from django.db import connection
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from rest_framework import status
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from sqlalchemy.exc import OperationalError, TimeoutError
+
+from analytics.scope import get_data_scope
+from authusers.models import User
+from db.circuit import CircuitOpenError
+from db.session import request_session_scope
+
+from .resilience import LastKnownGoodStore, request_key
+
+logging = getLogger("core.middleware")
+
+__all__ = [
+    "LastKnownGoodMiddleware",
+    "RequestSessionMiddleware",
+    "DATABASE_UNAVAILABLE_ERRORS",
+]
+
+# raised when none of the database targets can serve the request in time
+DATABASE_UNAVAILABLE_ERRORS = (
+    ConnectionError,  # includes `CircuitOpenError`
+    OperationalError,
+    TimeoutError,
+    DjangoOperationalError,
+)
+
+
+class LastKnownGoodMiddleware:
+    """
+    Serve the last successful payload of a dashboard when the databases are down.
+
+    Successful `GET` responses under `LAST_KNOWN_GOOD["PATH_PREFIXES"]` are recorded
+    per path, query parameters and user scope. When a view fails because no database
+    is reachable (or the circuit breaker is open) the recorded body is returned with
+    `X-Data-Stale: true` and an `Age` header, otherwise a `503` envelope.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = settings.LAST_KNOWN_GOOD
+        self.store = LastKnownGoodStore(
+            max_entries=self.config["MAX_ENTRIES"],
+            max_bytes=self.config["MAX_BYTES"],
+        )
+        self.jwt_authentication = JWTAuthentication()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        response = self.get_response(request)
+        if (
+            self._is_eligible(request)
+            and response.status_code == status.HTTP_200_OK
+            and not response.streaming
+            and not response.has_header("X-Data-Stale")
+        ):
+            self._record(request, response)
+        return response
+
+    def process_exception(
+        self, request: HttpRequest, exception: Exception
+    ) -> Optional[HttpResponse]:
+        if not isinstance(exception, DATABASE_UNAVAILABLE_ERRORS):
+            return None
+        if not self._is_eligible(request):
+            return None
+
+        scope = self._scope_from_token(request)
+        entry = (
+            self.store.get(request_key(request, scope), self.config["MAX_AGE"])
+            if scope is not None
+            else None
+        )
+        if entry is None:
+            logging.error(f"database unavailable, no stale copy of {request.path}")
+            return self._unavailable(exception)
+
+        logging.warning(
+            f"database unavailable, serving a {entry.age}s old copy of {request.path}"
+        )
+        response = HttpResponse(entry.content, content_type=entry.content_type)
+        response["X-Data-Stale"] = "true"
+        response["Age"] = str(entry.age)
+        response["Warning"] = '110 - "Response is Stale"'
+        return response
+
+    def _is_eligible(self, request: HttpRequest) -> bool:
+        return request.method == "GET" and request.path.startswith(
+            tuple(self.config["PATH_PREFIXES"])
+        )
+
+    def _record(self, request: HttpRequest, response: HttpResponse) -> None:
+        # set by DRF once the view authenticated the request, a lazy
+        # `SimpleLazyObject` otherwise, which must not be evaluated here
+        user = request.__dict__.get("user")
+        if not isinstance(user, User):
+            return
+        # the key of the response cache, users sharing it see the same payloads
+        scope = get_data_scope(user).cache_key
+        self.store.remember_scope(str(user.pk), scope)
+        self.store.put(
+            request_key(request, scope), response.content, response["Content-Type"]
+        )
+
+    def _scope_from_token(self, request: HttpRequest) -> Optional[str]:
+        """Resolve the scope from the access token alone, without the user table."""
+        header = self.jwt_authentication.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.jwt_authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        try:
+            token = self.jwt_authentication.get_validated_token(raw_token)
+        except (InvalidToken, TokenError):
+            return None
+        return self.store.scope_of(str(token.get(jwt_settings.USER_ID_CLAIM)))
+
+    def _unavailable(self, exception: Exception) -> JsonResponse:
+        retry_after = (
+            exception.retry_after
+            if isinstance(exception, CircuitOpenError)
+            else self.config["RETRY_AFTER"]
+        )
+        response = JsonResponse(
+            {
+                "status": "error",
+                "code": status.HTTP_503_SERVICE_UNAVAILABLE,
+                "data": None,
+                "message": "database is unavailable, please try again later.",
+            },
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        response["Retry-After"] = str(max(int(retry_after), 1))
+        return response
+
+
+class RequestSessionMiddleware:
+    """
+    Provide one lazily opened, read-only SQLAlchemy session per request.
+
+    Views and helpers get it through `db.db_session()`, so a request checks out at
+    most one connection for its analytics queries. The session is closed once the
+    response is built, or when a streaming response is closed by the server. The
+    pool checkouts and statements (SQLAlchemy and Django) of the request are logged
+    and, with `DB_SESSION_STATS_HEADERS`, returned as `X-DB-*` headers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.stats_headers = settings.DB_SESSION_STATS_HEADERS
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        with request_session_scope() as scope:
+            with connection.execute_wrapper(self._count_django_statement(scope)):
+                response = self.get_response(request)
+
+        if response.streaming:
+            # the body is produced after this returns, keep the session until then
+            response._resource_closers.append(scope.close)
+        else:
+            scope.close()
+
+        logging.debug(
+            f"{request.method} {request.path}: {scope.checkouts} checkout(s), "
+            f"{scope.statements} statement(s)"
+        )
+        if self.stats_headers:
+            response["X-DB-Checkouts"] = str(scope.checkouts)
+            response["X-DB-Statements"] = str(scope.statements)
+        return response
+
+    @staticmethod
+    def _count_django_statement(scope):
+        def wrapper(execute, sql, params, many, context):
+            scope.statements += 1
+            return execute(sql, params, many, context)
+
+        return wrapper
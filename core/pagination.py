@@ -1,10 +1,75 @@
-from typing import TYPE_CHECKING
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from dataclasses import dataclass
+from functools import cached_property
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence
 
 if TYPE_CHECKING:
     from rest_framework.request import Request
 
+from django.core.paginator import InvalidPage, Page, Paginator
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from sqlalchemy import ColumnElement, Select, Table, and_, func, or_, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+logging = getLogger("core.pagination")
+
+TRUTHY = ("1", "true", "yes")
+ESTIMATED = "estimated"
+
+CURSOR_PARAMETERS = [
+    OpenApiParameter(
+        "cursor",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        required=False,
+        description="keyset pagination: blank for the first page, then the "
+        "cursor of the next/previous links. Replaces page",
+    ),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        required=False,
+        description="total of the list: with cursor only counted on true; "
+        "estimated reads the table statistics of an unfiltered list instead",
+    ),
+]
+
+# rows of a table (heap or clustered index) from the statistics of its partitions,
+# as of the last load: no scan, but not transactionally exact
+ESTIMATED_COUNT = text(
+    """
+    SELECT SUM(row_count)
+    FROM sys.dm_db_partition_stats
+    WHERE object_id = OBJECT_ID(:table) AND index_id IN (0, 1)
+    """
+)
+
+
+def unfiltered_table(query: Select) -> Optional[Table]:
+    """The table `query` returns every row of, if it reads a single one unfiltered."""
+    if (
+        query.whereclause is not None
+        or query._group_by_clauses
+        or query._having_criteria
+        or query._distinct
+        or query._limit_clause is not None
+        or query._offset_clause is not None
+    ):
+        return None
+    froms = query.get_final_froms()
+    if len(froms) == 1 and isinstance(froms[0], Table):
+        return froms[0]
+    return None
 
 
 class StandardResultSetPagination(pagination.PageNumberPagination):
@@ -29,3 +94,271 @@ class StandardResultSetPagination(pagination.PageNumberPagination):
                 "results": data,
             }
         )
+
+
+class SQLAlchemyPaginator(Paginator):
+    """
+    Django's `Paginator` over a SQLAlchemy select: the total is a `COUNT(*)` of the
+    query and a page is fetched with `OFFSET/FETCH`, never the whole result.
+
+    `scalars` for a query of ORM entities, e.g. `select(SomeOrm)`. With `estimate`,
+    the total of an unfiltered query is read from the table statistics of SQL
+    Server instead (`estimated` tells which one it is).
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        query: Select,
+        per_page: int,
+        scalars: bool = False,
+        estimate: bool = False,
+        **kwargs,
+    ):
+        super().__init__(query, per_page, **kwargs)
+        self.session = session
+        self.scalars = scalars
+        self.estimate = estimate
+        self.estimated = False
+
+    @property
+    def count_query(self) -> Select:
+        # SQL Server refuses an ORDER BY in a derived table, it changes no count
+        query = self.object_list.order_by(None)
+        return select(func.count()).select_from(query.subquery())
+
+    @cached_property
+    def count(self) -> int:
+        if self.estimate:
+            count = self.estimated_count()
+            if count is not None:
+                self.estimated = True
+                return count
+        return self.exact_count()
+
+    def exact_count(self) -> int:
+        return self.session.execute(self.count_query).scalar_one()
+
+    def estimated_count(self) -> Optional[int]:
+        table = unfiltered_table(self.object_list)
+        dialect = self.session.get_bind().dialect
+        if table is None or dialect.name != "mssql":
+            return None
+        name = dialect.identifier_preparer.format_table(table)
+        try:
+            count = self.session.execute(ESTIMATED_COUNT, {"table": name}).scalar()
+        except SQLAlchemyError as exc:
+            # needs the VIEW DATABASE STATE permission
+            logging.warning(f"could not estimate the rows of {name}: {exc}")
+            return None
+        return int(count) if count is not None else None
+
+    def page(self, number) -> Page:
+        number = self.validate_number(number)
+        offset = (number - 1) * self.per_page
+        result = self.session.execute(
+            self.object_list.offset(offset).limit(self.per_page)
+        )
+        rows = result.scalars().all() if self.scalars else result.all()
+        return self._get_page(rows, number, self)
+
+
+@dataclass
+class KeysetPage:
+    rows: List
+    # the sort keys of the rows before and after the page, None at either end
+    previous_position: Optional[List[Any]]
+    next_position: Optional[List[Any]]
+    count: Optional[int]
+    estimated: Optional[bool]
+
+
+def keyset_filter(
+    keyset: Sequence[ColumnElement], position: Sequence[Any], reverse: bool = False
+) -> ColumnElement[bool]:
+    """
+    The rows sorted after `position` on `keyset` (before it with `reverse`), spelled
+    out column by column since SQL Server has no row value comparison.
+    """
+    column, *rest = keyset
+    value, *others = position
+    beyond = column < value if reverse else column > value
+    if not rest:
+        return beyond
+    return or_(beyond, and_(column == value, keyset_filter(rest, others, reverse)))
+
+
+class SQLAlchemyPagination(StandardResultSetPagination):
+    """
+    `StandardResultSetPagination` of a SQLAlchemy select, paginated in the database
+    by `SQLAlchemyPaginator`.
+
+    Given a `keyset`, a `cursor` query parameter (blank for the first page) pages
+    by keyset instead: the rows after the sort key of the last row sent, as fast
+    on the last page as on the first, with the total only counted on `count=true`.
+
+    `count=estimated` takes the total of an unfiltered list from the table
+    statistics, `count_estimated` of the response tells whether it was. The total
+    stays under `count`, the key of the lists paginated by DRF before.
+    """
+
+    django_paginator_class = SQLAlchemyPaginator
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    keyset_page: Optional[KeysetPage] = None
+
+    def uses_cursor(self, request: "Request") -> bool:
+        return self.cursor_query_param in request.query_params
+
+    def paginate_query(
+        self,
+        session: Session,
+        query: Select,
+        request: "Request",
+        scalars: bool = False,
+        keyset: Optional[Sequence[ColumnElement]] = None,
+    ) -> Optional[List]:
+        """
+        A page of `query`. `keyset` are the columns of a unique, non null sort key
+        of the rows, each read back from a row by its `.key`, e.g. ORM attributes
+        or the labeled columns of the select; they replace the ordering of `query`.
+        """
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.page_size = page_size
+        self.request = request
+        if keyset and self.uses_cursor(request):
+            self.keyset_page = self.paginate_keyset(
+                session, query, request, scalars, keyset
+            )
+            return self.keyset_page.rows
+
+        paginator = self.django_paginator_class(
+            session, query, page_size, scalars, self.wants_estimate(request)
+        )
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg) from exc
+
+        if paginator.num_pages > 1 and self.template is not None:
+            # The browsable API should display pagination controls.
+            self.display_page_controls = True
+
+        return list(self.page)
+
+    def paginate_keyset(
+        self,
+        session: Session,
+        query: Select,
+        request: "Request",
+        scalars: bool,
+        keyset: Sequence[ColumnElement],
+    ) -> KeysetPage:
+        position, reverse = self.decode_cursor(request, len(keyset))
+
+        page_query = query.order_by(None)
+        if reverse:
+            page_query = page_query.order_by(*(column.desc() for column in keyset))
+        else:
+            page_query = page_query.order_by(*keyset)
+        if position is not None:
+            page_query = page_query.where(keyset_filter(keyset, position, reverse))
+
+        # one more row tells whether there is a page beyond this one
+        result = session.execute(page_query.limit(self.page_size + 1))
+        rows = result.scalars().all() if scalars else result.all()
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        def key(row) -> List[Any]:
+            return [getattr(row, column.key) for column in keyset]
+
+        # coming from a cursor, there is a page back the way we came
+        if reverse:
+            has_previous, has_next = has_more, position is not None
+        else:
+            has_previous, has_next = position is not None, has_more
+        count = estimated = None
+        if self.wants_count(request):
+            paginator = self.django_paginator_class(
+                session, query, self.page_size, estimate=self.wants_estimate(request)
+            )
+            count, estimated = paginator.count, paginator.estimated
+        return KeysetPage(
+            rows=rows,
+            previous_position=key(rows[0]) if rows and has_previous else None,
+            next_position=key(rows[-1]) if rows and has_next else None,
+            count=count,
+            estimated=estimated,
+        )
+
+    def wants_count(self, request: "Request") -> bool:
+        value = request.query_params.get(self.count_query_param, "").lower()
+        return value in TRUTHY or value == ESTIMATED
+
+    def wants_estimate(self, request: "Request") -> bool:
+        value = request.query_params.get(self.count_query_param, "").lower()
+        return value == ESTIMATED
+
+    def decode_cursor(self, request: "Request", size: int):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position, reverse = cursor["p"], bool(cursor.get("r"))
+        except (TypeError, ValueError, KeyError, binascii.Error) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+        if not isinstance(position, list) or len(position) != size:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position: List[Any], reverse: bool = False) -> str:
+        cursor = {"p": position, "r": 1} if reverse else {"p": position}
+        encoded = urlsafe_b64encode(json.dumps(cursor, default=str).encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_paginated_response(self, data):
+        if self.keyset_page is None:
+            return Response(
+                {
+                    "page_size": self.page_size,
+                    "count": self.page.paginator.count,
+                    "count_estimated": self.page.paginator.estimated,
+                    "total_pages": self.page.paginator.num_pages,
+                    "current_page": self.page.number,
+                    "next": self.get_next_link(),
+                    "previous": self.get_previous_link(),
+                    "results": data,
+                }
+            )
+
+        page = self.keyset_page
+        next_link = previous_link = None
+        if page.next_position is not None:
+            next_link = self.encode_cursor(page.next_position)
+        if page.previous_position is not None:
+            previous_link = self.encode_cursor(page.previous_position, reverse=True)
+        return Response(
+            {
+                "page_size": self.page_size,
+                "count": page.count,
+                "count_estimated": page.estimated,
+                "next": next_link,
+                "previous": previous_link,
+                "results": data,
+            }
+        )
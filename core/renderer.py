@@ -1,12 +1,106 @@
+import math
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
 from logging import getLogger
+from typing import Iterable, Iterator, List
 
-from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from djangorestframework_camel_case.settings import api_settings as camel_settings
+from djangorestframework_camel_case.util import camelize as camelize_with_options
+from djangorestframework_camel_case.util import camelize_re, underscore_to_camel
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder of `JSONRenderer` then
+    orjson = None
 
 logging = getLogger("core.renderer")
 
+_encoder = JSONEncoder()
+
+# values rendered as they are, neither walked nor camelized (floats are checked
+# for NaN and infinities first)
+_LEAVES = frozenset({str, int, bool, type(None), Decimal, datetime, date, time})
+
+
+@lru_cache(maxsize=4096)
+def camelize_key(key: str) -> str:
+    """`snake_case` to `camelCase`, as `djangorestframework_camel_case` does"""
+    if "_" not in key:
+        return key
+    return camelize_re.sub(underscore_to_camel, key)
+
+
+def _camelize_key(key):
+    if isinstance(key, str):
+        return camelize_key(key)
+    if isinstance(key, Promise):
+        return camelize_key(force_str(key))
+    return key
+
+
+def _finite(value: float):
+    """NaN and infinities, e.g. the missing cells of a pivot, are rendered `null`"""
+    return value if math.isfinite(value) else None
+
+
+def finite(data):
+    """`data` with its NaN and infinite floats replaced by `None`."""
+    if isinstance(data, float):
+        return _finite(data)
+    if isinstance(data, dict):
+        return {key: finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [finite(item) for item in data]
+    return data
+
+
+def camelize(data):
+    """
+    `djangorestframework_camel_case.util.camelize` with the key conversions cached
+    and the scalars of the rows left alone instead of being walked one by one. As
+    `finite`, NaN and infinite floats become `None`.
+    """
+    if type(data) in _LEAVES:
+        return data
+    if type(data) is float:
+        return _finite(data)
+    if isinstance(data, dict):
+        return {
+            _camelize_key(key): value if type(value) in _LEAVES else camelize(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, Promise):
+        return force_str(data)
+    if isinstance(data, str):
+        return data
+    try:
+        items = iter(data)
+    except TypeError:
+        return data
+    return [camelize(item) for item in items]
+
+
+class CustomRenderer(JSONRenderer):
+    """
+    The `status`/`code`/`data`/`message` envelope of every dashboard response, with
+    camelCase keys. Encoded with orjson when it is installed (the `speedups` extra),
+    the output being the same as the stdlib encoder of `JSONRenderer` (used for
+    `indent` and anything orjson refuses, e.g. integers beyond 64 bits). NaN and
+    infinities are rendered `null` by both.
+    """
+
+    json_underscoreize = camel_settings.JSON_UNDERSCOREIZE
+    # the cached conversion knows nothing of the fields and keys to leave alone
+    plain_camelize = not (
+        json_underscoreize.get("ignore_fields") or json_underscoreize.get("ignore_keys")
+    )
 
-class CustomRenderer(CamelCaseJSONRenderer):
     def render(self, data, accepted_media_type=None, renderer_context=None):
         try:
             status_code = renderer_context["response"].status_code
@@ -44,10 +138,14 @@ class CustomRenderer(CamelCaseJSONRenderer):
                         response["message"] = data["detail"]
                     else:
                         response["message"] = data
-            return super().render(response, accepted_media_type, renderer_context)
+            return self.encode(response, accepted_media_type, renderer_context)
         except Exception as err:
             logging.exception(err)
-            return super().render(
+            response = (renderer_context or {}).get("response")
+            if response is not None:
+                # the envelope says 500, so does the response: never cached as a success
+                response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+            return self.encode(
                 {
                     "status": code_to_msg.get(status.HTTP_500_INTERNAL_SERVER_ERROR),
                     "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -55,3 +153,51 @@ class CustomRenderer(CamelCaseJSONRenderer):
                     "message": "an unexpected error happened. Please check log for more details.",
                 }
             )
+
+    def encode(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if self.plain_camelize:
+            data = camelize(data)
+        else:
+            data = camelize_with_options(finite(data), **self.json_underscoreize)
+
+        if orjson is not None and not self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            try:
+                ret = orjson.dumps(
+                    data,
+                    default=_encoder.default,
+                    option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+                )
+            except orjson.JSONEncodeError:
+                pass
+            else:
+                # strict javascript subset, as `JSONRenderer`
+                if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+                    ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+                    ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+                return ret
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def stream(self, chunks: Iterable[List]) -> Iterator[bytes]:
+        """
+        The envelope of a successful response around the items of `chunks`, encoded
+        one chunk at a time. Joined, the same bytes as rendering the whole list.
+        """
+        envelope = self.encode(
+            {
+                "status": "success",
+                "code": status.HTTP_200_OK,
+                "data": [],
+                "message": None,
+            }
+        )
+        head, tail = envelope.split(b"[]", 1)
+        yield head + b"["
+        separator = b""
+        for chunk in chunks:
+            if not chunk:
+                continue
+            yield separator + self.encode(chunk)[1:-1]
+            separator = b","
+        yield b"]" + tail
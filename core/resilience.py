@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+from django.http import HttpRequest
+
+__all__ = ["StoredResponse", "LastKnownGoodStore", "request_key"]
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    content: bytes
+    content_type: str
+    stored_at: float
+
+    @property
+    def age(self) -> int:
+        return int(time.time() - self.stored_at)
+
+
+def request_key(request: HttpRequest, scope: str) -> str:
+    params = urlencode(sorted(request.GET.lists()), doseq=True)
+    return f"{request.path}?{params}|{scope}"
+
+
+class LastKnownGoodStore:
+    """
+    Bounded, in-process LRU of the last successful dashboard responses.
+
+    Bounded by the number of entries and by the total size of the stored bodies,
+    the least recently used entries are evicted first. Also remembers the scope of
+    the recently seen users, so a stale payload can be picked while the database
+    (and thus the user table) is unreachable.
+    """
+
+    def __init__(self, max_entries: int = 500, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, StoredResponse] = OrderedDict()
+        self._scopes: OrderedDict[Any, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key: str, content: bytes, content_type: str) -> None:
+        if len(content) > self.max_bytes:
+            return
+        entry = StoredResponse(content, content_type, time.time())
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.content)
+            self._entries[key] = entry
+            self.size += len(content)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.content)
+
+    def get(self, key: str, max_age: Optional[int] = None) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (max_age is not None and entry.age > max_age):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def remember_scope(self, user_id: Any, scope: str) -> None:
+        with self._lock:
+            self._scopes[user_id] = scope
+            self._scopes.move_to_end(user_id)
+            while len(self._scopes) > self.max_entries:
+                self._scopes.popitem(last=False)
+
+    def scope_of(self, user_id: Any) -> Optional[str]:
+        with self._lock:
+            return self._scopes.get(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -1,9 +1,8 @@
 from datetime import timedelta
 from pathlib import Path
 from typing import Optional
-import pyodbc
 
-from decouple import config
+from decouple import Csv, config
 
 from core.metadata.openapi import METADATA_CONFIGS
 
@@ -85,6 +84,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.LastKnownGoodMiddleware",
+    "core.middleware.RequestSessionMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -108,44 +109,22 @@ TEMPLATES = [
 WSGI_APPLICATION = "core.wsgi.application"
 
 
-def test_conn(db):
-    try:
-        conn = pyodbc.connect(
-            f"DRIVER=ODBC Driver 17 for SQL Server;"
-            f"SERVER={db['HOST']},{db['PORT']};"
-            f"DATABASE={db['NAME']};"
-            f"UID={db['USER']};PWD={db['PASSWORD']};"
-            "TrustServerCertificate=yes;",
-            timeout=3
-        )
-        conn.close()
-        return True
-    except Exception:
-        return False
-
-PRIMARY = {
-    "ENGINE": "mssql",
-    "NAME": config("DB_NAME"),
-    "USER": config("DB_USERNAME"),
-    "PASSWORD": config("DB_PASS"),
-    "HOST": config("DB_HOST"),
-    "PORT": config("DB_PORT", cast=int, default=1433),
-    "OPTIONS": {"driver": "ODBC Driver 17 for SQL Server"},
-}
-
-BACKUP = {
-    "ENGINE": "mssql",
-    "NAME": config("DB_BACKUP_NAME"),
-    "USER": config("DB_BACKUP_USERNAME"),
-    "PASSWORD":  config("DB_BACKUP_PASS"),
-    "HOST": config("DB_BACKUP_HOST"),
-    "PORT": config("DB_BACKUP_PORT", cast=int),
-    "OPTIONS": {"driver": "ODBC Driver 17 for SQL Server"},
-}
-
-# Use PRIMARY if alive, otherwise BACKUP
+# The target (PRIMARY or BACKUP) is resolved lazily by `db.backends.mssql` when the
+# first connection is opened. The backend shares the failover decision and the
+# connection pool of the SQLAlchemy analytics engine (see `db.get_runtime_engine`).
 DATABASES = {
-    "default": PRIMARY if test_conn(PRIMARY) else BACKUP
+    "default": {
+        "ENGINE": "db.backends.mssql",
+        "NAME": config("DB_NAME"),
+        "USER": config("DB_USERNAME"),
+        "PASSWORD": config("DB_PASS"),
+        "HOST": config("DB_HOST"),
+        "PORT": config("DB_PORT", cast=int, default=1433),
+        "OPTIONS": {"driver": "ODBC Driver 17 for SQL Server"},
+        # connections are borrowed from the shared SQLAlchemy pool, give them back
+        # at the end of every request instead of pinning one per thread
+        "CONN_MAX_AGE": 0,
+    }
 }
 
 ACTIVE_DB = DATABASES['default']
@@ -211,6 +190,159 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.AllowAny",),
 }
 
+# Last successful dashboard responses, served (flagged stale) while no database
+# can be reached. Kept per worker process, bounded by entries and total bytes.
+LAST_KNOWN_GOOD = {
+    "PATH_PREFIXES": ("/api/v1/dashboards/",),
+    "MAX_ENTRIES": config("LKG_MAX_ENTRIES", cast=int, default=500),
+    "MAX_BYTES": config("LKG_MAX_BYTES", cast=int, default=64 * 1024 * 1024),
+    "MAX_AGE": config("LKG_MAX_AGE", cast=int, default=24 * 60 * 60),
+    "RETRY_AFTER": 15,
+}
+
+# expose the pool checkouts and statements of every request as X-DB-* headers
+DB_SESSION_STATS_HEADERS = config("DB_SESSION_STATS_HEADERS", cast=bool, default=DEBUG)
+
+
+# Rendered dashboard responses, shared by every user with the same data scope
+# (see `analytics.cache`). DASHBOARD_CACHE_BACKEND is one of
+#   "locmem": per worker process, LRU bounded by DASHBOARD_CACHE_MAX_ENTRIES
+#   "file":   shared by the workers of a host, LRU bounded by the same setting
+#   "redis":  shared by every host (needs the `redis` package), bound the memory
+#             with `maxmemory` and `maxmemory-policy allkeys-lru` on the server
+# DASHBOARD_CACHE_TTLS overrides the TTL of single views: "view_name=seconds,..."
+# DASHBOARD_CACHE_MAX_STALE the stale-while-revalidate window of single views (same
+# format, 0 turns it off): an expired or outdated response is served for at most
+# that many seconds while a background thread refreshes it
+DASHBOARD_CACHE_MAX_ENTRIES = config(
+    "DASHBOARD_CACHE_MAX_ENTRIES", cast=int, default=2000
+)
+DASHBOARD_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "dashboards",
+        "OPTIONS": {"MAX_ENTRIES": DASHBOARD_CACHE_MAX_ENTRIES},
+    },
+    "file": {
+        "BACKEND": "core.cache.LRUFileBasedCache",
+        "LOCATION": config(
+            "DASHBOARD_CACHE_LOCATION", default=str(BASE_DIR / "cache" / "dashboards")
+        ),
+        "OPTIONS": {"MAX_ENTRIES": DASHBOARD_CACHE_MAX_ENTRIES},
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config(
+            "DASHBOARD_CACHE_LOCATION", default="redis://127.0.0.1:6379/1"
+        ),
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "dashboards": {
+        **DASHBOARD_CACHE_BACKENDS[config("DASHBOARD_CACHE_BACKEND", default="locmem")],
+        "KEY_PREFIX": "bi",
+    },
+}
+
+DASHBOARD_CACHE = {
+    "ALIAS": "dashboards",
+    "ENABLED": config("DASHBOARD_CACHE_ENABLED", cast=bool, default=True),
+    "DEFAULT_TTL": config("DASHBOARD_CACHE_TTL", cast=int, default=300),
+    # endpoints reading only ETL stamped tables are invalidated by the data
+    # versions of `FRESHNESS`, they are kept until the next load (at most this long)
+    "VERSIONED_TTL": config("DASHBOARD_CACHE_VERSIONED_TTL", cast=int, default=86400),
+    "TTLS": {
+        name: int(ttl)
+        for name, ttl in (
+            item.split("=")
+            for item in config("DASHBOARD_CACHE_TTLS", cast=Csv(), default="")
+        )
+    },
+    "MAX_STALE": {
+        name: int(seconds)
+        for name, seconds in (
+            item.split("=")
+            for item in config("DASHBOARD_CACHE_MAX_STALE", cast=Csv(), default="")
+        )
+    },
+    # how long the tables read by an endpoint are shared with the other workers
+    "TABLES_TTL": config("DASHBOARD_CACHE_TABLES_TTL", cast=int, default=3600),
+    # threads refreshing stale responses, per worker process
+    "REFRESH_WORKERS": config("DASHBOARD_CACHE_REFRESH_WORKERS", cast=int, default=4),
+}
+
+# concurrent identical dashboard requests wait for the first one instead of running
+# the same query again (see `analytics.coalesce`); `CROSS_WORKER` extends it to the
+# other workers through a lock in the dashboards cache (file or redis backend)
+DASHBOARD_COALESCE = {
+    "ENABLED": config("DASHBOARD_COALESCE_ENABLED", cast=bool, default=True),
+    "CROSS_WORKER": config("DASHBOARD_COALESCE_CROSS_WORKER", cast=bool, default=False),
+    # seconds a duplicate waits for the result before running the query itself
+    "WAIT_TIMEOUT": config("DASHBOARD_COALESCE_WAIT_TIMEOUT", cast=int, default=30),
+    "POLL_INTERVAL": config(
+        "DASHBOARD_COALESCE_POLL_INTERVAL", cast=float, default=0.05
+    ),
+}
+
+# POST /api/v1/dashboards/batch (see `analytics.widgets`): widgets run at a time
+# per worker process, each with its own connection, and widgets per call
+DASHBOARD_BATCH = {
+    "WORKERS": config("DASHBOARD_BATCH_WORKERS", cast=int, default=8),
+    "MAX_WIDGETS": config("DASHBOARD_BATCH_MAX_WIDGETS", cast=int, default=20),
+}
+
+# `?stream=true` of the large lists (see `analytics.streaming`): rows fetched from
+# the server side cursor and serialized at a time
+DASHBOARD_STREAMING = {
+    "YIELD_PER": config("DASHBOARD_STREAMING_YIELD_PER", cast=int, default=1000),
+}
+
+# totals of the paginated lists (see `analytics.counting`), cached in the dashboards
+# cache by query and data version of the tables counted: until the next load (at
+# most `TTL`), `UNVERSIONED_TTL` seconds for tables `FRESHNESS` has no version of
+DASHBOARD_COUNTS = {
+    "ENABLED": config("DASHBOARD_COUNTS_CACHE_ENABLED", cast=bool, default=True),
+    "TTL": config("DASHBOARD_COUNTS_TTL", cast=int, default=86400),
+    "UNVERSIONED_TTL": config("DASHBOARD_COUNTS_UNVERSIONED_TTL", cast=int, default=60),
+}
+
+# in memory trigram indexes of the company, investor and trader lookups (see
+# `analytics.search`), rebuilt on a new load of their tables or after `TTL` seconds
+# for tables without a data version. A `company` filter matching more than
+# `MAX_KEYS` names stays a LIKE; `MAX_LIMIT` caps the suggestions of the typeahead
+DASHBOARD_SEARCH = {
+    "TTL": config("DASHBOARD_SEARCH_TTL", cast=int, default=300),
+    "MAX_KEYS": config("DASHBOARD_SEARCH_MAX_KEYS", cast=int, default=1000),
+    "MAX_LIMIT": config("DASHBOARD_SEARCH_MAX_LIMIT", cast=int, default=50),
+}
+
+# `manage.py warm_dashboards` (see `analytics.warming`): precompute the boards of
+# every data scope into the dashboards cache. With `ON_LOAD` a worker also warms
+# the boards reading a table `ON_LOAD_DELAY` seconds after its last new load (one
+# worker per load with a shared cache backend). `PARAMS` lists the query parameter
+# sets warmed per view besides none: {"view_name": [{"param": "value"}, ...]}
+# `ORIGIN` is the "scheme://host[:port]" the clients call the API at: the cache keys
+# and pagination links carry it (the first of ALLOWED_HOSTS otherwise)
+DASHBOARD_WARM = {
+    "WORKERS": config("DASHBOARD_WARM_WORKERS", cast=int, default=4),
+    "ORIGIN": config("DASHBOARD_WARM_ORIGIN", default=""),
+    "ON_LOAD": config("DASHBOARD_WARM_ON_LOAD", cast=bool, default=False),
+    "ON_LOAD_DELAY": config("DASHBOARD_WARM_ON_LOAD_DELAY", cast=int, default=60),
+    "PARAMS": {},
+}
+
+# MAX(push_date) / MAX(trading_date) of every analytics table, polled by one worker
+# each interval and shared through the dashboards cache to version the cached
+# dashboards (see `analytics.freshness`)
+FRESHNESS = {
+    "POLL_INTERVAL": config("FRESHNESS_POLL_INTERVAL", cast=int, default=10),
+    "STATIC_TABLES": ("BI_trd_Branch_Region_Info",),
+}
+
 
 # drf-spectacular settings
 SPECTACULAR_SETTINGS = {
@@ -8,6 +8,7 @@ from drf_spectacular.views import (
 from rest_framework.settings import api_settings
 
 from authusers.views import MyTokenObtainPairView
+from core import views as core_views
 
 v1 = "api/v1"
 
@@ -38,4 +39,8 @@ urlpatterns = [
     path("api/token/", MyTokenObtainPairView.as_view(), name="token_obtain_pair"),
     # Analytics URL
     path(f"{v1}/dashboards/", include("analytics.urls")),
+    # System URL
+    path(f"{v1}/system/database-health/", core_views.get_database_health),
+    path(f"{v1}/system/database-pools/", core_views.get_database_pools),
+    path(f"{v1}/system/dashboard-cache/", core_views.get_dashboard_cache),
 ]
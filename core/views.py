@@ -0,0 +1,45 @@
+from http import HTTPMethod
+
+from drf_spectacular.utils import extend_schema
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from analytics.cache import cache_stats
+from core.metadata.openapi import OpenApiTags
+from core.permissions import ExtendedIsAdminUser
+from core.renderer import CustomRenderer
+from db import get_runtime_engine
+
+__all__ = ["get_database_health", "get_database_pools", "get_dashboard_cache"]
+
+
+@extend_schema(tags=[OpenApiTags.SYSTEM])
+@api_view([HTTPMethod.GET])
+@permission_classes([IsAuthenticated, ExtendedIsAdminUser])
+def get_database_health(request: Request) -> Response:
+    """fetch the probe results and failover counters of the database targets"""
+    request.accepted_renderer = CustomRenderer()
+
+    return Response(get_runtime_engine().stats())
+
+
+@extend_schema(tags=[OpenApiTags.SYSTEM])
+@api_view([HTTPMethod.GET])
+@permission_classes([IsAuthenticated, ExtendedIsAdminUser])
+def get_database_pools(request: Request) -> Response:
+    """fetch the per target connection pool usage, checkout wait-times and churn"""
+    request.accepted_renderer = CustomRenderer()
+
+    return Response(get_runtime_engine().pool_stats())
+
+
+@extend_schema(tags=[OpenApiTags.SYSTEM])
+@api_view([HTTPMethod.GET])
+@permission_classes([IsAuthenticated, ExtendedIsAdminUser])
+def get_dashboard_cache(request: Request) -> Response:
+    """fetch the backend, TTLs and hit / miss counters of the dashboard response cache"""
+    request.accepted_renderer = CustomRenderer()
+
+    return Response(cache_stats())
@@ -1,9 +1,27 @@
+import threading
+from typing import Optional
+
 from decouple import config
-from sqlalchemy import URL, create_engine, text, inspect
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import URL, inspect
 from sqlalchemy.orm import DeclarativeBase
-import threading
-import time
+
+from .circuit import CircuitBreaker
+from .runtime import EngineProxy, PoolOptions, RuntimeEngine
+from .session import ReadOnlySession, db_session
+
+__all__ = [
+    "PRIMARY",
+    "BACKUP",
+    "POOL",
+    "ROUTING",
+    "CIRCUIT",
+    "make_url",
+    "get_runtime_engine",
+    "engine",
+    "BaseOrm",
+    "ReadOnlySession",
+    "db_session",
+]
 
 # Primary and Backup DB configurations
 PRIMARY = {
@@ -22,6 +40,35 @@ BACKUP = {
     "PASSWORD": config("DB_BACKUP_PASS"),
 }
 
+# Connection pool of every target, shared by SQLAlchemy and the Django backend.
+# DB_POOL_PRE_PING is one of "always", "idle" (ping connections idle for longer
+# than DB_POOL_PRE_PING_IDLE seconds) or "never".
+POOL = {
+    "SIZE": config("DB_POOL_SIZE", cast=int, default=10),
+    "MAX_OVERFLOW": config("DB_POOL_MAX_OVERFLOW", cast=int, default=20),
+    "RECYCLE": config("DB_POOL_RECYCLE", cast=int, default=1800),
+    "TIMEOUT": config("DB_POOL_TIMEOUT", cast=int, default=30),
+    "PRE_PING": config("DB_POOL_PRE_PING", default="idle"),
+    "PRE_PING_IDLE": config("DB_POOL_PRE_PING_IDLE", cast=int, default=60),
+}
+
+# "failover" sends every query to the active target, "balanced" spreads the reads
+# of the analytics views over every healthy target by weight and outstanding load.
+ROUTING = {
+    "MODE": config("DB_ROUTING_MODE", default="failover"),
+    "PRIMARY_WEIGHT": config("DB_PRIMARY_WEIGHT", cast=int, default=1),
+    "BACKUP_WEIGHT": config("DB_BACKUP_WEIGHT", cast=int, default=1),
+}
+
+# Once both targets are unreachable, DB_CIRCUIT_FAILURE_THRESHOLD failed queries
+# within DB_CIRCUIT_WINDOW seconds open the circuit: checkouts fail fast for
+# DB_CIRCUIT_RESET_TIMEOUT seconds before a trial request is let through.
+CIRCUIT = {
+    "FAILURE_THRESHOLD": config("DB_CIRCUIT_FAILURE_THRESHOLD", cast=int, default=5),
+    "WINDOW": config("DB_CIRCUIT_WINDOW", cast=int, default=30),
+    "RESET_TIMEOUT": config("DB_CIRCUIT_RESET_TIMEOUT", cast=int, default=15),
+}
+
 
 def make_url(db):
     """Create SQLAlchemy URL for MSSQL."""
@@ -39,71 +86,48 @@ def make_url(db):
     )
 
 
-class RuntimeEngine:
-    """Manage engine with runtime failover and automatic primary recovery."""
-
-    def __init__(self, check_interval=10):
-        self.primary_url = make_url(PRIMARY)
-        self.backup_url = make_url(BACKUP)
-        self.engine = None
-        self.current_db = "Primary"
-        self.lock = threading.Lock()
-        self.check_interval = check_interval  # seconds for background primary check
-        self._connect()
-        self._start_background_check()
-
-    def _connect(self):
-        """Try primary first, then backup if primary is down."""
-        for url, name in [(self.primary_url, "Primary"), (self.backup_url, "Backup")]:
-            try:
-                engine = create_engine(url, echo=False, pool_pre_ping=True)
-                with engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                print(f"✅ Connected to {name} DB")
-                self.engine = engine
-                self.current_db = name
-                return
-            except OperationalError:
-                print(f"⚠️ {name} DB not reachable. Trying next...")
-        raise ConnectionError("❌ Both Primary and Backup DBs are down!")
-
-    def get_engine(self):
-        """Return an active engine and try reconnect if DB is down."""
-        with self.lock:
-            try:
-                with self.engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                return self.engine
-            except OperationalError:
-                print("⚠️ Current DB down. Reconnecting...")
-                self._connect()
-                return self.engine
-
-    def _background_check(self):
-        """Continuously try to reconnect to primary DB in background."""
-        while True:
-            time.sleep(self.check_interval)
-            with self.lock:
-                if self.current_db != "Primary":
-                    try:
-                        engine = create_engine(self.primary_url, echo=False, pool_pre_ping=True)
-                        with engine.connect() as conn:
-                            conn.execute(text("SELECT 1"))
-                        self.engine = engine
-                        self.current_db = "Primary"
-                        print("🔄 Primary DB is back online. Switched to Primary!")
-                    except OperationalError:
-                        pass  # primary still down, ignore
-
-    def _start_background_check(self):
-        """Start a thread to check primary DB periodically."""
-        thread = threading.Thread(target=self._background_check, daemon=True)
-        thread.start()
-
-
-# Initialize runtime engine
-runtime_engine = RuntimeEngine()
-engine = runtime_engine.get_engine()
+_runtime_engine: Optional[RuntimeEngine] = None
+_runtime_engine_lock = threading.Lock()
+
+
+def get_runtime_engine() -> RuntimeEngine:
+    """
+    Return the process wide runtime engine, building it on first use.
+
+    Nothing touches the network at import time, so `manage.py`, gunicorn preload and
+    test runs start without waiting on MSSQL. The failover decision taken here is
+    shared with the Django database backend (`db.backends.mssql`).
+    """
+    global _runtime_engine
+    if _runtime_engine is None:
+        with _runtime_engine_lock:
+            if _runtime_engine is None:
+                _runtime_engine = RuntimeEngine(
+                    make_url(PRIMARY),
+                    make_url(BACKUP),
+                    pool_options=PoolOptions(
+                        size=POOL["SIZE"],
+                        max_overflow=POOL["MAX_OVERFLOW"],
+                        recycle=POOL["RECYCLE"],
+                        timeout=POOL["TIMEOUT"],
+                        pre_ping=POOL["PRE_PING"],
+                        pre_ping_idle=POOL["PRE_PING_IDLE"],
+                    ),
+                    routing_mode=ROUTING["MODE"],
+                    weights={
+                        "Primary": ROUTING["PRIMARY_WEIGHT"],
+                        "Backup": ROUTING["BACKUP_WEIGHT"],
+                    },
+                    breaker=CircuitBreaker(
+                        failure_threshold=CIRCUIT["FAILURE_THRESHOLD"],
+                        window=CIRCUIT["WINDOW"],
+                        reset_timeout=CIRCUIT["RESET_TIMEOUT"],
+                    ),
+                )
+    return _runtime_engine
+
+
+engine = EngineProxy(get_runtime_engine)
 
 
 class BaseOrm(DeclarativeBase):
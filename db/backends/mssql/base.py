@@ -0,0 +1,111 @@
+from mssql.base import Database, handle_datetimeoffset
+from mssql.base import DatabaseWrapper as MSSQLDatabaseWrapper
+from mssql.introspection import SQL_TIMESTAMP_WITH_TIMEZONE
+
+from db import get_runtime_engine
+
+
+class PooledConnection:
+    """
+    DBAPI connection borrowed from the SQLAlchemy pool of the active target.
+
+    Django and SQLAlchemy share the very same pool, so a worker holds a single pool
+    and a single pool-size budget. Attribute writes (`autocommit`, `timeout`) go to
+    the driver connection, `close()` gives the connection back to the pool with the
+    driver state SQLAlchemy expects.
+    """
+
+    def __init__(self, fairy, target: str):
+        object.__setattr__(self, "_fairy", fairy)
+        object.__setattr__(self, "target", target)
+        object.__setattr__(self, "_closed", False)
+        driver_connection = fairy.dbapi_connection
+        object.__setattr__(self, "_saved_timeout", driver_connection.timeout)
+        object.__setattr__(
+            self,
+            "_saved_converter",
+            driver_connection.get_output_converter(SQL_TIMESTAMP_WITH_TIMEZONE),
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._fairy.dbapi_connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._fairy.dbapi_connection, name, value)
+
+    def cursor(self, *args, **kwargs):
+        return self._fairy.cursor(*args, **kwargs)
+
+    def invalidate(self, error=None):
+        if not self._closed:
+            object.__setattr__(self, "_closed", True)
+            self._fairy.invalidate(error)
+
+    def close(self):
+        if self._closed:
+            return
+        object.__setattr__(self, "_closed", True)
+        driver_connection = self._fairy.dbapi_connection
+        try:
+            driver_connection.autocommit = False
+            driver_connection.timeout = self._saved_timeout
+            if self._saved_converter is None:
+                driver_connection.remove_output_converter(SQL_TIMESTAMP_WITH_TIMEZONE)
+            else:
+                driver_connection.add_output_converter(
+                    SQL_TIMESTAMP_WITH_TIMEZONE, self._saved_converter
+                )
+        except Exception as exc:
+            self._fairy.invalidate(exc)
+            return
+        self._fairy.close()
+
+
+class DatabaseWrapper(MSSQLDatabaseWrapper):
+    """
+    `mssql` backend sharing connections and failover with the SQLAlchemy layer.
+
+    The target is resolved on connect instead of at settings import, following the
+    failover decision of `db.get_runtime_engine()`, and connections are checked out
+    from the pool of that target rather than opened with `pyodbc.connect()`.
+    """
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        runtime_engine = get_runtime_engine()
+        url = runtime_engine.active_url
+        conn_params.update(
+            {
+                "HOST": url.host,
+                "PORT": url.port,
+                "NAME": url.database,
+                "USER": url.username,
+                "PASSWORD": url.password,
+                "TARGET": runtime_engine.current_db,
+            }
+        )
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        options = conn_params.get("OPTIONS", {})
+        runtime_engine = get_runtime_engine()
+        target = conn_params["TARGET"]
+
+        with runtime_engine.breaker.guard():
+            try:
+                fairy = runtime_engine.engines[target].raw_connection()
+            except Database.Error as exc:
+                runtime_engine.report_failure(target, exc)
+                raise
+
+        conn = PooledConnection(fairy, target)
+        # same per-connection setup `mssql` applies to fresh pyodbc connections
+        conn.add_output_converter(SQL_TIMESTAMP_WITH_TIMEZONE, handle_datetimeoffset)
+        conn.timeout = options.get("query_timeout", 0)
+        return conn
+
+    def _on_error(self, e):
+        if self.connection is not None and e.args[0] in self._codes_for_networkerror:
+            self.connection.invalidate(e)
+            get_runtime_engine().report_failure(self.connection.target, e)
+        super()._on_error(e)
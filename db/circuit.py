@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import StrEnum
+from logging import getLogger
+from typing import Any, Dict, Optional
+
+logging = getLogger("db.circuit")
+
+__all__ = ["CircuitState", "CircuitOpenError", "CircuitBreaker"]
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"  # live traffic
+    OPEN = "open"  # fail fast, no connection attempt at all
+    HALF_OPEN = "half_open"  # a single trial request decides
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of connecting while the circuit is open."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(
+            f"❌ Database circuit is open, retry in {retry_after:.0f} seconds"
+        )
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding the checkouts of the database connections.
+
+    Trips open after `failure_threshold` failures within `window` seconds. While open
+    every checkout fails fast with `CircuitOpenError` instead of waiting out the ODBC
+    login timeout. After `reset_timeout` seconds (or as soon as the background prober
+    sees a healthy target) it turns half-open and lets one trial checkout through:
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        window: int = 30,
+        reset_timeout: int = 15,
+    ):
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.opened_at: Optional[float] = None
+        self.opens = 0
+        self.rejected = 0
+        self._failures: deque[float] = deque()
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Let a checkout through or raise `CircuitOpenError`."""
+        if self.state == CircuitState.CLOSED:
+            return  # lock free fast path
+        with self._lock:
+            if self.state == CircuitState.OPEN:
+                elapsed = time.monotonic() - self.opened_at
+                if elapsed < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.reset_timeout - elapsed)
+                self._half_open()
+            if self.state == CircuitState.HALF_OPEN:
+                if self._trial_running:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.reset_timeout)
+                self._trial_running = True
+
+    def record_success(self) -> None:
+        if self.state == CircuitState.CLOSED:
+            return
+        with self._lock:
+            if self.state == CircuitState.HALF_OPEN:
+                self.state = CircuitState.CLOSED
+                self.opened_at = None
+                self._failures.clear()
+                self._trial_running = False
+                logging.warning("✅ Database circuit closed, live traffic restored")
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == CircuitState.HALF_OPEN:
+                self._open(now)
+                return
+            if self.state == CircuitState.OPEN:
+                return
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window:
+                self._failures.popleft()
+            if len(self._failures) >= self.failure_threshold:
+                self._open(now)
+
+    def release(self) -> None:
+        """The trial checkout ended without a verdict (e.g. pool timeout)."""
+        with self._lock:
+            self._trial_running = False
+
+    def half_open(self) -> None:
+        """Called by the prober once a target answers again."""
+        if self.state != CircuitState.OPEN:
+            return
+        with self._lock:
+            if self.state == CircuitState.OPEN:
+                self._half_open()
+
+    @contextmanager
+    def guard(self):
+        """Wrap a connection checkout: fail fast when open, close on a trial success."""
+        self.before_call()
+        try:
+            yield
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+
+    @property
+    def retry_after(self) -> float:
+        if self.state != CircuitState.OPEN:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def _open(self, now: float) -> None:
+        self.state = CircuitState.OPEN
+        self.opened_at = now
+        self.opens += 1
+        self._failures.clear()
+        self._trial_running = False
+        logging.error(
+            f"🚫 Database circuit opened, failing fast for {self.reset_timeout} seconds"
+        )
+
+    def _half_open(self) -> None:
+        self.state = CircuitState.HALF_OPEN
+        self._trial_running = False
+        logging.info("🔎 Database circuit half-open, letting a trial request through")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "state": str(self.state),
+            "failure_threshold": self.failure_threshold,
+            "window": self.window,
+            "reset_timeout": self.reset_timeout,
+            "retry_after": round(self.retry_after, 2),
+            "recent_failures": len(self._failures),
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,91 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+__all__ = ["PoolMetrics", "InstrumentedQueuePool"]
+
+# upper bounds (milliseconds) of the checkout wait-time histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """Thread-safe counters and checkout wait-time histogram of one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.pings = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        index = bisect_left(WAIT_BUCKETS_MS, seconds * 1000)
+        with self._lock:
+            self.wait_buckets[index] += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            labels = [f"<={bound}ms" for bound in WAIT_BUCKETS_MS] + [
+                f">{WAIT_BUCKETS_MS[-1]}ms"
+            ]
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "checkout_wait_avg_ms": (
+                    round(self.wait_total / waits * 1000, 3) if waits else 0.0
+                ),
+                "checkout_wait_max_ms": round(self.wait_max * 1000, 3),
+                "checkout_wait_histogram": dict(zip(labels, self.wait_buckets, strict=True)),
+                "churn": {
+                    "connects": self.connects,
+                    "closes": self.closes,
+                    "invalidations": self.invalidations,
+                    "pings": self.pings,
+                },
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """`QueuePool` recording how long every checkout waited for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except TimeoutError:
+            self.metrics.observe_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.observe_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # `Engine.dispose()` swaps the pool, keep the counters across the swap
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import StrEnum
+from functools import wraps
+
+__all__ = ["RoutingMode", "primary_only", "use_primary", "is_primary_only"]
+
+_primary_only: ContextVar[bool] = ContextVar("db_primary_only", default=False)
+
+
+class RoutingMode(StrEnum):
+    FAILOVER = "failover"  # every query goes to the active target
+    BALANCED = "balanced"  # reads are spread over every healthy target
+
+
+def is_primary_only() -> bool:
+    return _primary_only.get()
+
+
+@contextmanager
+def use_primary():
+    """Pin the sessions opened inside the block to the active (primary) target."""
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+def primary_only(func):
+    """
+    Mark a view as primary-only: in balanced routing mode its reads are never sent
+    to the backup, e.g. realtime boards that cannot tolerate replication lag.
+    Must be the innermost decorator (right above the function).
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_primary():
+            return func(*args, **kwargs)
+
+    wrapper.primary_only = True
+    return wrapper
@@ -0,0 +1,469 @@
+import threading
+import time
+from enum import StrEnum
+from logging import getLogger
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import URL, Engine, create_engine, event, text
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.exc import DBAPIError, DisconnectionError, OperationalError
+from sqlalchemy.pool import NullPool
+
+from .circuit import CircuitBreaker
+from .metrics import InstrumentedQueuePool, PoolMetrics
+from .routing import RoutingMode, is_primary_only
+
+logging = getLogger("db.runtime")
+
+__all__ = [
+    "TargetStatus",
+    "TargetHealth",
+    "PrePingStrategy",
+    "PoolOptions",
+    "RuntimeEngine",
+    "EngineProxy",
+]
+
+
+class TargetStatus(StrEnum):
+    UNKNOWN = "unknown"
+    UP = "up"
+    DOWN = "down"
+
+
+class PrePingStrategy(StrEnum):
+    ALWAYS = "always"  # `pool_pre_ping`, one round trip on every checkout
+    IDLE = "idle"  # ping only connections idle for longer than `pre_ping_idle`
+    NEVER = "never"  # rely on passive error signals and `pool_recycle`
+
+
+class PoolOptions:
+    """Sizing of the per-target connection pools, see `db.POOL`."""
+
+    def __init__(
+        self,
+        size: int = 5,
+        max_overflow: int = 10,
+        recycle: int = -1,
+        timeout: int = 30,
+        pre_ping: str = PrePingStrategy.ALWAYS,
+        pre_ping_idle: int = 60,
+    ):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self.timeout = timeout
+        self.pre_ping = PrePingStrategy(pre_ping)
+        self.pre_ping_idle = pre_ping_idle
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "max_overflow": self.max_overflow,
+            "recycle": self.recycle,
+            "timeout": self.timeout,
+            "pre_ping": str(self.pre_ping),
+            "pre_ping_idle": self.pre_ping_idle,
+        }
+
+
+class TargetHealth:
+    """Health bookkeeping of a single database target (Primary / Backup)."""
+
+    def __init__(self, name: str, url: URL):
+        self.name = name
+        self.url = url
+        self.status = TargetStatus.UNKNOWN
+        self.last_probe_at: Optional[float] = None
+        self.last_probe_latency: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        self.probes = 0
+        self.probe_failures = 0
+        self.passive_failures = 0
+
+    @property
+    def is_up(self) -> bool:
+        return self.status == TargetStatus.UP
+
+    def mark_up(self, latency: float) -> None:
+        self.status = TargetStatus.UP
+        self.last_probe_latency = latency
+        self.consecutive_failures = 0
+        self.last_error = None
+
+    def mark_down(self, error: BaseException) -> None:
+        self.status = TargetStatus.DOWN
+        self.consecutive_failures += 1
+        self.last_error = f"{error.__class__.__name__}: {error}"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "host": self.url.host,
+            "status": str(self.status),
+            "last_probe_at": self.last_probe_at,
+            "last_probe_latency_ms": (
+                round(self.last_probe_latency * 1000, 2)
+                if self.last_probe_latency is not None
+                else None
+            ),
+            "last_error": self.last_error,
+            "consecutive_failures": self.consecutive_failures,
+            "probes": self.probes,
+            "probe_failures": self.probe_failures,
+            "passive_failures": self.passive_failures,
+        }
+
+
+class RuntimeEngine:
+    """
+    Health-state engine manager with runtime failover and automatic primary recovery.
+
+    The health of every target is maintained by a background prober and by passive
+    error signals (connection errors raised while executing real queries). The read
+    path (`get_engine`) never touches the network nor takes a lock, it just hands out
+    the engine of the currently selected target.
+    """
+
+    PRIORITY = ("Primary", "Backup")
+
+    def __init__(
+        self,
+        primary_url: URL,
+        backup_url: URL,
+        check_interval: int = 10,
+        probe_timeout: int = 3,
+        pool_options: Optional[PoolOptions] = None,
+        routing_mode: str = RoutingMode.FAILOVER,
+        weights: Optional[Dict[str, int]] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.pool_options = pool_options or PoolOptions()
+        # trips while no target is reachable, see `report_failure`
+        self.breaker = breaker or CircuitBreaker()
+        self.routing_mode = RoutingMode(routing_mode)
+        self.weights = {"Primary": 1, "Backup": 1, **(weights or {})}
+        self.routed = {"Primary": 0, "Backup": 0}
+        self.targets: Dict[str, TargetHealth] = {
+            "Primary": TargetHealth("Primary", primary_url),
+            "Backup": TargetHealth("Backup", backup_url),
+        }
+        self.engine: Optional[Engine] = None
+        self.current_db: Optional[str] = None
+        # one long-lived engine (and pool) per target, reused across switches
+        self.engines: Dict[str, Engine] = {
+            name: self._create_engine(name) for name in self.targets
+        }
+        self.disposals = 0
+        self.check_interval = check_interval  # seconds for background probe
+        self.probe_timeout = probe_timeout
+        self.failovers = 0
+        self.recoveries = 0
+        self.last_switch_at: Optional[float] = None
+        # only taken by writers (prober / error handler), never by `get_engine`
+        self._switch_lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._probe_engines = {
+            name: create_engine(
+                target.url,
+                poolclass=NullPool,
+                connect_args={"timeout": probe_timeout},
+            )
+            for name, target in self.targets.items()
+        }
+        self._connect()
+        self._start_background_check()
+
+    def _create_engine(self, name: str) -> Engine:
+        options = self.pool_options
+        engine = create_engine(
+            self.targets[name].url,
+            echo=False,
+            poolclass=InstrumentedQueuePool,
+            pool_size=options.size,
+            max_overflow=options.max_overflow,
+            pool_recycle=options.recycle,
+            pool_timeout=options.timeout,
+            pool_pre_ping=options.pre_ping == PrePingStrategy.ALWAYS,
+        )
+        event.listen(engine, "handle_error", self._make_error_handler(name))
+        self._instrument_pool(engine)
+        return engine
+
+    def _instrument_pool(self, engine: Engine) -> None:
+        options = self.pool_options
+
+        def metrics() -> PoolMetrics:
+            return engine.pool.metrics
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            metrics().incr("connects")
+
+        @event.listens_for(engine, "close")
+        def on_close(dbapi_connection, connection_record):
+            metrics().incr("closes")
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            metrics().incr("invalidations")
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            connection_record.info["checked_in_at"] = time.monotonic()
+            metrics().incr("checkins")
+
+        if options.pre_ping == PrePingStrategy.IDLE:
+            self._ping_idle_connections(engine)
+
+    def _ping_idle_connections(self, engine: Engine) -> None:
+        """Ping the connections idle for `pre_ping_idle` seconds on checkout."""
+        options = self.pool_options
+
+        @event.listens_for(engine, "checkout")
+        def ping_idle(dbapi_connection, connection_record, connection_proxy):
+            checked_in_at = connection_record.info.get("checked_in_at")
+            if checked_in_at is None:
+                return  # fresh connection
+            if time.monotonic() - checked_in_at < options.pre_ping_idle:
+                return
+            engine.pool.metrics.incr("pings")
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            except Exception as exc:
+                # the pool retries the checkout with a brand new connection
+                raise DisconnectionError() from exc
+            finally:
+                cursor.close()
+
+    def _connect(self) -> bool:
+        """
+        Select the first healthy target in priority. Probing stops at the first
+        target that answers, the remaining ones are left to the background prober.
+        """
+        for name in self.PRIORITY:
+            if self.probe(name):
+                break
+        if not self._reconcile():
+            logging.error("❌ Both Primary and Backup DBs are down!")
+            return False
+        return True
+
+    def probe(self, name: str) -> bool:
+        """Run `SELECT 1` against a target on a dedicated, non pooled connection."""
+        target = self.targets[name]
+        started = time.perf_counter()
+        target.probes += 1
+        target.last_probe_at = time.time()
+        try:
+            with self._probe_engines[name].connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except DBAPIError as exc:
+            target.probe_failures += 1
+            target.mark_down(exc)
+            return False
+        target.mark_up(time.perf_counter() - started)
+        return True
+
+    def _probe_unknown(self) -> None:
+        """
+        Probe the targets never probed yet (`_connect` stops at the first one up), so
+        the first failure of the active target fails over right away instead of at
+        the next background probe. Concurrent failures wait for the same probe.
+        """
+        with self._probe_lock:
+            for name in self.PRIORITY:
+                if self.targets[name].status == TargetStatus.UNKNOWN:
+                    self.probe(name)
+
+    def probe_all(self) -> None:
+        for name in self.PRIORITY:
+            self.probe(name)
+
+    def _reconcile(self) -> bool:
+        """Switch to the most preferred healthy target. Returns `False` if none is up."""
+        preferred = next(
+            (name for name in self.PRIORITY if self.targets[name].is_up), None
+        )
+        if preferred is None:
+            return False
+        if preferred == self.current_db:
+            return True
+
+        with self._switch_lock:
+            if preferred == self.current_db:
+                return True
+            previous = self.current_db
+            self.engine = self.engines[preferred]
+            self.current_db = preferred
+            self.last_switch_at = time.time()
+
+        if previous is not None:
+            self._drain(previous)
+
+        if previous is None:
+            logging.info(f"✅ Connected to {preferred} DB")
+        elif preferred == self.PRIORITY[0]:
+            self.recoveries += 1
+            logging.warning("🔄 Primary DB is back online. Switched to Primary!")
+        else:
+            self.failovers += 1
+            logging.warning(f"⚠️ {previous} DB down. Switched to {preferred} DB")
+        return True
+
+    def _drain(self, name: str) -> None:
+        """
+        Drain the pool of a superseded target. Idle connections are closed right away,
+        checked-out ones are closed once their holder gives them back.
+        """
+        self.engines[name].dispose()
+        self.disposals += 1
+        logging.info(f"🧹 Disposed the connection pool of {name} DB")
+
+    def _make_error_handler(self, name: str):
+        def handle_error(context: ExceptionContext) -> None:
+            if (
+                context.is_disconnect
+                or isinstance(context.original_exception, OperationalError)
+                or isinstance(context.sqlalchemy_exception, OperationalError)
+            ):
+                self.report_failure(name, context.original_exception)
+
+        return handle_error
+
+    def report_failure(self, name: str, error: BaseException) -> None:
+        """Passive health signal: a real query failed to reach the target."""
+        target = self.targets[name]
+        target.passive_failures += 1
+        target.mark_down(error)
+        logging.warning(f"⚠️ {name} DB reported down by a query: {error}")
+        if name == self.current_db:
+            self._probe_unknown()
+            self._reconcile()
+        if not any(target.is_up for target in self.targets.values()):
+            self.breaker.record_failure()
+
+    @property
+    def active_url(self) -> URL:
+        """URL of the current target, shared with the Django database backend."""
+        self.get_engine()
+        return self.targets[self.current_db].url
+
+    def get_engine(self) -> Engine:
+        """Return the engine of the current healthy target."""
+        engine = self.engine
+        if engine is None:
+            raise ConnectionError("❌ Both Primary and Backup DBs are down!")
+        return engine
+
+    def get_read_engine(self) -> Engine:
+        """
+        Return the engine a read-only session should use.
+
+        In `balanced` mode reads go to the healthy target with the fewest outstanding
+        requests (checked out connections) relative to its weight; ties go to the
+        primary. Primary-only callers (see `db.routing.primary_only`) and the
+        `failover` mode always get the active target.
+        """
+        if self.routing_mode == RoutingMode.FAILOVER or is_primary_only():
+            return self.get_engine()
+
+        candidates = [
+            name
+            for name in self.PRIORITY
+            if self.targets[name].is_up and self.weights[name] > 0
+        ]
+        if not candidates:
+            return self.get_engine()
+
+        name = min(
+            candidates,
+            key=lambda name: (self.engines[name].pool.checkedout() + 1)
+            / self.weights[name],
+        )
+        self.routed[name] += 1
+        return self.engines[name]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "current_db": self.current_db,
+            "routing_mode": str(self.routing_mode),
+            "weights": self.weights,
+            "routed_reads": self.routed,
+            "failovers": self.failovers,
+            "recoveries": self.recoveries,
+            "last_switch_at": self.last_switch_at,
+            "disposals": self.disposals,
+            "check_interval": self.check_interval,
+            "circuit": self.breaker.as_dict(),
+            "targets": [self.targets[name].as_dict() for name in self.PRIORITY],
+        }
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Pool usage of every target, shared by SQLAlchemy and `db.backends.mssql`."""
+        return {
+            "options": self.pool_options.as_dict(),
+            "pools": [
+                {
+                    "name": name,
+                    "active": name == self.current_db,
+                    "size": engine.pool.size(),
+                    "checked_out": engine.pool.checkedout(),
+                    "idle": engine.pool.checkedin(),
+                    "overflow": max(engine.pool.overflow(), 0),
+                    **engine.pool.metrics.as_dict(),
+                }
+                for name, engine in self.engines.items()
+            ],
+        }
+
+    def _background_check(self):
+        """Continuously probe every target and fail over / recover accordingly."""
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.probe_all()
+                if self._reconcile():
+                    self.breaker.half_open()
+            except Exception as exc:  # the prober must never die
+                logging.exception(exc)
+
+    def _start_background_check(self):
+        """Start a thread to probe the targets periodically."""
+        thread = threading.Thread(
+            target=self._background_check, name="db-health-prober", daemon=True
+        )
+        thread.start()
+
+
+class EngineProxy:
+    """
+    Stand-in for `Engine` that always resolves to the engine of the active target.
+
+    Views bind sessions with `Session(engine)` where `engine` is imported once from
+    `db`; proxying keeps those sessions following failover and recovery switches.
+    Sessions only ever `connect()`, which is routed as a read (see
+    `RuntimeEngine.get_read_engine`), while `begin()` always goes to the active target.
+    Both are guarded by the circuit breaker of the runtime engine.
+    """
+
+    def __init__(self, resolve: Callable[[], RuntimeEngine]):
+        self._resolve = resolve
+
+    def connect(self):
+        runtime_engine = self._resolve()
+        with runtime_engine.breaker.guard():
+            return runtime_engine.get_read_engine().connect()
+
+    def begin(self):
+        runtime_engine = self._resolve()
+        with runtime_engine.breaker.guard():
+            return runtime_engine.get_engine().begin()
+
+    def __getattr__(self, name: str):
+        return getattr(self._resolve().get_engine(), name)
+
+    def __repr__(self) -> str:
+        return f"EngineProxy({self._resolve.__name__})"
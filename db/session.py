@@ -0,0 +1,145 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging import getLogger
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+
+logging = getLogger("db.session")
+
+__all__ = [
+    "ReadOnlySession",
+    "RequestSessionScope",
+    "request_session_scope",
+    "current_scope",
+    "db_session",
+]
+
+_current_scope: ContextVar[Optional["RequestSessionScope"]] = ContextVar(
+    "db_request_session_scope", default=None
+)
+
+
+class ReadOnlySession(Session):
+    """
+    Session of the analytics views: never autoflushes and refuses to write.
+
+    Bound to `db.engine` (an `EngineProxy`), it pins the engine its transaction
+    started on. The session keys its connections by the real engine, asking the
+    proxy on every statement would check out one more connection each time.
+    """
+
+    def __init__(self, bind=None, **kwargs):
+        kwargs.setdefault("autoflush", False)
+        kwargs.setdefault("expire_on_commit", False)
+        super().__init__(bind=bind, **kwargs)
+        self._pinned_bind: Optional[Engine] = None
+
+    def get_bind(self, *args, **kwargs):
+        if self._pinned_bind is not None:
+            return self._pinned_bind
+        return super().get_bind(*args, **kwargs)
+
+    def flush(self, objects=None):
+        if self.new or self.dirty or self.deleted:
+            raise InvalidRequestError("ReadOnlySession does not write to the database")
+
+
+@event.listens_for(ReadOnlySession, "after_begin")
+def _pin_bind(session, transaction, connection):
+    session._pinned_bind = connection.engine
+
+
+@event.listens_for(ReadOnlySession, "after_transaction_end")
+def _unpin_bind(session, transaction):
+    if transaction.parent is None:
+        session._pinned_bind = None
+
+
+class RequestSessionScope:
+    """
+    One lazily opened `ReadOnlySession` per request plus the database usage of the
+    request: pool checkouts (SQLAlchemy and Django share the pools) and statements.
+    """
+
+    def __init__(self, bind):
+        self.bind = bind
+        self.checkouts = 0
+        self.statements = 0
+        self._session: Optional[ReadOnlySession] = None
+
+    @property
+    def session(self) -> ReadOnlySession:
+        if self._session is None:
+            self._session = ReadOnlySession(self.bind)
+        return self._session
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"checkouts": self.checkouts, "statements": self.statements}
+
+
+def current_scope() -> Optional[RequestSessionScope]:
+    return _current_scope.get()
+
+
+@contextmanager
+def request_session_scope(bind=None) -> Iterator[RequestSessionScope]:
+    """
+    Make `db_session()` hand out a single session for the duration of the block.
+    The session itself is left open, the owner (see `RequestSessionMiddleware`)
+    closes it once the response is done with it.
+    """
+    if bind is None:
+        from . import engine as bind
+    scope = RequestSessionScope(bind)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+@contextmanager
+def db_session() -> Iterator[Session]:
+    """
+    Session to run the read queries of a view and its helpers with.
+
+    Inside a request this is the request scoped session, left open for the rest of
+    the request so every helper shares its connection. Outside of a request
+    (management commands, worker threads) a fresh session is opened and closed.
+    """
+    scope = _current_scope.get()
+    if scope is not None:
+        yield scope.session
+        return
+
+    from . import engine
+
+    with ReadOnlySession(engine) as session:
+        yield session
+
+
+@event.listens_for(Pool, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.checkouts += 1
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.statements += 1
@@ -0,0 +1,120 @@
+"""
+Pivot benchmark.
+
+Pivots the rows of the portfolio management boards (`col1` summed by the padded
+`col2` label and `col3`, `Numeric` values) with the former pandas path (a DataFrame
+of the row dicts, `.str.strip()`, `pivot_table`, `to_dict`) and with the single
+pass of `analytics.registry.Pivot`, on full grids and on grids with missing cells,
+and checks both give the very same records (types and NaN included).
+
+    python profiling/pivot.py --branches 1 20 200 --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from startup import UNREACHABLE_DB_ENV
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+for key, value in UNREACHABLE_DB_ENV.items():
+    os.environ.setdefault(key, value)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import pandas as pd  # noqa: E402
+from sqlalchemy import Numeric, Result, create_engine, text  # noqa: E402
+
+from analytics.registry import Pivot  # noqa: E402
+
+# branches x 6 labels x 12 months, `:gaps` drops every n-th cell
+ROWS_QUERY = text(
+    """
+    WITH RECURSIVE
+        b(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM b WHERE i < :branches),
+        l(j) AS (SELECT 1 UNION ALL SELECT j + 1 FROM l WHERE j < 6),
+        m(k) AS (SELECT 1 UNION ALL SELECT k + 1 FROM m WHERE k < 12)
+    SELECT b.i AS branch_code,
+           'BRANCH ' || b.i AS branch_name,
+           round((b.i * 7919 + l.j * 104729 + m.k * 31) % 1000000 / 100.0, 2) AS col1,
+           ' ' || l.j || '.Label ' || l.j || '   ' AS col2,
+           substr('JanFebMarAprMayJunJulAugSepOctNovDec', m.k * 3 - 2, 3) AS col3
+    FROM b, l, m
+    WHERE :gaps = 0 OR (b.i + l.j * 5 + m.k) % :gaps != 0
+    """
+).columns(col1=Numeric(38, 2))
+
+
+def former_pivot(pivot: Pivot, rows: Result) -> List[Dict[str, Any]]:
+    """the pandas implementation `Pivot` replaced"""
+    df = pd.DataFrame([row._asdict() for row in rows], columns=rows.keys())
+    df[pivot.index] = df[pivot.index].str.strip()
+
+    pivot_df = df.pivot_table(
+        index=pivot.index, columns=pivot.columns, values=pivot.values, aggfunc="sum"
+    ).reset_index()
+
+    pivot_df.columns = map(str.lower, pivot_df.columns)
+
+    pivot_df.rename(columns={pivot.index: pivot.name}, inplace=True)
+    return pivot_df.to_dict(orient="records")
+
+
+def run_timed(runs: int, func: Callable[[], Any]) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--branches", type=int, nargs="+", default=[1, 20, 200])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    pivot = Pivot(index="col2", columns="col3", values="col1")
+    engine = create_engine("sqlite://")
+    print(
+        f"{'grid':<9}{'rows':>7}{'pandas (ms)':>13}{'pivot (ms)':>12}"
+        f"{'speedup':>9}{'identical':>11}"
+    )
+    for branches in args.branches:
+        for grid, gaps in (("full", 0), ("missing", 7)):
+            with engine.connect() as connection:
+                frozen = connection.execute(
+                    ROWS_QUERY, {"branches": branches, "gaps": gaps}
+                ).freeze()
+            rows = len(frozen.data)
+            # `repr` tells Decimal from float and NaN from NaN
+            identical = repr(former_pivot(pivot, frozen())) == repr(
+                pivot.apply(frozen())
+            )
+
+            before = statistics.median(
+                run_timed(
+                    args.runs, lambda frozen=frozen: former_pivot(pivot, frozen())
+                )
+            )
+            after = statistics.median(
+                run_timed(args.runs, lambda frozen=frozen: pivot.apply(frozen()))
+            )
+            print(
+                f"{grid:<9}{rows:>7}{before * 1000:>13.2f}{after * 1000:>12.2f}"
+                f"{before / after:>8.1f}x{str(identical):>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
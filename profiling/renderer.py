@@ -0,0 +1,124 @@
+"""
+Response rendering benchmark.
+
+Renders the same dashboard payloads, rows of snake_case keys with dates, decimals
+and floats, with the former renderer (`CamelCaseJSONRenderer`: the regex camelize
+of every key and the stdlib encoder) and with `core.renderer.CustomRenderer`
+(cached key conversion, orjson when installed), and checks both give the same
+document, byte for byte on the stdlib path.
+
+    python profiling/renderer.py --rows 1000 10000 100000 --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, List
+
+from startup import UNREACHABLE_DB_ENV
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+for key, value in UNREACHABLE_DB_ENV.items():
+    os.environ.setdefault(key, value)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer  # noqa: E402
+from rest_framework.response import Response  # noqa: E402
+
+import core.renderer  # noqa: E402
+from core.renderer import CustomRenderer  # noqa: E402
+
+
+class FormerRenderer(CamelCaseJSONRenderer):
+    """the envelope of `CustomRenderer` on top of `CamelCaseJSONRenderer`"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        status_code = renderer_context["response"].status_code
+        return super().render(
+            {"status": "success", "code": status_code, "data": data, "message": None},
+            accepted_media_type,
+            renderer_context,
+        )
+
+
+def make_payload(rows: int) -> List[dict]:
+    started = datetime(2024, 1, 1)
+    return [
+        {
+            "trading_date": (started + timedelta(days=i % 3650)).strftime("%d-%b-%y"),
+            "push_date": started + timedelta(minutes=i),
+            "company_name": f"COMPANY {i % 350}",
+            "branch_name": f"BRANCH {i % 40}",
+            "investor_code": f"{i:08d}",
+            "stock_available": i * 7,
+            "ledger_balance": Decimal(i) / 100,
+            "loan_ratio": i * 0.125,
+            "is_margin_account": i % 2 == 0,
+        }
+        for i in range(rows)
+    ]
+
+
+def run_timed(runs: int, func: Callable[[], bytes]) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    context = {"response": Response(status=200)}
+    former, renderer = FormerRenderer(), CustomRenderer()
+    encoder = "orjson" if core.renderer.orjson is not None else "stdlib json"
+    print(f"CustomRenderer encodes with {encoder}")
+    print(
+        f"{'rows':>8}{'former (s)':>12}{'custom (s)':>12}{'speedup':>9}"
+        f"{'same document':>15}{'same bytes (stdlib)':>21}"
+    )
+    for rows in args.rows:
+        payload = make_payload(rows)
+
+        def render_former(payload=payload):
+            return former.render(payload, renderer_context=context)
+
+        def render_custom(payload=payload):
+            return renderer.render(payload, renderer_context=context)
+
+        expected = render_former()
+        same_document = json.loads(render_custom()) == json.loads(expected)
+
+        orjson, core.renderer.orjson = core.renderer.orjson, None
+        try:
+            same_bytes = render_custom() == expected
+        finally:
+            core.renderer.orjson = orjson
+
+        before = statistics.median(run_timed(args.runs, render_former))
+        after = statistics.median(run_timed(args.runs, render_custom))
+        print(
+            f"{rows:>8}{before:>12.3f}{after:>12.3f}{before / after:>8.1f}x"
+            f"{str(same_document):>15}{str(same_bytes):>21}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Row serialization benchmark.
+
+Compares the per-row `Model.model_validate(row).model_dump()` of the views with the
+bulk `analytics.serialization.serialize_rows` on synthetic rows: SQLAlchemy `Row`s
+of an in-memory SQLite query, the `._asdict()` of those rows and ORM instances
+(`.scalars()`). Every case checks both paths return the very same payload.
+
+    python profiling/serialization.py --rows 10000 100000 --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, List
+
+from startup import UNREACHABLE_DB_ENV
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+# `db` reads its settings at import time, nothing connects to these hosts
+for key, value in UNREACHABLE_DB_ENV.items():
+    os.environ.setdefault(key, value)
+
+from sqlalchemy import DateTime, create_engine, text  # noqa: E402
+
+from analytics.models import (  # noqa: E402
+    DailyTurnoverPerformance,
+    InvestorWiseSaleableStock,
+)
+from analytics.orm import InvestorWiseSaleableStockOrm  # noqa: E402
+from analytics.serialization import serialize_rows  # noqa: E402
+
+INVESTORS_QUERY = text(
+    """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :rows)
+    SELECT 'COMPANY ' || (i % 350) AS company_name,
+           'BRANCH ' || (i % 40) AS branch_name,
+           printf('%08d', i) AS investor_code,
+           'CLIENT ' || i AS client_name,
+           'RM ' || (i % 200) AS rm_name,
+           i * 7 AS stock_available
+    FROM n
+    """
+)
+
+TURNOVER_QUERY = text(
+    """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :rows)
+    SELECT datetime('2024-01-01', '+' || (i % 3650) || ' days') AS trading_date,
+           i * 1.25 AS generated,
+           i * 1.5 AS target
+    FROM n
+    """
+).columns(trading_date=DateTime)
+
+
+def make_cases(rows: int) -> dict:
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        investors = connection.execute(INVESTORS_QUERY, {"rows": rows}).all()
+        turnovers = connection.execute(TURNOVER_QUERY, {"rows": rows}).all()
+
+    orm_investors = [
+        InvestorWiseSaleableStockOrm(
+            **{**row._asdict(), "stock_available": Decimal(row.stock_available)}
+        )
+        for row in investors
+    ]
+    return {
+        "investors (Row)": (InvestorWiseSaleableStock, investors),
+        "investors (._asdict)": (
+            InvestorWiseSaleableStock,
+            [row._asdict() for row in investors],
+        ),
+        "investors (ORM)": (InvestorWiseSaleableStock, orm_investors),
+        "turnover (Row)": (DailyTurnoverPerformance, turnovers),
+    }
+
+
+def run_timed(runs: int, func: Callable[[], List[dict]]) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'case':<22}{'rows':>8}{'per-row (s)':>13}{'bulk (s)':>10}"
+        f"{'speedup':>9}{'identical':>11}"
+    )
+    for rows in args.rows:
+        for name, (model, data) in make_cases(rows).items():
+            current = [model.model_validate(row).model_dump() for row in data]
+            identical = current == serialize_rows(model, data)
+
+            per_row = statistics.median(
+                run_timed(
+                    args.runs,
+                    lambda model=model, data=data: [
+                        model.model_validate(row).model_dump() for row in data
+                    ],
+                )
+            )
+            bulk = statistics.median(
+                run_timed(
+                    args.runs,
+                    lambda model=model, data=data: serialize_rows(model, data),
+                )
+            )
+            print(
+                f"{name:<22}{rows:>8}{per_row:>13.3f}{bulk:>10.3f}"
+                f"{per_row / bulk:>8.1f}x{str(identical):>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Cold start benchmark.
+
+Measures, in fresh interpreters, the time spent importing the project the way
+`manage.py`, gunicorn (with `--preload`) and the test runner do: settings, app
+registry, url configuration and the `db` package. The database hosts default to a
+non routable address, so any network round trip at import time shows up as the
+ODBC login timeout instead of a few hundred milliseconds.
+
+    python profiling/startup.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+UNREACHABLE_DB_ENV = {
+    "DB_HOST": "10.255.255.1",
+    "DB_PORT": "1433",
+    "DB_NAME": "bench",
+    "DB_USERNAME": "bench",
+    "DB_PASS": "bench",
+    "DB_BACKUP_HOST": "10.255.255.2",
+    "DB_BACKUP_PORT": "1433",
+    "DB_BACKUP_NAME": "bench",
+    "DB_BACKUP_USERNAME": "bench",
+    "DB_BACKUP_PASS": "bench",
+}
+
+SCENARIOS = {
+    "settings": "import core.settings",
+    "django.setup": "import django; django.setup()",
+    "urlconf": "import django; django.setup(); import core.urls",
+    "db": "import db",
+}
+
+
+def run_once(statement: str, env: dict) -> float:
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", statement],
+        cwd=BASE_DIR,
+        env=env,
+        check=True,
+    )
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--use-env",
+        action="store_true",
+        help="use the DB_* variables of the current environment / .env file",
+    )
+    args = parser.parse_args()
+
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "core.settings"}
+    if not args.use_env:
+        env.update(UNREACHABLE_DB_ENV)
+
+    print(f"{'scenario':<14}{'min (s)':>10}{'median (s)':>12}{'max (s)':>10}")
+    for name, statement in SCENARIOS.items():
+        timings = [run_once(statement, env) for _ in range(args.runs)]
+        print(
+            f"{name:<14}{min(timings):>10.3f}"
+            f"{statistics.median(timings):>12.3f}{max(timings):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()